@@ -0,0 +1,132 @@
+"""Precompute the POI travel matrix: ``python -m app.build_travel_matrix``.
+
+Loads the catalogue the service would load and writes all-pairs travel
+minutes and km between POI ordinals to ``--out`` (default
+``POI_MATRIX_PATH``). ``--source heuristic`` (the default) uses haversine
+distance at the :func:`speed_at_minute` of each time-of-day bucket;
+``--source osrm`` asks ``--osrm-url`` (a local OSRM instance) for blocks of
+the table. Rebuild whenever the catalogue changes: the service ignores a
+matrix built for another catalogue version.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import httpx
+import numpy as np
+
+from . import deps
+from .config import get_settings
+from .services.poi_matrix import MatrixWriter
+from .services.utils import pairwise_km, speed_at_minute
+
+logger = logging.getLogger(__name__)
+
+# hour whose speed fills cells OSRM cannot route
+FALLBACK_HOUR = 9
+
+
+def bucket_speeds(bucket_minutes: int) -> Tuple[List[float], List[int]]:
+    """Distinct heuristic speeds and, per time-of-day bucket, its speed's index."""
+    speeds: List[float] = []
+    layers: List[int] = []
+    for bucket in range(24 * 60 // bucket_minutes):
+        speed = speed_at_minute(bucket * bucket_minutes)
+        if speed not in speeds:
+            speeds.append(speed)
+        layers.append(speeds.index(speed))
+    return speeds, layers
+
+
+def build_heuristic(
+    writer: MatrixWriter, lats: np.ndarray, lngs: np.ndarray, speeds: List[float], block: int
+) -> None:
+    for start in range(0, len(lats), block):
+        rows = slice(start, start + block)
+        km = pairwise_km(lats[rows], lngs[rows], lats, lngs)
+        writer.distances[rows] = km
+        for layer, speed in enumerate(speeds):
+            writer.durations[layer, rows] = km / speed * 60
+
+
+def build_osrm(
+    writer: MatrixWriter, lats: np.ndarray, lngs: np.ndarray, url: str, block: int
+) -> None:
+    fallback_speed = speed_at_minute(FALLBACK_HOUR * 60)
+    with httpx.Client(timeout=60) as client:
+        for row_start in range(0, len(lats), block):
+            rows = np.arange(row_start, min(row_start + block, len(lats)))
+            for col_start in range(0, len(lats), block):
+                cols = np.arange(col_start, min(col_start + block, len(lats)))
+                points = np.concatenate([rows, cols])
+                coords = ";".join(f"{lngs[p]},{lats[p]}" for p in points)
+                sources = ";".join(map(str, range(len(rows))))
+                destinations = ";".join(map(str, range(len(rows), len(points))))
+                res = client.get(
+                    f"{url}/table/v1/driving/{coords}?annotations=duration,distance"
+                    f"&sources={sources}&destinations={destinations}"
+                )
+                res.raise_for_status()
+                data = res.json()
+                seconds = np.array(data["durations"], dtype=np.float64)  # None -> nan
+                meters = np.array(data["distances"], dtype=np.float64)
+                km = pairwise_km(lats[rows], lngs[rows], lats[cols], lngs[cols])
+                unroutable = np.isnan(seconds) | np.isnan(meters)
+                block_km = np.where(unroutable, km, meters / 1000)
+                block_min = np.where(unroutable, km / fallback_speed * 60, seconds / 60)
+                writer.distances[np.ix_(rows, cols)] = block_km
+                writer.durations[0][np.ix_(rows, cols)] = block_min
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, default=settings.poi_matrix_path)
+    parser.add_argument("--source", choices=("heuristic", "osrm"), default="heuristic")
+    parser.add_argument("--osrm-url", default=settings.osrm_url)
+    parser.add_argument(
+        "--bucket-minutes", type=int, default=settings.travel_bucket_minutes or 24 * 60
+    )
+    parser.add_argument("--dtype", choices=("float16", "float32"), default="float16")
+    parser.add_argument("--block", type=int, default=256)
+    args = parser.parse_args()
+    if args.out is None:
+        parser.error("--out is required when POI_MATRIX_PATH is not set")
+    if args.bucket_minutes <= 0 or (24 * 60) % args.bucket_minutes:
+        parser.error("--bucket-minutes must divide a day")
+
+    started = time.perf_counter()
+    snapshot = deps.load_catalogue(settings)
+    lats = np.asarray(snapshot.columns.latitude, dtype=np.float64)
+    lngs = np.asarray(snapshot.columns.longitude, dtype=np.float64)
+    target = deps.resolve_path(args.out)
+    if args.source == "osrm":
+        # OSRM times do not depend on the hour: one layer serves every bucket
+        layers = [0] * (24 * 60 // args.bucket_minutes)
+        writer = MatrixWriter(target, len(lats), 1, args.dtype)
+        # OSRM's default max-table-size is 100 coordinates
+        build_osrm(writer, lats, lngs, args.osrm_url, min(args.block, 50))
+    else:
+        speeds, layers = bucket_speeds(args.bucket_minutes)
+        writer = MatrixWriter(target, len(lats), len(speeds), args.dtype)
+        build_heuristic(writer, lats, lngs, speeds, args.block)
+    writer.publish(snapshot.version, args.bucket_minutes, layers, args.source)
+    logger.info(
+        "Built %dx%d %s travel matrix (%d layers) for catalogue %s at %s in %.0f ms",
+        len(lats),
+        len(lats),
+        args.source,
+        len(set(layers)),
+        snapshot.version,
+        target,
+        (time.perf_counter() - started) * 1000,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Hot reload of the POI catalogue via background snapshot builds."""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import deps
+from .columnar import MANIFEST
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+SourceSignature = Optional[Tuple[Tuple[int, int], ...]]
+
+
+def _signature(paths: List[Path]) -> SourceSignature:
+    stats = []
+    for path in paths:
+        if path.is_dir():
+            path = path / MANIFEST  # written last when a compiled catalogue is replaced
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        stats.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stats)
+
+
+class CatalogueManager:
+    """Rebuilds the catalogue off the request path and swaps it in atomically.
+
+    A reload reads the source into a new :class:`deps.CatalogueSnapshot`,
+    runs ``warm`` with that snapshot pinned so embeddings, the lexical index
+    and the spatial index for its version are resident, and only then makes
+    it active. Requests pin the snapshot they started on, so in-flight work
+    finishes against the old one. An optional watcher polls the source files
+    every ``CATALOGUE_WATCH_SECONDS`` and triggers the same reload.
+    """
+
+    def __init__(self, settings: Settings, warm: Callable[[], object]):
+        self.settings = settings
+        self.warm = warm
+        self._build_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._signature: SourceSignature = None
+        self._reloads = 0
+        self._unchanged = 0
+        self._failures = 0
+        self._last_error: Optional[str] = None
+        self._last_build_ms: Optional[float] = None
+
+    def reload_in_background(self) -> bool:
+        """Start a rebuild unless one is already running."""
+        if self._build_lock.locked():
+            return False
+        threading.Thread(target=self.reload, name="catalogue-reload", daemon=True).start()
+        return True
+
+    def reload(self) -> bool:
+        """Build and activate a new snapshot; returns whether the version changed."""
+        if not self._build_lock.acquire(blocking=False):
+            return False
+        started = time.perf_counter()
+        try:
+            self._signature = _signature(deps.catalogue_sources(self.settings))
+            snapshot = deps.load_catalogue(self.settings)
+            if snapshot.version == deps.active_catalogue().version:
+                self._unchanged += 1
+                return False
+            with deps.pinned_catalogue(snapshot):
+                self.warm()
+            deps.activate_catalogue(snapshot)
+            self._reloads += 1
+            self._last_error = None
+            logger.info(
+                "Activated catalogue %s (%d POIs) from %s",
+                snapshot.version,
+                len(snapshot.columns),
+                snapshot.source,
+            )
+            return True
+        except Exception as exc:  # noqa: BLE001
+            self._failures += 1
+            self._last_error = f"{type(exc).__name__}: {exc}"
+            logger.exception("Catalogue reload failed; keeping the current snapshot")
+            return False
+        finally:
+            self._last_build_ms = round((time.perf_counter() - started) * 1000, 1)
+            self._build_lock.release()
+
+    def start_watching(self) -> None:
+        interval = self.settings.catalogue_watch_seconds
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._signature = _signature(deps.catalogue_sources(self.settings))
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="catalogue-watch", daemon=True
+        )
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _watch(self, interval: float) -> None:
+        sources = deps.catalogue_sources(self.settings)
+        pending: SourceSignature = None
+        while not self._stop.wait(interval):
+            signature = _signature(sources)
+            if signature is None:
+                continue  # source missing or mid-replace; keep serving the current snapshot
+            if signature == self._signature:
+                pending = None
+            elif signature != pending:
+                # wait one more tick so a file still being written settles first
+                pending = signature
+            else:
+                logger.info("Catalogue sources %s changed; reloading", [str(p) for p in sources])
+                self.reload()
+                pending = None
+
+    def stats(self) -> Dict[str, object]:
+        snapshot = deps.active_catalogue()
+        return {
+            "version": snapshot.version,
+            "rows": len(snapshot.columns),
+            "source": snapshot.source,
+            "loaded_at": snapshot.loaded_at,
+            "building": self._build_lock.locked(),
+            "watching": self._watcher is not None and not self._stop.is_set(),
+            "reloads": self._reloads,
+            "unchanged": self._unchanged,
+            "failures": self._failures,
+            "last_build_ms": self._last_build_ms,
+            "last_error": self._last_error,
+        }
+
+
+__all__ = ["CatalogueManager"]
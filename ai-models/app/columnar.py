@@ -0,0 +1,321 @@
+"""Compiled, memory-mappable columnar form of the POI catalogue.
+
+A compiled catalogue is a directory of ``.npy`` arrays plus a
+``manifest.json``:
+
+* text columns (id, name, description, category, image_url) are int32 codes
+  into one deduplicated UTF-8 string table (``-1`` = missing);
+* latitude / longitude / rating are float64, price_level is int8 (``-1`` =
+  missing);
+* tags are integer-coded sets: per-row ``tag_offsets`` into ``tag_codes``,
+  whose values index ``tag_names`` (string codes, first-seen order);
+* the other list columns (``time_to_visit``, ``best_weather``) use the same
+  offsets/codes layout with codes straight into the string table;
+* ``duration_hours`` is float64 (NaN = unknown);
+* opening hours are a fixed ``(rows, 7, slots, 2)`` int16 array of
+  ``[open, close)`` minutes since midnight, ``-1`` padded.
+
+:func:`load_columns` maps every array read-only, so startup cost no longer
+grows with per-row CSV parsing, tag splitting and ``json.loads``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 2
+MANIFEST = "manifest.json"
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+TEXT_COLUMNS = ("id", "name", "description", "category", "subcategory", "image_url")
+LIST_COLUMNS = ("time_to_visit", "best_weather")
+FRAME_COLUMNS = (
+    "id",
+    "name",
+    "description",
+    "category",
+    "latitude",
+    "longitude",
+    "rating",
+    "price_level",
+    "tags",
+    "image_url",
+    "opening_hours",
+    "subcategory",
+    "duration_hours",
+    "time_to_visit",
+    "best_weather",
+)
+
+
+@dataclass(frozen=True)
+class CatalogueColumns:
+    version: str
+    string_data: np.ndarray
+    string_offsets: np.ndarray
+    id: np.ndarray
+    name: np.ndarray
+    description: np.ndarray
+    category: np.ndarray
+    subcategory: np.ndarray
+    image_url: np.ndarray
+    latitude: np.ndarray
+    longitude: np.ndarray
+    rating: np.ndarray
+    price_level: np.ndarray
+    tag_offsets: np.ndarray
+    tag_codes: np.ndarray
+    tag_names: np.ndarray
+    hours: np.ndarray
+    hours_known: np.ndarray
+    duration_hours: np.ndarray
+    time_to_visit_offsets: np.ndarray
+    time_to_visit_codes: np.ndarray
+    best_weather_offsets: np.ndarray
+    best_weather_codes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def strings(self) -> List[str]:
+        """Decode the string table (one Python ``str`` per distinct value)."""
+        blob = self.string_data.tobytes()
+        offsets = self.string_offsets.tolist()
+        return [blob[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    def string(self, code: int) -> str:
+        """Decode one entry of the string table without materialising the rest."""
+        start, end = int(self.string_offsets[code]), int(self.string_offsets[code + 1])
+        return self.string_data[start:end].tobytes().decode("utf-8")
+
+    def to_frame(self) -> pd.DataFrame:
+        """The frame services consume, in the same layout ``read_poi_frame`` produces."""
+        table = self.strings()
+        text = {column: _decode(getattr(self, column), table) for column in TEXT_COLUMNS}
+        tag_table = [table[code] for code in self.tag_names.tolist()]
+        tags = _decode_lists(self.tag_offsets, self.tag_codes, tag_table)
+        lists = {
+            column: _decode_lists(
+                getattr(self, f"{column}_offsets"), getattr(self, f"{column}_codes"), table
+            )
+            for column in LIST_COLUMNS
+        }
+        price = self.price_level.astype(np.float64)
+        price[self.price_level < 0] = np.nan
+        price_col = price.astype(np.int64) if not np.isnan(price).any() else price
+        return pd.DataFrame(
+            {
+                "id": text["id"],
+                "name": text["name"],
+                "description": text["description"],
+                "category": text["category"],
+                "latitude": np.asarray(self.latitude),
+                "longitude": np.asarray(self.longitude),
+                "rating": np.asarray(self.rating),
+                "price_level": price_col,
+                "tags": tags,
+                "image_url": text["image_url"],
+                "opening_hours": _hours_dicts(self.hours, self.hours_known),
+                "subcategory": text["subcategory"],
+                "duration_hours": np.asarray(self.duration_hours),
+                **lists,
+            },
+            columns=list(FRAME_COLUMNS),
+        )
+
+
+def compile_frame(df: pd.DataFrame) -> CatalogueColumns:
+    """Encode a ``read_poi_frame``-style frame into columns."""
+    table: Dict[str, int] = {}
+    text = {column: _encode(_column(df, column), table) for column in TEXT_COLUMNS}
+
+    tag_table: Dict[str, int] = {}
+    tag_offsets, tag_codes = _encode_lists(_column(df, "tags"), tag_table)
+    tag_names = np.asarray([table.setdefault(tag, len(table)) for tag in tag_table], dtype=np.int32)
+    lists = {}
+    for column in LIST_COLUMNS:
+        offsets, codes = _encode_lists(_column(df, column), table)
+        lists[f"{column}_offsets"], lists[f"{column}_codes"] = offsets, codes
+
+    hours, known = _hours_array(_column(df, "opening_hours"))
+    price = pd.to_numeric(pd.Series(_column(df, "price_level")), errors="coerce").to_numpy()
+    encoded = [s.encode("utf-8") for s in table]
+    string_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=string_offsets[1:])
+    arrays = dict(
+        string_data=np.frombuffer(b"".join(encoded), dtype=np.uint8).copy(),
+        string_offsets=string_offsets,
+        **text,
+        latitude=_floats(df, "latitude"),
+        longitude=_floats(df, "longitude"),
+        rating=_floats(df, "rating"),
+        price_level=np.where(np.isnan(price), -1, price).astype(np.int8),
+        tag_offsets=tag_offsets,
+        tag_codes=tag_codes,
+        tag_names=tag_names,
+        hours=hours,
+        hours_known=known,
+        duration_hours=_floats(df, "duration_hours"),
+        **lists,
+    )
+    return CatalogueColumns(version=_content_hash(arrays), **arrays)
+
+
+def save_columns(columns: CatalogueColumns, target: Path) -> None:
+    """Write ``columns`` to directory ``target``, replacing it atomically."""
+    target = Path(target)
+    staging = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    for name in _array_names():
+        np.save(staging / f"{name}.npy", np.ascontiguousarray(getattr(columns, name)))
+    manifest = {"format": FORMAT_VERSION, "version": columns.version, "rows": len(columns)}
+    (staging / MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+    previous = target.with_name(f".{target.name}.{os.getpid()}.old")
+    if target.exists():
+        os.replace(target, previous)
+    os.replace(staging, target)
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+def load_columns(source: Path, mmap: bool = True) -> CatalogueColumns:
+    """Map a compiled catalogue directory (read-only, zero-copy when ``mmap``)."""
+    source = Path(source)
+    manifest = json.loads((source / MANIFEST).read_text(encoding="utf-8"))
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"{source} has catalogue format {manifest.get('format')}, need {FORMAT_VERSION}")
+    mode = "r" if mmap else None
+    arrays = {name: np.load(source / f"{name}.npy", mmap_mode=mode) for name in _array_names()}
+    return CatalogueColumns(version=manifest["version"], **arrays)
+
+
+def is_compiled(path: Optional[Path]) -> bool:
+    return path is not None and (Path(path) / MANIFEST).exists()
+
+
+def parse_minutes(value: str) -> int:
+    hours, _, minutes = str(value).strip().partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+
+def format_minutes(value: int) -> str:
+    return f"{value // 60:02d}:{value % 60:02d}"
+
+
+def _array_names() -> List[str]:
+    return [f.name for f in fields(CatalogueColumns) if f.name != "version"]
+
+
+def _column(df: pd.DataFrame, column: str) -> list:
+    if column not in df.columns:
+        return [None] * len(df)
+    return df[column].tolist()
+
+
+def _floats(df: pd.DataFrame, column: str) -> np.ndarray:
+    return pd.to_numeric(pd.Series(_column(df, column)), errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _encode(values: Sequence, table: Dict[str, int]) -> np.ndarray:
+    codes = np.empty(len(values), dtype=np.int32)
+    for pos, value in enumerate(values):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            codes[pos] = -1
+        else:
+            codes[pos] = table.setdefault(str(value), len(table))
+    return codes
+
+
+def _decode(codes: np.ndarray, table: List[str]) -> List[Optional[str]]:
+    return [table[code] if code >= 0 else None for code in codes.tolist()]
+
+
+def _encode_lists(values: Sequence, table: Dict[str, int]) -> tuple[np.ndarray, np.ndarray]:
+    lengths = np.zeros(len(values), dtype=np.int64)
+    flat: List[int] = []
+    for pos, items in enumerate(values):
+        items = items if isinstance(items, list) else []
+        lengths[pos] = len(items)
+        flat.extend(table.setdefault(str(item), len(table)) for item in items)
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets, np.asarray(flat, dtype=np.int32)
+
+
+def _decode_lists(offsets: np.ndarray, codes: np.ndarray, table: List[str]) -> List[List[str]]:
+    bounds = offsets.tolist()
+    flat = [table[code] for code in codes.tolist()]
+    return [flat[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def _hours_array(values: Sequence) -> tuple[np.ndarray, np.ndarray]:
+    parsed: List[List[List[tuple[int, int]]]] = []
+    known = np.zeros(len(values), dtype=bool)
+    slots = 1
+    for pos, value in enumerate(values):
+        days: List[List[tuple[int, int]]] = [[] for _ in DAYS]
+        if isinstance(value, dict) and value:
+            known[pos] = True
+            for day_pos, day in enumerate(DAYS):
+                for interval in value.get(day) or []:
+                    try:
+                        days[day_pos].append((parse_minutes(interval[0]), parse_minutes(interval[1])))
+                    except (ValueError, IndexError, TypeError):
+                        continue
+                slots = max(slots, len(days[day_pos]))
+        parsed.append(days)
+    hours = np.full((len(values), len(DAYS), slots, 2), -1, dtype=np.int16)
+    for pos, days in enumerate(parsed):
+        for day_pos, intervals in enumerate(days):
+            for slot, (start, end) in enumerate(intervals):
+                hours[pos, day_pos, slot] = (start, end)
+    return hours, known
+
+
+def _hours_dicts(hours: np.ndarray, known: np.ndarray) -> List[dict]:
+    # schedules repeat heavily across POIs: format each distinct one once
+    # (rows with the same schedule share one dict; treat it as read-only)
+    n = len(known)
+    if n == 0:
+        return []
+    flat = np.where(known[:, None], hours.reshape(n, -1), np.iinfo(np.int16).min)
+    patterns, inverse = np.unique(flat, axis=0, return_inverse=True)
+    shape = hours.shape[1:]
+    formatted: List[dict] = []
+    for pattern in patterns:
+        if pattern[0] == np.iinfo(np.int16).min:
+            formatted.append({})
+            continue
+        days = pattern.reshape(shape).tolist()
+        formatted.append(
+            {
+                day: [[format_minutes(s), format_minutes(e)] for s, e in intervals if s >= 0]
+                for day, intervals in zip(DAYS, days)
+            }
+        )
+    return [formatted[pos] for pos in inverse.ravel().tolist()]
+
+
+def _content_hash(arrays: Dict[str, np.ndarray]) -> str:
+    digest = hashlib.sha1(f"format={FORMAT_VERSION}".encode("utf-8"))
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode("utf-8"))
+        digest.update(array.tobytes())
+    return digest.hexdigest()[:16]
+
+
+__all__ = [
+    "CatalogueColumns",
+    "compile_frame",
+    "is_compiled",
+    "load_columns",
+    "save_columns",
+]
@@ -0,0 +1,53 @@
+"""Compile the POI catalogue: ``python -m app.compile_catalogue``.
+
+Reads ``--source`` (default ``POI_CSV_PATH``) plus the places streamed from
+``--places`` (default ``POI_PLACES_PATH``) and writes the columnar,
+memory-mappable form to ``--out`` (default ``POI_CATALOGUE_PATH``). Point
+``POI_CATALOGUE_PATH`` at the output and the service maps it at startup
+instead of parsing the CSV; re-running the compiler swaps the directory
+atomically, which the catalogue watcher picks up as a reload.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from pathlib import Path
+
+from . import columnar, deps
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", type=Path, default=settings.poi_csv_path)
+    parser.add_argument("--places", type=Path, default=settings.poi_places_path)
+    parser.add_argument("--out", type=Path, default=settings.poi_catalogue_path)
+    args = parser.parse_args()
+    if args.out is None:
+        parser.error("--out is required when POI_CATALOGUE_PATH is not set")
+
+    source = deps.resolve_path(args.source)
+    if not source.exists():
+        parser.error(f"{source} does not exist")
+    started = time.perf_counter()
+    places = deps.resolve_path(args.places) if args.places is not None else None
+    columns = columnar.compile_frame(deps.read_catalogue_frame(source, places))
+    target = deps.resolve_path(args.out)
+    columnar.save_columns(columns, target)
+    logger.info(
+        "Compiled %d POIs from %s to %s (version %s) in %.0f ms",
+        len(columns),
+        source,
+        target,
+        columns.version,
+        (time.perf_counter() - started) * 1000,
+    )
+
+
+if __name__ == "__main__":
+    main()
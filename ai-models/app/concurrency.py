@@ -0,0 +1,133 @@
+"""Bounded execution primitives for the async FastAPI handlers."""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Mapping, TypeVar
+
+from fastapi import HTTPException
+
+T = TypeVar("T")
+
+DEFAULT_ENDPOINT_LIMIT = 16
+
+
+class InferenceExecutor:
+    """Dedicated, fixed-size thread pool for CPU-bound model work.
+
+    Keeping inference off Starlette's default pool means slow calls there
+    cannot starve encoding and scoring, and vice versa.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._peak_queued = 0
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+        loop = asyncio.get_running_loop()
+        # carry context vars (e.g. the request's pinned catalogue) into the worker
+        context = contextvars.copy_context()
+        call = partial(context.run, self._call, fn, *args, **kwargs)
+        return await loop.run_in_executor(self._pool, call)
+
+    def _call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "active": self._active,
+                "queued": self._queued,
+                "peak_queued": self._peak_queued,
+                "completed": self._completed,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class EndpointLimiter:
+    """Caps in-flight requests for one endpoint and bounds its wait queue.
+
+    Requests beyond ``max_queue`` waiters, or that wait longer than
+    ``queue_timeout`` seconds, are rejected with 503 instead of piling up.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(self.limit)
+        self._active = 0
+        self._waiting = 0
+        self._peak_waiting = 0
+        self._completed = 0
+        self._rejected = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            self._rejected += 1
+            raise HTTPException(status_code=503, detail=f"{self.name} is overloaded, retry shortly")
+        self._waiting += 1
+        self._peak_waiting = max(self._peak_waiting, self._waiting)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout or None)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise HTTPException(status_code=503, detail=f"{self.name} queue timed out") from None
+        finally:
+            self._waiting -= 1
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._completed += 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "limit": self.limit,
+            "active": self._active,
+            "waiting": self._waiting,
+            "peak_waiting": self._peak_waiting,
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }
+
+
+def build_limiters(
+    names: Iterable[str], limits: Mapping[str, int], max_queue: int, queue_timeout: float
+) -> Dict[str, EndpointLimiter]:
+    return {
+        name: EndpointLimiter(
+            name, limits.get(name, DEFAULT_ENDPOINT_LIMIT), max_queue, queue_timeout
+        )
+        for name in names
+    }
+
+
+__all__ = ["EndpointLimiter", "InferenceExecutor", "build_limiters"]
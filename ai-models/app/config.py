@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
@@ -17,18 +17,70 @@ class Settings(BaseSettings):
     embed_cache_dir: Path = Field(
         default=Path("./app/data/cache"), alias="EMBED_CACHE_DIR"
     )
+    embed_backend: str = Field(default="torch", alias="EMBED_BACKEND")
+    embed_onnx_path: Optional[Path] = Field(default=None, alias="EMBED_ONNX_PATH")
+    embed_cache_memory_entries: int = Field(
+        default=50_000, alias="EMBED_CACHE_MEMORY_ENTRIES"
+    )
+    embed_cache_disk: bool = Field(default=True, alias="EMBED_CACHE_DISK")
+    embed_batch_max_wait_ms: float = Field(default=5.0, alias="EMBED_BATCH_MAX_WAIT_MS")
+    embed_batch_max_size: int = Field(default=64, alias="EMBED_BATCH_MAX_SIZE")
     reco_weights_raw: str = Field(
         default="0.45,0.2,0.2,0.05,0.1", alias="RECO_WEIGHTS"
     )
+    reco_cache_size: int = Field(default=2048, alias="RECO_CACHE_SIZE")
+    reco_cache_ttl_seconds: float = Field(default=600.0, alias="RECO_CACHE_TTL_SECONDS")
+    reco_cache_location_grid: float = Field(default=0.002, alias="RECO_CACHE_LOCATION_GRID")
+    reco_radius_km: float = Field(default=0.0, alias="RECO_RADIUS_KM")
+    itinerary_budget_ms: float = Field(default=250.0, alias="ITINERARY_BUDGET_MS")
+    itinerary_workers: int = Field(default=2, alias="ITINERARY_WORKERS")
+    spatial_cell_km: float = Field(default=1.0, alias="SPATIAL_CELL_KM")
+    vector_index: str = Field(default="flat", alias="VECTOR_INDEX")
+    ivf_nlist: int = Field(default=0, alias="IVF_NLIST")
+    ivf_nprobe: int = Field(default=8, alias="IVF_NPROBE")
+    retrieval_candidates: int = Field(default=500, alias="RETRIEVAL_CANDIDATES")
+    lexical_max_features: int = Field(default=2048, alias="LEXICAL_MAX_FEATURES")
+    lexical_compact_delta_rows: int = Field(default=256, alias="LEXICAL_COMPACT_DELTA_ROWS")
+    admin_token: str = Field(default="", alias="ADMIN_TOKEN")
     osrm_url: str = Field(default="http://localhost:5000", alias="OSRM_URL")
+    travel_cache_size: int = Field(default=50000, alias="TRAVEL_CACHE_SIZE")
+    travel_cache_ttl_seconds: float = Field(default=86400.0, alias="TRAVEL_CACHE_TTL_SECONDS")
+    travel_cache_precision: int = Field(default=4, alias="TRAVEL_CACHE_PRECISION")
+    travel_bucket_minutes: int = Field(default=60, alias="TRAVEL_BUCKET_MINUTES")
     gemini_api_key: str = Field(default="", alias="GEMINI_API_KEY")
     gemini_model: str = Field(default="gemini-2.5-flash", alias="GEMINI_MODEL")
     gemini_requests_per_minute: int = Field(
         default=30, alias="GEMINI_REQUESTS_PER_MINUTE"
     )
+    gemini_burst: int = Field(default=5, alias="GEMINI_BURST")
+    gemini_queue_limit: int = Field(default=32, alias="GEMINI_QUEUE_LIMIT")
+    gemini_max_wait_seconds: float = Field(default=3.0, alias="GEMINI_MAX_WAIT_SECONDS")
+    gemini_limiter_path: Optional[Path] = Field(default=None, alias="GEMINI_LIMITER_PATH")
+    gemini_fake: bool = Field(default=False, alias="GEMINI_FAKE")
+    chat_cache_size: int = Field(default=512, alias="CHAT_CACHE_SIZE")
+    chat_cache_ttl_seconds: float = Field(default=3600.0, alias="CHAT_CACHE_TTL_SECONDS")
+    chat_cache_similarity: float = Field(default=0.9, alias="CHAT_CACHE_SIMILARITY")
+    chat_retrieval_budget_ms: float = Field(default=1000.0, alias="CHAT_RETRIEVAL_BUDGET_MS")
+    chat_gemini_budget_ms: float = Field(default=2500.0, alias="CHAT_GEMINI_BUDGET_MS")
+    chat_background_limit: int = Field(default=8, alias="CHAT_BACKGROUND_LIMIT")
+    safety_policies_path: Optional[Path] = Field(default=None, alias="SAFETY_POLICIES_PATH")
+    inference_workers: int = Field(default=4, alias="INFERENCE_WORKERS")
+    endpoint_limits_raw: str = Field(
+        default="recommend=16,recommend_batch=2,itinerary=8,travel=16,embed=8,chat=4",
+        alias="ENDPOINT_LIMITS",
+    )
+    endpoint_queue_limit: int = Field(default=64, alias="ENDPOINT_QUEUE_LIMIT")
+    endpoint_queue_timeout_seconds: float = Field(
+        default=10.0, alias="ENDPOINT_QUEUE_TIMEOUT_SECONDS"
+    )
+    catalogue_watch_seconds: float = Field(default=5.0, alias="CATALOGUE_WATCH_SECONDS")
+    startup_mode: str = Field(default="eager", alias="STARTUP_MODE")
     poi_csv_path: Path = Field(
         default=Path("../backend/seed/pois.csv"), alias="POI_CSV_PATH"
     )
+    poi_catalogue_path: Optional[Path] = Field(default=None, alias="POI_CATALOGUE_PATH")
+    poi_matrix_path: Optional[Path] = Field(default=None, alias="POI_MATRIX_PATH")
+    poi_places_path: Optional[Path] = Field(default=None, alias="POI_PLACES_PATH")
 
     class Config:
         env_file = ".env"
@@ -38,6 +90,15 @@ class Settings(BaseSettings):
     def reco_weights(self) -> List[float]:
         return [float(w.strip()) for w in self.reco_weights_raw.split(",") if w.strip()]
 
+    @property
+    def endpoint_limits(self) -> Dict[str, int]:
+        limits = {}
+        for pair in self.endpoint_limits_raw.split(","):
+            name, _, value = pair.partition("=")
+            if name.strip() and value.strip():
+                limits[name.strip()] = int(value)
+        return limits
+
 
 class HealthStatus(BaseModel):
     status: str = "ok"
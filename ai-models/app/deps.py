@@ -2,12 +2,18 @@
 from __future__ import annotations
 
 import json
-from functools import lru_cache
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import List, Sequence
+from typing import Iterator, List, Optional, Sequence
 
 import pandas as pd
 
+from . import columnar, places
 from .config import Settings, get_settings
 
 
@@ -86,17 +92,49 @@ def get_stopwords() -> List[str]:
     return [line.strip() for line in stop_path.read_text(encoding="utf-8").splitlines() if line.strip()]
 
 
-def _resolve_path(path: Path) -> Path:
+def resolve_path(path: Path) -> Path:
+    """Relative paths are taken from the repository root, like POI_CSV_PATH."""
     if path.is_absolute():
         return path
     base = Path(__file__).resolve().parents[2]
     return (base / path).resolve()
 
 
-@lru_cache(maxsize=1)
-def get_poi_frame() -> pd.DataFrame:
-    settings = get_settings()
-    csv_path = _resolve_path(settings.poi_csv_path)
+def catalogue_path(settings: Optional[Settings] = None) -> Path:
+    """Compiled catalogue directory when configured and built, else the CSV."""
+    settings = settings or get_settings()
+    if settings.poi_catalogue_path is not None:
+        compiled = resolve_path(settings.poi_catalogue_path)
+        if columnar.is_compiled(compiled):
+            return compiled
+    return resolve_path(settings.poi_csv_path)
+
+
+def places_path(settings: Optional[Settings] = None) -> Optional[Path]:
+    settings = settings or get_settings()
+    if settings.poi_places_path is None:
+        return None
+    return resolve_path(settings.poi_places_path)
+
+
+def catalogue_sources(settings: Optional[Settings] = None) -> List[Path]:
+    """Files a catalogue load reads; a compiled catalogue already has the places."""
+    path = catalogue_path(settings)
+    extra = places_path(settings)
+    if columnar.is_compiled(path) or extra is None:
+        return [path]
+    return [path, extra]
+
+
+def read_catalogue_frame(csv_path: Path, places_json: Optional[Path] = None) -> pd.DataFrame:
+    """The CSV catalogue plus any new places streamed from ``places_json``."""
+    df = read_poi_frame(csv_path)
+    if places_json is not None and places_json.exists():
+        df = places.load_places(df, places_json)
+    return df
+
+
+def read_poi_frame(csv_path: Path) -> pd.DataFrame:
     if csv_path.exists():
         df = pd.read_csv(csv_path)
         if "tags" in df.columns:
@@ -118,6 +156,95 @@ def _safe_json_load(val):
         return {}
 
 
+@dataclass(frozen=True)
+class CatalogueSnapshot:
+    """One immutable load of the POI catalogue.
+
+    ``version`` is a content hash of the compiled columns; every derived
+    artifact (features, embeddings, indexes) is keyed by it, so artifacts of
+    two snapshots can coexist while requests drain off the older one.
+    ``frame`` holds the same data as ``columns`` and is only materialised
+    when first read, so loading (or reloading an unchanged) compiled
+    catalogue stays a memory map.
+    """
+
+    version: str
+    columns: columnar.CatalogueColumns
+    source: str
+    loaded_at: float
+
+    @cached_property
+    def frame(self) -> pd.DataFrame:
+        # both sources go through the columns so services see one frame layout
+        return self.columns.to_frame()
+
+
+def load_catalogue(settings: Optional[Settings] = None) -> CatalogueSnapshot:
+    path = catalogue_path(settings)
+    if columnar.is_compiled(path):
+        columns = columnar.load_columns(path)
+    else:
+        columns = columnar.compile_frame(read_catalogue_frame(path, places_path(settings)))
+    return CatalogueSnapshot(columns.version, columns, str(path), time.time())
+
+
+_active: Optional[CatalogueSnapshot] = None
+_active_lock = threading.Lock()
+_pinned: ContextVar[Optional[CatalogueSnapshot]] = ContextVar("pinned_catalogue", default=None)
+
+
+def active_catalogue() -> CatalogueSnapshot:
+    global _active
+    if _active is None:
+        with _active_lock:
+            if _active is None:
+                _active = load_catalogue()
+    return _active
+
+
+def activate_catalogue(snapshot: CatalogueSnapshot) -> None:
+    """Make ``snapshot`` the one new requests see; in-flight requests keep theirs."""
+    global _active
+    with _active_lock:
+        _active = snapshot
+
+
+def current_catalogue() -> CatalogueSnapshot:
+    """The snapshot pinned for this request (or thread), else the active one."""
+    return _pinned.get() or active_catalogue()
+
+
+@contextmanager
+def pinned_catalogue(snapshot: Optional[CatalogueSnapshot] = None) -> Iterator[CatalogueSnapshot]:
+    """Route every ``get_poi_frame`` call in this context to one snapshot."""
+    snapshot = snapshot or active_catalogue()
+    token = _pinned.set(snapshot)
+    try:
+        yield snapshot
+    finally:
+        _pinned.reset(token)
+
+
+def get_poi_frame() -> pd.DataFrame:
+    return current_catalogue().frame
+
+
+def get_catalogue_version() -> str:
+    """Content hash of the POI frame, used to key derived artifacts."""
+    return current_catalogue().version
+
+
+def corpus_text(name, description, tags) -> str:
+    """Lexical document for one POI: name, description and tags."""
+    parts = []
+    for item in (name, description, tags):
+        if isinstance(item, list):
+            parts.extend(item)
+        else:
+            parts.append(str(item))
+    return " ".join(parts)
+
+
 def get_corpus() -> Sequence[str]:
     df = get_poi_frame()
     name_col = df["name"].fillna("").astype(str)
@@ -126,21 +253,24 @@ def get_corpus() -> Sequence[str]:
         tags_col = df["tags"]
     else:
         tags_col = pd.Series([[] for _ in range(len(df))])
-    combined = []
-    for row in zip(name_col, desc_col, tags_col):
-        parts = []
-        for item in row:
-            if isinstance(item, list):
-                parts.extend(item)
-            else:
-                parts.append(str(item))
-        combined.append(" ".join(parts))
-    return combined
+    return [corpus_text(*row) for row in zip(name_col, desc_col, tags_col)]
 
 
 __all__ = [
+    "CatalogueSnapshot",
+    "activate_catalogue",
+    "active_catalogue",
+    "catalogue_path",
+    "catalogue_sources",
+    "current_catalogue",
+    "load_catalogue",
+    "pinned_catalogue",
+    "places_path",
+    "read_catalogue_frame",
     "get_settings",
     "get_stopwords",
     "get_poi_frame",
+    "get_catalogue_version",
     "get_corpus",
+    "corpus_text",
 ]
@@ -0,0 +1,67 @@
+"""Export the configured sentence-transformer to ONNX for ``EMBED_BACKEND=onnx``.
+
+``python -m app.export_onnx [--quantize]`` writes the graph to
+``EMBED_ONNX_PATH`` (or ``EMBED_CACHE_DIR/onnx/<model>/model.onnx``).
+``--quantize`` additionally applies onnxruntime dynamic int8 quantisation to
+the weights, which roughly quarters the file and speeds up CPU inference.
+Needs torch, sentence-transformers and onnxruntime; the service itself only
+needs onnxruntime and transformers' tokenizer at run time.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+
+from .config import get_settings
+from .services.encoders import onnx_model_path
+
+logger = logging.getLogger(__name__)
+
+OPSET = 14
+
+
+def export(quantize: bool) -> None:
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    settings = get_settings()
+    target = onnx_model_path(settings)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    model = SentenceTransformer(settings.embed_model, cache_folder=str(settings.embed_cache_dir))
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    inputs = tuple(sample[name] for name in input_names)
+    dynamic = {name: {0: "batch", 1: "seq"} for name in [*input_names, "last_hidden_state"]}
+
+    raw_path = target.with_name("model.fp32.onnx") if quantize else target
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            inputs,
+            str(raw_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic,
+            opset_version=OPSET,
+        )
+    logger.info("Exported %s to %s", settings.embed_model, raw_path)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(str(raw_path), str(target), weight_type=QuantType.QInt8)
+        logger.info("Wrote int8-quantised graph to %s", target)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quantize", action="store_true", help="int8-quantise the ONNX weights")
+    export(parser.parse_args().quantize)
+
+
+if __name__ == "__main__":
+    main()
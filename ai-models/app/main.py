@@ -1,34 +1,60 @@
 """FastAPI application entrypoint."""
 from __future__ import annotations
 
-from fastapi import Depends, FastAPI
+import hmac
+import time
+from contextlib import AsyncExitStack
+from typing import Dict, List
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
+from . import deps
+from .catalogue import CatalogueManager
+from .concurrency import InferenceExecutor, build_limiters
 from .config import HealthStatus, get_settings
 from .schemas import (
+    CatalogueEditResponse,
     ChatRequest,
     ChatResponse,
     EmbedRequest,
     EmbedResponse,
     ItineraryRequest,
     ItineraryResponse,
+    MultiDayItineraryRequest,
+    MultiDayItineraryResponse,
+    PoiUpsertRequest,
+    RecommendBatchRequest,
+    RecommendBatchResponse,
     RecommendRequest,
     RecommendResponse,
     TravelTimeRequest,
     TravelTimeResponse,
     WeatherResponse,
 )
+from .services.availability import get_availability
 from .services.chatbot import ChatbotService
+from .services.embedding_store import PoiEmbeddingStore
 from .services.embeddings import EmbeddingService
+from .services.fake_gemini import FakeGeminiClient
 from .services.gemini_client import GeminiClient
 from .services.itinerary import ItineraryService
+from .services.lexical_store import LexicalIndexStore
+from .services.poi_matrix import get_poi_matrix
 from .services.recommend import RecommendService
+from .services.scoring import get_poi_features
+from .services.spatial_index import get_spatial_index
+from .services.travel_matrix import TravelMatrixService
 from .services.travel_time import TravelTimeService
 from .services.weather import WeatherService
-
+from .startup import StartupTracker, WarmupStep
+from .streaming import StreamTimings, sse_event
 
 app = FastAPI(title="MumbAI Trails AI", version="1.0.0")
 settings = get_settings()
+startup = StartupTracker()
 
 app.add_middleware(
     CORSMiddleware,
@@ -38,13 +64,83 @@ app.add_middleware(
     allow_credentials=True,
 )
 
-embedding_service = EmbeddingService(settings)
-recommend_service = RecommendService(settings, embedding_service)
-itinerary_service = ItineraryService(settings, recommend_service)
-travel_service = TravelTimeService(settings)
-gemini_client = GeminiClient(settings)
-chat_service = ChatbotService(settings, gemini_client)
+lexical_store = LexicalIndexStore(settings)
+embedding_service = EmbeddingService(settings, lexical_store)
+poi_store = PoiEmbeddingStore(settings, embedding_service)
+recommend_service = RecommendService(settings, embedding_service, poi_store)
+travel_matrix = TravelMatrixService(settings)
+itinerary_service = ItineraryService(settings, recommend_service, travel_matrix)
+travel_service = TravelTimeService(settings, travel_matrix)
+gemini_client = FakeGeminiClient(settings) if settings.gemini_fake else GeminiClient(settings)
+chat_service = ChatbotService(settings, gemini_client, poi_store, lexical_store)
 weather_service = WeatherService(settings)
+chat_stream_timings = StreamTimings()
+
+inference = InferenceExecutor(settings.inference_workers)
+limiters = build_limiters(
+    ("recommend", "recommend_batch", "itinerary", "travel", "embed", "chat"),
+    settings.endpoint_limits,
+    max_queue=settings.endpoint_queue_limit,
+    queue_timeout=settings.endpoint_queue_timeout_seconds,
+)
+
+
+def catalogue_steps() -> List[WarmupStep]:
+    """Artifacts derived from one catalogue snapshot."""
+    return [
+        ("poi_embeddings", poi_store.load),
+        ("scoring_features", lambda: (get_poi_features(), get_spatial_index())),
+        ("opening_hours", get_availability),
+        ("travel_matrix", get_poi_matrix),
+        ("chat_index", chat_service.warm),
+    ]
+
+
+def warm_catalogue() -> None:
+    for _, step in catalogue_steps():
+        step()
+
+
+def warmup_steps() -> List[WarmupStep]:
+    """Everything a first request would otherwise pay for, in dependency order."""
+    return [
+        ("catalogue", deps.get_catalogue_version),
+        ("encoder", embedding_service.warm),
+        *catalogue_steps(),
+        ("route_workers", itinerary_service.warm),
+        ("gemini", gemini_client.warm),
+    ]
+
+
+catalogue = CatalogueManager(settings, warm=warm_catalogue)
+
+
+@app.on_event("startup")
+def warm_up() -> None:
+    mode = settings.startup_mode.lower()
+    if mode == "background":
+        startup.warm_up_in_background(warmup_steps())
+    elif mode == "lazy":
+        startup.mark_ready()
+    else:
+        startup.warm_up(warmup_steps())
+    catalogue.start_watching()
+
+
+@app.on_event("shutdown")
+async def release_resources() -> None:
+    catalogue.stop()
+    await travel_matrix.aclose()
+    await chat_service.close()
+    inference.shutdown()
+    itinerary_service.shutdown()
+
+
+@app.middleware("http")
+async def pin_catalogue(request: Request, call_next):
+    """Serve each request from the snapshot active when it arrived."""
+    with deps.pinned_catalogue():
+        return await call_next(request)
 
 
 def get_recommend_service() -> RecommendService:
@@ -71,8 +167,16 @@ def get_weather_service() -> WeatherService:
     return weather_service
 
 
+def require_admin(x_admin_token: str = Header(default="")) -> None:
+    """Admin endpoints stay off unless ADMIN_TOKEN is set, then need it verbatim."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if not hmac.compare_digest(x_admin_token.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
 @app.get("/health", response_model=HealthStatus)
-def health() -> HealthStatus:
+async def health() -> HealthStatus:
     return HealthStatus(
         status="ok",
         cache_dir=settings.embed_cache_dir,
@@ -80,46 +184,167 @@ def health() -> HealthStatus:
     )
 
 
+@app.get("/live")
+async def live() -> Dict[str, str]:
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready(response: Response) -> Dict[str, object]:
+    report = startup.report()
+    if not report["ready"]:
+        response.status_code = 503
+    return report
+
+
+@app.get("/metrics")
+async def metrics() -> Dict[str, dict]:
+    return {
+        "recommend_cache": recommend_service.cache_stats(),
+        "embed_cache": embedding_service.cache_stats(),
+        "embed_batcher": embedding_service.batch_stats(),
+        "chat_cache": chat_service.cache_stats(),
+        "chat_pipeline": chat_service.pipeline_stats(),
+        "guardrails": chat_service.guardrails.stats(),
+        "chat_stream": chat_stream_timings.stats(),
+        "gemini_limiter": gemini_client.limiter_stats(),
+        "travel_matrix": travel_matrix.stats(),
+        "lexical_index": lexical_store.stats(),
+        "catalogue": catalogue.stats(),
+        "inference_executor": inference.stats(),
+        "endpoints": {name: limiter.stats() for name, limiter in limiters.items()},
+    }
+
+
 @app.post("/embed", response_model=EmbedResponse)
-def embed(payload: EmbedRequest, svc: EmbeddingService = Depends(get_embedding_service)) -> EmbedResponse:
-    vectors = svc.embed_texts(payload.texts)
+async def embed(
+    payload: EmbedRequest, svc: EmbeddingService = Depends(get_embedding_service)
+) -> EmbedResponse:
+    async with limiters["embed"].slot():
+        vectors = await inference.run(svc.embed_texts, payload.texts)
     return EmbedResponse(vectors=vectors)
 
 
 @app.post("/recommend", response_model=RecommendResponse)
-def recommend(
+async def recommend(
     payload: RecommendRequest,
     svc: RecommendService = Depends(get_recommend_service),
 ) -> RecommendResponse:
-    items = svc.recommend(payload)
+    async with limiters["recommend"].slot():
+        items = await inference.run(svc.recommend, payload)
     return RecommendResponse(items=items)
 
 
+@app.post("/recommend/batch", response_model=RecommendBatchResponse)
+async def recommend_batch(
+    payload: RecommendBatchRequest,
+    svc: RecommendService = Depends(get_recommend_service),
+) -> RecommendBatchResponse:
+    async with limiters["recommend_batch"].slot():
+        ranked = await inference.run(svc.recommend_batch, payload.requests)
+    return RecommendBatchResponse(results=[RecommendResponse(items=items) for items in ranked])
+
+
 @app.post("/itinerary", response_model=ItineraryResponse)
-def build_itinerary(
+async def build_itinerary(
     payload: ItineraryRequest,
     svc: ItineraryService = Depends(get_itinerary_service),
 ) -> ItineraryResponse:
-    return svc.build(payload)
+    async with limiters["itinerary"].slot():
+        return await inference.run(svc.build, payload)
+
+
+@app.post("/itinerary/multi-day", response_model=MultiDayItineraryResponse)
+async def build_multi_day_itinerary(
+    payload: MultiDayItineraryRequest,
+    svc: ItineraryService = Depends(get_itinerary_service),
+) -> MultiDayItineraryResponse:
+    async with limiters["itinerary"].slot():
+        return await inference.run(svc.build_multi_day, payload)
 
 
 @app.post("/travel-time", response_model=TravelTimeResponse)
-def travel_time(
+async def travel_time(
     payload: TravelTimeRequest,
     svc: TravelTimeService = Depends(get_travel_service),
 ) -> TravelTimeResponse:
-    return svc.estimate(payload.coords)
+    async with limiters["travel"].slot():
+        return await svc.estimate_async(payload.coords)
 
 
 @app.post("/chat", response_model=ChatResponse)
-def chat(
+async def chat(
     payload: ChatRequest,
     svc: ChatbotService = Depends(get_chat_service),
 ) -> ChatResponse:
-    answer, references = svc.answer(payload.query)
+    async with limiters["chat"].slot():
+        answer, references = await svc.respond(payload.query, inference)
     return ChatResponse(answer=answer, references=references)
 
 
+@app.post("/chat/stream")
+async def chat_stream(
+    payload: ChatRequest,
+    svc: ChatbotService = Depends(get_chat_service),
+) -> StreamingResponse:
+    """``/chat`` as server-sent events: references, draft, Gemini tokens, done."""
+    started = time.perf_counter()
+    slot = AsyncExitStack()
+    # wait for the slot here so overload is still a plain 503, not a broken stream
+    await slot.enter_async_context(limiters["chat"].slot())
+
+    async def events():
+        try:
+            context = await inference.run(svc.retrieve, payload.query)
+            async for event, data in svc.stream_answer(context):
+                yield sse_event(event, data)
+        finally:
+            # free the slot as soon as the answer is done, not after the last send
+            await slot.aclose()
+
+    # the body may never be iterated (client gone before the first send), so the
+    # response releases the slot too; closing the stack twice is a no-op
+    return StreamingResponse(
+        chat_stream_timings.timed(events(), started),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(slot.aclose),
+    )
+
+
 @app.get("/weather", response_model=WeatherResponse)
-def weather(svc: WeatherService = Depends(get_weather_service)) -> WeatherResponse:
+async def weather(svc: WeatherService = Depends(get_weather_service)) -> WeatherResponse:
     return WeatherResponse(**svc.current())
+
+
+@app.put(
+    "/admin/pois/{poi_id}",
+    response_model=CatalogueEditResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def upsert_poi(poi_id: str, payload: PoiUpsertRequest) -> CatalogueEditResponse:
+    """Apply a CMS edit to chat retrieval without a restart."""
+    await inference.run(lexical_store.upsert_poi, {"id": poi_id, **payload.model_dump()})
+    return CatalogueEditResponse(id=poi_id, status="upserted", index=lexical_store.stats())
+
+
+@app.delete(
+    "/admin/pois/{poi_id}",
+    response_model=CatalogueEditResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def delete_poi(poi_id: str) -> CatalogueEditResponse:
+    if not await inference.run(lexical_store.remove_poi, poi_id):
+        raise HTTPException(status_code=404, detail=f"Unknown POI {poi_id}")
+    return CatalogueEditResponse(id=poi_id, status="deleted", index=lexical_store.stats())
+
+
+@app.get("/catalogue")
+async def catalogue_status() -> Dict[str, object]:
+    return catalogue.stats()
+
+
+@app.post("/catalogue/reload", status_code=202)
+async def reload_catalogue() -> Dict[str, object]:
+    """Rebuild the catalogue snapshot in the background and swap it in when warm."""
+    return {"started": catalogue.reload_in_background(), **catalogue.stats()}
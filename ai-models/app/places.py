@@ -0,0 +1,274 @@
+"""Streaming ingestion of ``places.json`` into the POI catalogue.
+
+``places.json`` is a JSON array of place records (with one nested array of
+further records) in a richer schema than ``pois.csv``: GeoJSON ``location``,
+``budget_level``, ``mood_tags``, ``time_to_visit``, ``duration`` (hours),
+``best_weather`` and free-text ``opening_hours``. :func:`iter_places` walks
+the file with ``JSONDecoder.raw_decode`` over a fixed-size read buffer, so
+only one record is materialised at a time; :func:`normalize_place` maps a
+record onto the catalogue columns and :func:`merge_places` appends the new
+ones to the CSV frame, skipping places the CSV already has.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .columnar import DAYS, format_minutes
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+ALL_DAY = (0, 24 * 60 - 1)
+SUNRISE_TO_SUNSET = (6 * 60, 18 * 60)
+
+_WHITESPACE = " \t\r\n,"
+_INTERVAL = re.compile(
+    r"(\d{1,2}):(\d{2})\s*([AP]M)\s*-\s*(\d{1,2}):(\d{2})\s*([AP]M)", re.IGNORECASE
+)
+_NOTE = re.compile(r"\(([^)]*)\)")
+_CLOSED_DAY = re.compile(
+    r"closed\s+(?:on\s+)?(mon|tue|wed|thu|fri|sat|sun)[a-z]*(\s+afternoon)?", re.IGNORECASE
+)
+_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+@dataclass
+class PlacesIngest:
+    """What one :func:`merge_places` call read, kept and skipped."""
+
+    read: int = 0
+    added: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    elapsed_ms: float = 0.0
+    # process high-water RSS once merged (None where ``resource`` is missing);
+    # tracemalloc would say what the ingest itself held, but slows it several-fold
+    peak_rss_mib: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+
+def iter_places(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array one at a time.
+
+    Nested arrays are flattened, so ``[a, [b, c], d]`` yields ``a, b, c, d``.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as fh:
+        buffer = ""
+        pos = 0
+        depth = 0
+        eof = False
+        while True:
+            if pos >= len(buffer):
+                if eof:
+                    break
+                chunk = fh.read(chunk_size)
+                buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+                continue
+            char = buffer[pos]
+            if char in _WHITESPACE:
+                pos += 1
+            elif char == "[":
+                depth += 1
+                pos += 1
+            elif char == "]":
+                depth -= 1
+                pos += 1
+                if depth == 0:
+                    return
+            elif depth == 0:
+                raise ValueError(f"{path} is not a JSON array")
+            else:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    value, end = None, len(buffer)
+                if end >= len(buffer) and not eof:
+                    # the value may continue in the next chunk: read more and retry
+                    chunk = fh.read(chunk_size)
+                    buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+                    continue
+                yield value
+                pos = end
+    if depth:
+        raise ValueError(f"{path} ends inside an array")
+
+
+def parse_hours(text: Any) -> Dict[str, List[List[str]]]:
+    """Turn ``"6:00 AM - 10:00 AM, 4:00 PM - 8:00 PM (Closed Mondays)"``-style
+    text into the catalogue's ``{"mon": [["06:00", "10:00"], ...], ...}``.
+
+    An interval past midnight is split at the day boundary, its early part
+    going to the next day (so after a closed day it is dropped). Text without
+    recognisable times ("Varies by show", "Open access") yields ``{}``
+    (unknown), the same as a missing CSV value. The same few hundred strings
+    repeat across a city, so results are memoised and shared: treat them as
+    read-only.
+    """
+    if not isinstance(text, str):
+        return {}
+    return _parse_hours(text)
+
+
+@lru_cache(maxsize=4096)
+def _parse_hours(text: str) -> Dict[str, List[List[str]]]:
+    notes = " ".join(_NOTE.findall(text))
+    main = _NOTE.sub(" ", text).strip().lower()
+    intervals: List[Tuple[int, int]] = []
+    # the after-midnight part of an overnight range, which belongs to the next day
+    spill: List[Tuple[int, int]] = []
+    if main.startswith(("24 hours", "24/7", "open 24 hours")):
+        intervals.append(ALL_DAY)
+    elif main.startswith("sunrise to sunset"):
+        intervals.append(SUNRISE_TO_SUNSET)
+    for match in _INTERVAL.finditer(main):
+        start = _clock_minutes(match.group(1), match.group(2), match.group(3))
+        end = _clock_minutes(match.group(4), match.group(5), match.group(6))
+        if end == 0:
+            end = ALL_DAY[1]  # "... - 12:00 AM" closes at midnight
+        if end > start:
+            intervals.append((start, end))
+        else:
+            intervals.append((start, ALL_DAY[1]))
+            spill.append((0, end))
+    if not intervals:
+        return {}
+    closed = {
+        day.lower()
+        for day, partial in _CLOSED_DAY.findall(notes)
+        if not partial  # "closed on Sunday afternoons" still opens that day
+    }
+    hours = {}
+    for pos, day in enumerate(DAYS):
+        today = [] if day in closed else intervals
+        # DAYS[-1] is the day before DAYS[0]
+        carried = [] if DAYS[pos - 1] in closed else spill
+        hours[day] = [
+            [format_minutes(s), format_minutes(e)] for s, e in sorted(set(today + carried))
+        ]
+    return hours
+
+
+def normalize_place(raw: Any) -> Optional[dict]:
+    """Map one ``places.json`` record onto the catalogue columns, or ``None``."""
+    if not isinstance(raw, dict) or not raw.get("id") or not raw.get("name"):
+        return None
+    coordinates = (raw.get("location") or {}).get("coordinates") or []
+    try:
+        longitude, latitude = float(coordinates[0]), float(coordinates[1])
+    except (IndexError, TypeError, ValueError):
+        return None
+    hours = raw.get("opening_hours") or {}
+    return {
+        "id": str(raw["id"]),
+        "name": str(raw["name"]),
+        "description": str(raw.get("description") or ""),
+        "category": raw.get("category"),
+        "subcategory": raw.get("subcategory"),
+        "latitude": latitude,
+        "longitude": longitude,
+        "rating": raw.get("rating"),
+        "price_level": raw.get("budget_level"),
+        "tags": _strings(raw.get("mood_tags")),
+        "image_url": raw.get("image_url"),
+        "opening_hours": parse_hours(hours.get("all_days")) if isinstance(hours, dict) else {},
+        "duration_hours": raw.get("duration"),
+        # one record in the shipped file spells the key "time_to-visit"
+        "time_to_visit": _strings(raw.get("time_to_visit", raw.get("time_to-visit"))),
+        "best_weather": _strings(raw.get("best_weather")),
+    }
+
+
+def merge_places(df: pd.DataFrame, records: Iterable[Any]) -> Tuple[pd.DataFrame, PlacesIngest]:
+    """Append normalised ``records`` that are not already in ``df``.
+
+    A place is a duplicate when its id or name matches an existing POI after
+    slugging (``gateway_of_india`` == ``gateway-of-india``); the CSV row wins,
+    as does the first of repeated ``places.json`` entries.
+    """
+    started = time.perf_counter()
+    stats = PlacesIngest()
+    seen = {_slug(value) for column in ("id", "name") if column in df.columns for value in df[column]}
+    added: List[dict] = []
+    for raw in records:
+        stats.read += 1
+        place = normalize_place(raw)
+        if place is None:
+            stats.invalid += 1
+            continue
+        keys = {_slug(place["id"]), _slug(place["name"])}
+        if keys & seen:
+            stats.duplicates += 1
+            continue
+        seen |= keys
+        added.append(place)
+    stats.added = len(added)
+    if added:
+        df = pd.concat([df, pd.DataFrame(added)], ignore_index=True)
+    stats.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    stats.peak_rss_mib = _peak_rss_mib()
+    return df, stats
+
+
+def load_places(df: pd.DataFrame, path: Path) -> pd.DataFrame:
+    """``merge_places`` over the records streamed from ``path``; logs the outcome."""
+    merged, stats = merge_places(df, iter_places(path))
+    logger.info(
+        "Merged %d places from %s (%d duplicates, %d invalid) in %.0f ms; peak RSS %s MiB",
+        stats.added,
+        path,
+        stats.duplicates,
+        stats.invalid,
+        stats.elapsed_ms,
+        stats.peak_rss_mib,
+    )
+    return merged
+
+
+def _clock_minutes(hour: str, minute: str, meridiem: str) -> int:
+    hours = int(hour) % 12 + (12 if meridiem.upper() == "PM" else 0)
+    return hours * 60 + int(minute)
+
+
+def _peak_rss_mib() -> Optional[float]:
+    try:
+        import resource  # POSIX only
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def _strings(value: Any) -> List[str]:
+    if not isinstance(value, list):
+        return []
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def _slug(value: Any) -> str:
+    return _SLUG.sub("-", str(value).lower()).strip("-")
+
+
+__all__ = [
+    "PlacesIngest",
+    "iter_places",
+    "load_places",
+    "merge_places",
+    "normalize_place",
+    "parse_hours",
+]
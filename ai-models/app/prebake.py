@@ -0,0 +1,24 @@
+"""Build-time warmup: ``python -m app.prebake`` persists fitted artifacts.
+
+Running this in the image build (with the same ``EMBED_CACHE_DIR`` as the
+service) leaves TF-IDF models, POI embeddings and vector indexes on disk, so
+the server only loads them at startup instead of refitting.
+"""
+from __future__ import annotations
+
+import json
+import logging
+
+from .main import startup, warmup_steps
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    startup.warm_up(warmup_steps())
+    print(json.dumps(startup.report(), indent=2))
+    if not startup.ready:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
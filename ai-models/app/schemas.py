@@ -1,9 +1,10 @@
 """Pydantic schema definitions for FastAPI endpoints."""
 from __future__ import annotations
 
+import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class Location(BaseModel):
@@ -44,6 +45,14 @@ class RecommendResponse(BaseModel):
     items: List[PoiScore]
 
 
+class RecommendBatchRequest(BaseModel):
+    requests: List[RecommendRequest] = Field(default_factory=list)
+
+
+class RecommendBatchResponse(BaseModel):
+    results: List[RecommendResponse]
+
+
 class EmbedRequest(BaseModel):
     texts: List[str]
 
@@ -66,6 +75,7 @@ class ItineraryItem(BaseModel):
     end_time: str
     travel_minutes: float
     distance_km: float
+    wait_minutes: float = 0
 
 
 class ItineraryRequest(BaseModel):
@@ -73,6 +83,8 @@ class ItineraryRequest(BaseModel):
     start_location: Location
     time_window: TimeWindow
     poi_ids: Optional[List[str]] = None
+    # day the plan is for, which picks the opening hours; defaults to today
+    date: Optional[datetime.date] = None
 
 
 class ItineraryResponse(BaseModel):
@@ -82,6 +94,42 @@ class ItineraryResponse(BaseModel):
     items: List[ItineraryItem]
 
 
+MAX_TRIP_DAYS = 14
+
+
+class MultiDayItineraryRequest(BaseModel):
+    mood: str
+    start_location: Location
+    start_date: datetime.date
+    end_date: datetime.date
+    daily_window: TimeWindow
+    poi_ids: Optional[List[str]] = None
+    stops_per_day: int = Field(default=6, ge=1, le=12)
+
+    @model_validator(mode="after")
+    def _check_dates(self) -> "MultiDayItineraryRequest":
+        if self.end_date < self.start_date:
+            raise ValueError("end_date is before start_date")
+        if self.days > MAX_TRIP_DAYS:
+            raise ValueError(f"trips are limited to {MAX_TRIP_DAYS} days")
+        return self
+
+    @property
+    def days(self) -> int:
+        return (self.end_date - self.start_date).days + 1
+
+
+class ItineraryDay(ItineraryResponse):
+    date: datetime.date
+
+
+class MultiDayItineraryResponse(BaseModel):
+    title: str
+    days: List[ItineraryDay]
+    # candidate stops that did not fit any day
+    unscheduled: List[str] = Field(default_factory=list)
+
+
 class TravelTimeRequest(BaseModel):
     coords: List[Location]
 
@@ -109,6 +157,19 @@ class ChatResponse(BaseModel):
     references: List[str]
 
 
+class PoiUpsertRequest(BaseModel):
+    name: str
+    description: str = ""
+    category: Optional[str] = None
+    tags: List[str] = Field(default_factory=list)
+
+
+class CatalogueEditResponse(BaseModel):
+    id: str
+    status: str
+    index: dict
+
+
 class WeatherResponse(BaseModel):
     status: str
     description: str
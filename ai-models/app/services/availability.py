@@ -0,0 +1,128 @@
+"""Weekly opening-hours bitmap for constant-time visit feasibility checks."""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .. import deps
+from ..columnar import CatalogueColumns
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+# "23:59" is how the catalogue spells closing at midnight
+MIDNIGHT_CLOSE = 24 * 60 - 1
+
+
+class Availability:
+    """Open/closed state of every POI per weekday in ``SLOT_MINUTES`` slots.
+
+    ``prefix[row, day, s]`` counts the open slots before slot ``s``, so a
+    visit covering slots ``[a, b)`` is feasible iff
+    ``prefix[b] - prefix[a] == b - a``: one subtraction per candidate, no
+    matter how many intervals the POI has. A slot is open only when an
+    interval covers all of it, and a visit must fit whole slots, so checks
+    err towards "closed". POIs with unknown hours are treated as always open.
+    """
+
+    def __init__(self, ids: Iterable[str], prefix: np.ndarray):
+        self._row_of: Dict[str, int] = {poi_id: row for row, poi_id in enumerate(ids)}
+        self.prefix = prefix
+
+    @classmethod
+    def from_columns(cls, columns: CatalogueColumns) -> "Availability":
+        hours = np.asarray(columns.hours, dtype=np.int32)
+        opens, closes = hours[..., 0], hours[..., 1]
+        closes = np.where(closes >= MIDNIGHT_CLOSE, 24 * 60, closes)
+        starts = np.arange(SLOTS_PER_DAY) * SLOT_MINUTES
+        slots = np.zeros(hours.shape[:2] + (SLOTS_PER_DAY,), dtype=bool)
+        for interval in range(hours.shape[2]):  # -1 padding covers nothing
+            open_at, close_at = opens[..., interval, None], closes[..., interval, None]
+            slots |= (open_at <= starts) & (starts + SLOT_MINUTES <= close_at)
+        slots[~np.asarray(columns.hours_known)] = True
+        prefix = np.zeros(slots.shape[:2] + (SLOTS_PER_DAY + 1,), dtype=np.uint8)
+        np.cumsum(slots, axis=2, out=prefix[..., 1:])
+        table = columns.strings()
+        ids = [
+            table[code] if code >= 0 else str(row) for row, code in enumerate(columns.id.tolist())
+        ]
+        return cls(ids, prefix)
+
+    def row(self, poi_id: str) -> Optional[int]:
+        return self._row_of.get(str(poi_id))
+
+    def is_open(self, row: int, weekday: int, start: float, end: float) -> bool:
+        """Whether the POI is open for the whole of ``[start, end)`` minutes."""
+        first, last = _slot_span(start, end)
+        if last > SLOTS_PER_DAY:
+            # runs past midnight into the next day
+            return self.is_open(row, weekday, start, 24 * 60) and self.is_open(
+                row, (weekday + 1) % 7, 0, end - 24 * 60
+            )
+        day = self.prefix[row, weekday % 7]
+        return int(day[last]) - int(day[first]) == last - first
+
+    def next_open(
+        self, row: int, weekday: int, start: float, minutes: float, latest: float
+    ) -> Optional[float]:
+        """Earliest start in ``[start, latest]`` at which a ``minutes``-long
+        visit fits inside opening hours, or ``None``."""
+        if self.is_open(row, weekday, start, start + minutes):
+            return start
+        # slot-aligned starts after ``start``; ``start`` itself was checked above
+        first = -(-int(np.ceil(start)) // SLOT_MINUTES)
+        width = max(1, -(-int(minutes) // SLOT_MINUTES))
+        last_first = min(int(latest) // SLOT_MINUTES, SLOTS_PER_DAY - width)
+        if last_first < first:
+            return None
+        day = self.prefix[row, weekday % 7]
+        firsts = np.arange(first, last_first + 1)
+        fits = np.flatnonzero(day[firsts + width].astype(np.int16) - day[firsts] == width)
+        if not fits.size:
+            return None
+        return float(max(start, firsts[fits[0]] * SLOT_MINUTES))
+
+    def visit_window(
+        self, row: int, weekday: int, start: float, end: float, minutes: float
+    ) -> Optional[Tuple[float, float]]:
+        """``(earliest, latest)`` start of a ``minutes``-long visit within
+        ``[start, end]``, or ``None`` if it fits nowhere. Gaps between split
+        shifts fall inside the window, so callers still check :meth:`is_open`."""
+        earliest = self.next_open(row, weekday, start, minutes, end)
+        if earliest is None:
+            return None
+        width = max(1, -(-int(minutes) // SLOT_MINUTES))
+        first = -(-int(np.ceil(earliest)) // SLOT_MINUTES)
+        last_first = min(int(end) // SLOT_MINUTES, SLOTS_PER_DAY - width)
+        if last_first < first:
+            return earliest, earliest
+        day = self.prefix[row, weekday % 7]
+        firsts = np.arange(first, last_first + 1)
+        fits = np.flatnonzero(day[firsts + width].astype(np.int16) - day[firsts] == width)
+        latest = float(firsts[fits[-1]] * SLOT_MINUTES) if fits.size else earliest
+        return earliest, max(earliest, latest)
+
+    def open_during(self, rows: np.ndarray, weekday: int, start: float, end: float) -> np.ndarray:
+        """Mask of ``rows`` open for at least one slot of ``[start, end)``."""
+        first, last = _slot_span(start, min(end, 24 * 60))
+        day = self.prefix[rows, weekday % 7]
+        return day[:, last] > day[:, first]
+
+
+def _slot_span(start: float, end: float) -> tuple[int, int]:
+    first = max(0, int(start) // SLOT_MINUTES)
+    last = max(first, -(-int(np.ceil(end)) // SLOT_MINUTES))
+    return first, last
+
+
+@lru_cache(maxsize=2)
+def _availability_for_version(version: str) -> Availability:
+    return Availability.from_columns(deps.current_catalogue().columns)
+
+
+def get_availability() -> Availability:
+    return _availability_for_version(deps.get_catalogue_version())
+
+
+__all__ = ["Availability", "SLOT_MINUTES", "get_availability"]
@@ -0,0 +1,102 @@
+"""Dynamic micro-batching for encoder calls from concurrent threads."""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EncodeFn = Callable[[List[str]], np.ndarray]
+
+
+class MicroBatcher:
+    """Coalesces concurrent ``encode`` calls into one model invocation.
+
+    Callers block in :meth:`submit` while a worker thread waits up to
+    ``max_wait_ms`` for more work (or until ``max_batch`` texts are queued),
+    runs a single encode over everything collected and hands each caller its
+    own rows back. Requests already at ``max_batch`` bypass the queue.
+    """
+
+    def __init__(self, encode: EncodeFn, max_wait_ms: float, max_batch: int):
+        self._encode = encode
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_batch = max(1, max_batch)
+        self._pending: List[Tuple[List[str], Future]] = []
+        self._pending_texts = 0
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._batches = 0
+        self._requests = 0
+        self._texts = 0
+
+    def submit(self, texts: List[str]) -> np.ndarray:
+        if len(texts) >= self.max_batch:
+            return self._encode(texts)
+        future: Future = Future()
+        with self._cond:
+            self._ensure_worker()
+            self._pending.append((texts, future))
+            self._pending_texts += len(texts)
+            self._cond.notify()
+        return future.result()
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {
+                "batches": self._batches,
+                "requests": self._requests,
+                "texts": self._texts,
+                "mean_batch_texts": round(self._texts / self._batches, 2) if self._batches else 0.0,
+                "pending_texts": self._pending_texts,
+            }
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            texts = [text for chunk, _ in batch for text in chunk]
+            try:
+                vectors = self._encode(texts)
+            except Exception as exc:  # noqa: BLE001
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            start = 0
+            for chunk, future in batch:
+                future.set_result(vectors[start : start + len(chunk)])
+                start += len(chunk)
+
+    def _collect(self) -> List[Tuple[List[str], Future]]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while self._pending_texts < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch: List[Tuple[List[str], Future]] = []
+            size = 0
+            while self._pending and (not batch or size + len(self._pending[0][0]) <= self.max_batch):
+                texts, future = self._pending.pop(0)
+                batch.append((texts, future))
+                size += len(texts)
+            self._pending_texts -= size
+            self._batches += 1
+            self._requests += len(batch)
+            self._texts += size
+            return batch
+
+
+__all__ = ["MicroBatcher"]
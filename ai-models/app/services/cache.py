@@ -0,0 +1,124 @@
+"""In-process LRU cache with per-entry TTL and usage counters."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Tuple
+
+# the current data version plus the one draining requests still use
+KEPT_NAMESPACES = 2
+
+
+class NamespaceWindow:
+    """The last ``keep`` namespaces (data versions) a cache has used.
+
+    Caches keep entries of these side by side, so requests overlapping a
+    reload do not wipe each other's entries, and drop the entries of any
+    namespace :meth:`use` retires. Not locked: callers hold their own lock.
+    """
+
+    def __init__(self, keep: int = KEPT_NAMESPACES):
+        self.keep = keep
+        self._used: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def __contains__(self, namespace: Hashable) -> bool:
+        return namespace in self._used
+
+    def use(self, namespace: Hashable) -> List[Hashable]:
+        """Mark ``namespace`` most recently used; returns the ones it retires."""
+        if namespace in self._used:
+            self._used.move_to_end(namespace)
+            return []
+        self._used[namespace] = None
+        retired = []
+        while len(self._used) > self.keep:
+            retired.append(self._used.popitem(last=False)[0])
+        return retired
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl_seconds``.
+
+    A ``max_entries`` of zero disables caching; ``ttl_seconds`` of zero keeps
+    entries until they are evicted.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float = 0.0):
+        self.max_entries = max(0, max_entries)
+        self.ttl = max(0.0, ttl_seconds)
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._namespaces = NamespaceWindow()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value or ``None``, refreshing its LRU position."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, value = entry
+            if expires and expires < now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.max_entries:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def ensure_namespace(self, namespace: Hashable) -> None:
+        """Mark ``namespace`` (the data version values derive from) in use.
+
+        Callers put the namespace first in their tuple keys. Entries of the
+        last ``KEPT_NAMESPACES`` namespaces used are kept side by side, so
+        requests overlapping a reload do not wipe each other's entries;
+        entries of older namespaces are dropped.
+        """
+        with self._lock:
+            for retired in self._namespaces.use(namespace):
+                stale = [
+                    key for key in self._data if isinstance(key, tuple) and key[:1] == (retired,)
+                ]
+                for key in stale:
+                    del self._data[key]
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+__all__ = ["KEPT_NAMESPACES", "NamespaceWindow", "TTLCache"]
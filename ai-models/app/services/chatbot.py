@@ -1,85 +1,306 @@
 """Lightweight retrieval-augmented responses with Gemini refinement."""
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import List
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Set, Tuple
 
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
-from .. import deps
 from ..config import Settings
-from .gemini_client import GeminiClient, RateLimitError
+from .embedding_store import PoiEmbeddingStore
+from .gemini_client import GeminiClient, GeminiStreamError, RateLimitError
+from .guardrails import GuardrailEngine, get_guardrails
+from .lexical_store import LexicalIndexStore
+from .rate_limit import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from .response_cache import SemanticResponseCache
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ..concurrency import InferenceExecutor
 
 logger = logging.getLogger(__name__)
 
-PROFANITY_LIST = {
-    "damn",
-    "shit",
-    "bastard",
-    "bloody",
-    "crap",
-    "fuck",
-}
+RATE_LIMITED_REPLY = (
+    "I’m handling a few AI requests right now. Give me a moment before triggering another detailed answer."
+)
+
 
-CONTEXT_ATTACK_PATTERNS = [
-    "ignore previous",
-    "forget the rules",
-    "disregard instructions",
-    "break character",
-    "reveal the system prompt",
-]
+@dataclass
+class ChatContext:
+    """Outcome of the retrieval stage; ``reply`` is set when guardrails answer directly."""
+
+    # PII-redacted: this copy is what prompts, cache entries and logs see
+    query: str
+    snippets: List[str] = field(default_factory=list)
+    references: List[str] = field(default_factory=list)
+    reply: Optional[str] = None
+    # unit query embedding, its response cache namespace and a cached answer,
+    # when the response cache is on
+    vector: Optional[np.ndarray] = None
+    namespace: Optional[str] = None
+    cached: Optional[str] = None
 
 
 class ChatbotService:
-    def __init__(self, settings: Settings, gemini_client: GeminiClient):
+    def __init__(
+        self,
+        settings: Settings,
+        gemini_client: GeminiClient,
+        poi_store: PoiEmbeddingStore | None = None,
+        lexical_store: LexicalIndexStore | None = None,
+        guardrails: GuardrailEngine | None = None,
+    ):
         self.settings = settings
         self.gemini_client = gemini_client
-        self.vectorizer = TfidfVectorizer(stop_words=deps.get_stopwords(), max_features=2048)
-        self.corpus = deps.get_corpus()
-        if not self.corpus:
-            self.corpus = ["Mumbai trails travel corpus"]
-        self.matrix = self.vectorizer.fit_transform(self.corpus)
-        self.context_df = deps.get_poi_frame().reset_index(drop=True)
+        self.poi_store = poi_store
+        self.lexical_store = lexical_store or LexicalIndexStore(settings)
+        # compiled from configs/safety_policies.yaml once, at startup
+        self.guardrails = guardrails or get_guardrails()
+        self._responses = SemanticResponseCache(
+            settings.chat_cache_size,
+            settings.chat_cache_ttl_seconds,
+            settings.chat_cache_similarity,
+        )
+        # late Gemini completions left running to fill the response cache
+        self._background: Set[asyncio.Task] = set()
+        self._pipeline = {
+            "retrieval_timeouts": 0,
+            "gemini_on_time": 0,
+            "gemini_late": 0,
+            "background_completed": 0,
+            "background_dropped": 0,
+            "gemini_rate_limited": 0,
+        }
 
-    def answer(self, query: str) -> tuple[str, List[str]]:
+    def warm(self) -> None:
+        """Load the lexical index; runs on first use if not called at startup."""
+        self.lexical_store.load()
+
+    def retrieve(self, query: str) -> ChatContext:
+        """Guardrail checks and lexical retrieval; no network calls."""
+        return self.screen(query) or self._search(query)
+
+    def screen(self, query: str) -> ChatContext | None:
+        """The direct reply to an empty or blocked query, else ``None``.
+
+        Takes microseconds, so callers run it before any latency budget: a
+        slow index must never turn a self-harm query into a generic answer.
+        """
         trimmed = (query or "").strip()
         if not trimmed:
-            return (
-                "Share a mood, location, or activity and I’ll suggest Mumbai experiences.",
-                [],
-            )
-        if self._contains_profanity(trimmed):
-            return (
-                "I can only help with respectful Mumbai travel requests. Please rephrase without profanity.",
-                [],
-            )
-        if self._is_context_attack(trimmed):
-            return (
-                "For safety I have to stick with my travel guidelines. Let me know what kind of Mumbai experience you need instead.",
-                [],
+            return ChatContext(
+                query=trimmed,
+                reply="Share a mood, location, or activity and I’ll suggest Mumbai experiences.",
             )
-        query_vec = self.vectorizer.transform([trimmed])
-        sims = cosine_similarity(query_vec, self.matrix).flatten()
-        top_idx = sims.argsort()[::-1][:3]
-        references = []
-        snippets = []
-        for idx in top_idx:
-            if idx >= len(self.context_df):
+        verdict = self.guardrails.check(trimmed)
+        if verdict is not None:
+            return ChatContext(query=trimmed, reply=verdict.reply)
+        return None
+
+    def _search(self, query: str) -> ChatContext:
+        """Lexical retrieval for a query :meth:`screen` let through."""
+        trimmed = query.strip()
+        # PII never reaches the prompt, the response cache or the logs, but
+        # retrieval searches what the user typed ("cafes near Linking Road")
+        redacted = self.guardrails.redact(trimmed)
+        index = self.lexical_store.load()
+        vector = self._cache_vector(redacted)
+        rows = self._candidate_rows(trimmed, vector if redacted == trimmed else None)
+        hits = index.search(trimmed, 3, rows)
+        context = ChatContext(query=redacted, vector=vector)
+        if vector is not None:
+            # answers are only comparable within one embedding space and catalogue
+            context.namespace = self.poi_store.cache_key()
+        for doc_id, _ in hits:
+            snippet = self.lexical_store.snippet(doc_id)
+            if snippet is None:
                 continue
-            row = self.context_df.iloc[idx]
-            references.append(row.get("name", "Unknown"))
-            tags = row.get("tags", [])
-            tags_str = ", ".join(tags) if tags else "no tags"
-            snippets.append(
-                f"{row.get('name')}: {row.get('description', '')} (tags: {tags_str})"
-            )
-        base_answer = self._compose_answer(trimmed, snippets)
-        refined = self._refine_with_gemini(trimmed, snippets, references)
+            context.references.append(snippet[0])
+            context.snippets.append(snippet[1])
+        if vector is not None:
+            context.cached = self._responses.get(vector, context.snippets, context.namespace)
+        return context
+
+    def answer(self, query: str) -> tuple[str, List[str]]:
+        context = self.retrieve(query)
+        if context.reply is not None:
+            return context.reply, context.references
+        if context.cached is not None:
+            return context.cached, context.references
+        base_answer = self._compose_answer(context.query, context.snippets)
+        refined = self._refine_with_gemini(context)
         if refined:
             base_answer = refined
-        return base_answer, references
+        return base_answer, context.references
+
+    async def respond(self, query: str, inference: "InferenceExecutor") -> tuple[str, List[str]]:
+        """``/chat`` as stages with their own latency budgets.
+
+        Guardrails answer first, outside any budget. Retrieval runs on the
+        inference pool within ``CHAT_RETRIEVAL_BUDGET_MS``. Gemini then gets
+        ``CHAT_GEMINI_BUDGET_MS``; when it runs over, the heuristic answer
+        goes back at once and the completion carries on in the background
+        (up to ``CHAT_BACKGROUND_LIMIT`` at a time) so the response cache
+        has it for the next similar question.
+        """
+        screened = self.screen(query)
+        if screened is not None:
+            return screened.reply, screened.references
+        retrieval = self.settings.chat_retrieval_budget_ms / 1000
+        try:
+            context = await asyncio.wait_for(inference.run(self._search, query), retrieval)
+        except asyncio.TimeoutError:
+            self._pipeline["retrieval_timeouts"] += 1
+            return self._compose_answer(query, []), []
+        if context.cached is not None:
+            return context.cached, context.references
+        budget = self.settings.chat_gemini_budget_ms / 1000
+        # a call that would queue past the budget is turned away up front
+        completion = asyncio.create_task(
+            self._complete(context, deadline=time.monotonic() + budget)
+        )
+        try:
+            done, _ = await asyncio.wait({completion}, timeout=budget)
+        except asyncio.CancelledError:
+            # the client went away; the answer can still warm the cache
+            self._finish_in_background(completion)
+            raise
+        if completion in done:
+            try:
+                refined = completion.result()
+            except RateLimitError:
+                self._pipeline["gemini_rate_limited"] += 1
+                # answer later from spare quota so a repeat hits the cache
+                self._finish_in_background(
+                    asyncio.create_task(self._complete(context, PRIORITY_BACKGROUND))
+                )
+                return RATE_LIMITED_REPLY, context.references
+            self._pipeline["gemini_on_time"] += 1
+        else:
+            self._pipeline["gemini_late"] += 1
+            self._finish_in_background(completion)
+            refined = None
+        return refined or self._compose_answer(context.query, context.snippets), context.references
+
+    async def close(self) -> None:
+        """Cancel background completions, e.g. at shutdown."""
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+
+    async def stream_answer(
+        self, context: ChatContext
+    ) -> AsyncIterator[Tuple[str, Dict[str, object]]]:
+        """``(event, data)`` pairs for a streamed reply to a retrieved ``context``.
+
+        ``references`` comes first, then the heuristic ``draft`` and Gemini
+        ``token`` chunks as they arrive. The final ``done`` carries the
+        answer to keep (it replaces the draft) and where it came from.
+        """
+        yield "references", {"references": context.references}
+        if context.reply is not None:
+            yield "done", {"answer": context.reply, "source": "guardrail"}
+            return
+        if context.cached is not None:
+            yield "done", {"answer": context.cached, "source": "cache"}
+            return
+        draft = self._compose_answer(context.query, context.snippets)
+        yield "draft", {"text": draft}
+        prompt = self._build_prompt(context.query, context.snippets, context.references)
+        parts: List[str] = []
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.settings.chat_gemini_budget_ms / 1000
+        try:
+            async for text in self.gemini_client.stream_async(prompt, deadline=deadline):
+                parts.append(text)
+                yield "token", {"text": text}
+        except RateLimitError:
+            yield "done", {"answer": RATE_LIMITED_REPLY, "source": "rate_limited"}
+            return
+        except GeminiStreamError:
+            parts = []
+        answer = "".join(parts).strip()
+        if not answer:
+            yield "done", {"answer": draft, "source": "draft"}
+            return
+        self._remember(context, answer, time.perf_counter() - started)
+        yield "done", {"answer": answer, "source": "gemini"}
+
+    def cache_stats(self) -> Dict[str, float]:
+        return self._responses.stats()
+
+    def pipeline_stats(self) -> Dict[str, int]:
+        return {**self._pipeline, "background_running": len(self._background)}
+
+    async def _complete(
+        self,
+        context: ChatContext,
+        priority: int = PRIORITY_INTERACTIVE,
+        deadline: Optional[float] = None,
+    ) -> str | None:
+        """Gemini's answer for ``context``; cached when it arrives, however late.
+
+        Raises :class:`RateLimitError` when the limiter cannot admit the call
+        by ``deadline``.
+        """
+        prompt = self._build_prompt(context.query, context.snippets, context.references)
+        if not prompt:
+            return None
+        started = time.perf_counter()
+        refined = await self.gemini_client.generate_async(prompt, priority, deadline)
+        self._remember(context, refined, time.perf_counter() - started)
+        return refined
+
+    def _finish_in_background(self, task: asyncio.Task) -> None:
+        if len(self._background) >= self.settings.chat_background_limit:
+            self._pipeline["background_dropped"] += 1
+            task.cancel()
+            return
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if task.cancelled():
+            return
+        if isinstance(task.exception(), RateLimitError):
+            self._pipeline["background_dropped"] += 1
+        elif task.exception() is not None:
+            logger.warning("Background Gemini completion failed: %s", task.exception())
+        else:
+            self._pipeline["background_completed"] += 1
+
+    def _cache_vector(self, query: str) -> np.ndarray | None:
+        """Query embedding for the response cache, ``None`` when it is off."""
+        if self.poi_store is None or not self._responses.enabled:
+            return None
+        return self.poi_store.encode_query(query)
+
+    def _remember(self, context: ChatContext, answer: str | None, seconds: float) -> None:
+        if answer and context.vector is not None:
+            self._responses.put(
+                context.vector, context.snippets, answer, seconds, context.namespace
+            )
+
+    def _candidate_rows(self, query: str, vector: np.ndarray | None = None) -> np.ndarray | None:
+        """Rows worth lexical scoring; semantic pre-filter on large catalogues.
+
+        ``None`` means every live row. The semantic index only knows the
+        catalogue as loaded, so rows added or edited since are always kept.
+        """
+        limit = self.settings.retrieval_candidates
+        frame_ids = self.lexical_store.frame_ids
+        if self.poi_store is None or limit <= 0 or len(frame_ids) <= limit:
+            return None
+        index = self.lexical_store.load()
+        if vector is None:
+            vector = self.poi_store.encode_query(query)
+        positions, _ = self.poi_store.index().search(vector, limit)
+        rows = [index.row_for(frame_ids[pos]) for pos in positions if pos < len(frame_ids)]
+        known = np.array([row for row in rows if row is not None], dtype=np.int64)
+        return np.union1d(known, index.delta_rows())
 
     def _compose_answer(self, query: str, snippets: List[str]) -> str:
         if not snippets:
@@ -92,18 +313,16 @@ class ChatbotService:
             + ". They balance comfort with manageable travel times."
         )
 
-    def _refine_with_gemini(
-        self, query: str, snippets: List[str], references: List[str]
-    ) -> str | None:
-        prompt = self._build_prompt(query, snippets, references)
+    def _refine_with_gemini(self, context: ChatContext) -> str | None:
+        prompt = self._build_prompt(context.query, context.snippets, context.references)
         if not prompt:
             return None
         try:
+            started = time.perf_counter()
             completion = self.gemini_client.generate(prompt)
+            self._remember(context, completion, time.perf_counter() - started)
         except RateLimitError:
-            return (
-                "I’m handling a few AI requests right now. Give me a moment before triggering another detailed answer."
-            )
+            return RATE_LIMITED_REPLY
         if completion:
             return completion
         return None
@@ -137,13 +356,5 @@ class ChatbotService:
             "Respond in English with a friendly, factual tone. If the request violates policy or is off-topic, refuse and suggest acceptable topics."
         )
 
-    def _contains_profanity(self, text: str) -> bool:
-        lowered = text.lower()
-        return any(word in lowered for word in PROFANITY_LIST)
-
-    def _is_context_attack(self, text: str) -> bool:
-        lowered = text.lower()
-        return any(pattern in lowered for pattern in CONTEXT_ATTACK_PATTERNS)
-
 
-__all__ = ["ChatbotService"]
+__all__ = ["ChatContext", "ChatbotService"]
@@ -0,0 +1,131 @@
+"""Content-addressed text embedding cache: memory LRU over a SQLite store."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_SQLITE_BATCH = 500
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Vectors keyed by ``(namespace, sha1(text))``.
+
+    The namespace identifies the encoder, so switching models never serves
+    stale vectors. Lookups hit the in-memory LRU first, then the on-disk
+    SQLite table (when ``path`` is given), which survives restarts and is
+    safe to share between worker processes.
+    """
+
+    def __init__(self, memory_entries: int, path: Optional[Path] = None):
+        self._memory = TTLCache(memory_entries)
+        self._disk_hits = 0
+        self._disk_misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._conn = self._open(path)
+
+    def _open(self, path: Path) -> Optional[sqlite3.Connection]:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(path), check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors ("
+                " namespace TEXT NOT NULL,"
+                " digest BLOB NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " PRIMARY KEY (namespace, digest)"
+                ") WITHOUT ROWID"
+            )
+            conn.commit()
+            return conn
+        except sqlite3.Error as exc:
+            logger.warning("Embedding disk cache disabled (%s): %s", path, exc)
+            return None
+
+    def get_many(self, namespace: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        digests = [text_digest(text) for text in texts]
+        found: List[Optional[np.ndarray]] = [
+            self._memory.get((namespace, digest)) for digest in digests
+        ]
+        missing = [pos for pos, vector in enumerate(found) if vector is None]
+        if not missing or self._conn is None:
+            return found
+        rows = self._read_disk(namespace, list({digests[pos] for pos in missing}))
+        for pos in missing:
+            vector = rows.get(digests[pos])
+            if vector is not None:
+                found[pos] = vector
+                self._memory.set((namespace, digests[pos]), vector)
+        hits = sum(1 for pos in missing if found[pos] is not None)
+        with self._lock:
+            self._disk_hits += hits
+            self._disk_misses += len(missing) - hits
+        return found
+
+    def put_many(self, namespace: str, texts: Sequence[str], vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rows = []
+        for text, vector in zip(texts, vectors):
+            digest = text_digest(text)
+            self._memory.set((namespace, digest), vector)
+            rows.append((namespace, digest, vector.tobytes()))
+        if self._conn is None or not rows:
+            return
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO vectors (namespace, digest, vector) VALUES (?, ?, ?)",
+                    rows,
+                )
+                self._conn.commit()
+        except sqlite3.Error as exc:
+            logger.warning("Could not persist embeddings: %s", exc)
+
+    def _read_disk(self, namespace: str, digests: List[bytes]) -> Dict[bytes, np.ndarray]:
+        out: Dict[bytes, np.ndarray] = {}
+        try:
+            with self._lock:
+                for start in range(0, len(digests), _SQLITE_BATCH):
+                    chunk = digests[start : start + _SQLITE_BATCH]
+                    marks = ",".join("?" * len(chunk))
+                    cursor = self._conn.execute(
+                        f"SELECT digest, vector FROM vectors WHERE namespace = ? AND digest IN ({marks})",
+                        [namespace, *chunk],
+                    )
+                    for digest, blob in cursor:
+                        out[bytes(digest)] = np.frombuffer(blob, dtype=np.float32)
+        except sqlite3.Error as exc:
+            logger.warning("Embedding disk cache read failed: %s", exc)
+        return out
+
+    def stats(self) -> Dict[str, float]:
+        memory = self._memory.stats()
+        with self._lock:
+            return {
+                "memory_entries": memory["entries"],
+                "memory_hits": memory["hits"],
+                "memory_evictions": memory["evictions"],
+                "disk_enabled": self._conn is not None,
+                "disk_hits": self._disk_hits,
+                "disk_misses": self._disk_misses,
+            }
+
+
+__all__ = ["EmbeddingCache", "text_digest"]
@@ -0,0 +1,131 @@
+"""Persisted POI embedding matrix keyed by catalogue version."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .. import deps
+from ..config import Settings
+from .embeddings import EmbeddingService
+from .vector_index import build_vector_index
+
+logger = logging.getLogger(__name__)
+
+# current catalogue snapshot plus the one in-flight requests may still use
+KEPT_VERSIONS = 2
+
+
+def poi_texts(df: pd.DataFrame) -> List[str]:
+    """Text fed to the encoder for each POI row."""
+    return (df["description"].fillna("") + " " + df["name"].fillna("")).tolist()
+
+
+def unit_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalise rows, leaving all-zero rows at zero."""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+class PoiEmbeddingStore:
+    """Encodes the POI catalogue once and serves it as a memory-mapped matrix.
+
+    Rows follow the positional order of ``deps.get_poi_frame()`` and are
+    unit-normalised, so cosine similarity against a query is a dot product.
+    Matrices of the last ``KEPT_VERSIONS`` catalogue snapshots stay loaded
+    so a reload does not pull them out from under in-flight requests.
+    """
+
+    def __init__(self, settings: Settings, embedding_service: EmbeddingService):
+        self.settings = settings
+        self.embedding_service = embedding_service
+        self._matrices: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._indexes: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cache_key(self) -> str:
+        raw = f"{deps.get_catalogue_version()}:{self.embedding_service.cache_namespace}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    def path_for(self, key: str) -> Path:
+        return self.settings.embed_cache_dir / f"poi-embeddings-{key}.npy"
+
+    def load(self) -> np.ndarray:
+        key = self.cache_key()
+        with self._lock:
+            if key in self._matrices:
+                self._matrices.move_to_end(key)
+                return self._matrices[key]
+            df = deps.get_poi_frame()
+            path = self.path_for(key)
+            matrix = self._read(path, expected_rows=len(df))
+            if matrix is None:
+                matrix = self._build(df, path)
+            _remember(self._matrices, key, matrix)
+            return matrix
+
+    def matrix(self) -> np.ndarray:
+        return self.load()
+
+    def index(self):
+        """Vector index over the current matrix, built or loaded on demand."""
+        matrix = self.load()
+        key = self.cache_key()
+        with self._lock:
+            if key not in self._indexes:
+                _remember(self._indexes, key, build_vector_index(self.settings, matrix, key))
+            return self._indexes[key]
+
+    def encode_query(self, text: str) -> np.ndarray:
+        vector = self.embedding_service.embed_texts([text])[0]
+        return unit_rows(np.asarray(vector, dtype=np.float32))
+
+    def _read(self, path: Path, expected_rows: int) -> Optional[np.ndarray]:
+        if not path.exists():
+            return None
+        try:
+            matrix = np.load(path, mmap_mode="r")
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Discarding unreadable POI embeddings %s: %s", path, exc)
+            return None
+        if matrix.ndim != 2 or matrix.shape[0] != expected_rows:
+            logger.warning("Discarding stale POI embeddings %s", path)
+            return None
+        logger.info("Loaded POI embeddings %s %s", path.name, matrix.shape)
+        return matrix
+
+    def _build(self, df: pd.DataFrame, path: Path) -> np.ndarray:
+        vectors = np.asarray(
+            self.embedding_service.embed_texts(poi_texts(df)), dtype=np.float32
+        )
+        if vectors.ndim != 2:
+            return np.zeros((len(df), 0), dtype=np.float32)
+        vectors = unit_rows(vectors)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as fh:
+                np.save(fh, vectors)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning("Could not persist POI embeddings to %s: %s", path, exc)
+            tmp_path.unlink(missing_ok=True)
+            return vectors
+        logger.info("Built POI embeddings %s %s", path.name, vectors.shape)
+        return np.load(path, mmap_mode="r")
+
+
+def _remember(cache: OrderedDict, key: str, value) -> None:
+    cache[key] = value
+    while len(cache) > KEPT_VERSIONS:
+        cache.popitem(last=False)
+
+
+__all__ = ["PoiEmbeddingStore", "poi_texts", "unit_rows"]
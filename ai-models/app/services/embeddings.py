@@ -2,68 +2,159 @@
 from __future__ import annotations
 
 import logging
-from typing import List, Optional
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
 
 from .. import deps
 from ..config import Settings
+from .batching import MicroBatcher
+from .embedding_cache import EmbeddingCache
+from .encoders import EMBED_BACKENDS, TextEncoder, load_encoder
+from .lexical_store import LexicalIndexStore
 
-try:
-    from sentence_transformers import SentenceTransformer
-except Exception:  # pragma: no cover - fallback path
-    SentenceTransformer = None  # type: ignore
+if TYPE_CHECKING:  # pragma: no cover
+    from .lexical_index import LexicalView
 
 
 logger = logging.getLogger(__name__)
 
 
 class EmbeddingService:
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, lexical_store: Optional[LexicalIndexStore] = None):
         self.settings = settings
-        self._model: Optional[SentenceTransformer] = None
-        self._vectorizer: Optional[TfidfVectorizer] = None
-        self._tfidf_matrix = None
-
-    def _load_transformer(self) -> Optional[SentenceTransformer]:
-        if SentenceTransformer is None:
-            return None
-        if self._model is not None:
-            return self._model
-        try:
-            self._model = SentenceTransformer(
-                self.settings.embed_model,
-                cache_folder=str(self.settings.embed_cache_dir),
+        self.lexical_store = lexical_store or LexicalIndexStore(settings)
+        self._model: Optional[TextEncoder] = None
+        self._transformer_checked = False
+        self._backend = "tfidf"
+        self._lexical_views: "OrderedDict[str, LexicalView]" = OrderedDict()
+        self._load_lock = threading.Lock()
+        self._batcher: Optional[MicroBatcher] = None
+        if settings.embed_batch_max_wait_ms > 0:
+            self._batcher = MicroBatcher(
+                self._encode,
+                max_wait_ms=settings.embed_batch_max_wait_ms,
+                max_batch=settings.embed_batch_max_size,
+            )
+        self._cache: Optional[EmbeddingCache] = None
+        if settings.embed_cache_memory_entries > 0:
+            disk_path = settings.embed_cache_dir / "text-embeddings.sqlite3"
+            self._cache = EmbeddingCache(
+                settings.embed_cache_memory_entries,
+                disk_path if settings.embed_cache_disk else None,
             )
-            logger.info("Loaded sentence-transformer %s", self.settings.embed_model)
-        except Exception as exc:  # noqa: BLE001
-            logger.warning("Falling back to TF-IDF embeddings: %s", exc)
-            self._model = None
-        return self._model
-
-    def _ensure_vectorizer(self) -> TfidfVectorizer:
-        if self._vectorizer is not None:
-            return self._vectorizer
-        stopwords = deps.get_stopwords()
-        self._vectorizer = TfidfVectorizer(stop_words=stopwords, max_features=1024)
-        corpus = deps.get_corpus()
-        if corpus:
-            self._tfidf_matrix = self._vectorizer.fit_transform(corpus)
-        else:
-            self._tfidf_matrix = self._vectorizer.fit_transform(["mumbai trails dataset"])
-        return self._vectorizer
+
+    def _load_transformer(self) -> Optional[TextEncoder]:
+        if self._transformer_checked:
+            return self._model
+        with self._load_lock:
+            if self._transformer_checked:
+                return self._model
+            self._model, self._backend = self._load_first_available()
+            self._transformer_checked = True
+            return self._model
+
+    def _load_first_available(self) -> Tuple[Optional[TextEncoder], str]:
+        """The configured encoder, else full-precision torch, else TF-IDF.
+
+        A missing ONNX export or a failed quantisation should cost speed,
+        not the semantic ranking, so torch is tried before TF-IDF.
+        """
+        requested = self.settings.embed_backend.lower()
+        if requested not in EMBED_BACKENDS:
+            logger.warning("Unknown EMBED_BACKEND %r; using torch", self.settings.embed_backend)
+            requested = "torch"
+        for backend in dict.fromkeys((requested, "torch")):
+            settings = self.settings.model_copy(update={"embed_backend": backend})
+            try:
+                # deferred: importing torch / onnxruntime dominates cold start
+                model = load_encoder(settings)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning(
+                    "Could not load %s encoder for %s: %s", backend, settings.embed_model, exc
+                )
+                continue
+            logger.info("Loaded %s encoder for %s", backend, settings.embed_model)
+            return model, backend
+        logger.warning("Falling back to TF-IDF embeddings")
+        return None, "tfidf"
+
+    @property
+    def backend_name(self) -> str:
+        """Identifier of the active encoder, used to key persisted vectors."""
+        if self._load_transformer() is None:
+            return "tfidf"
+        if self._backend == "torch":
+            return self.settings.embed_model
+        return f"{self.settings.embed_model}:{self._backend}"
+
+    @property
+    def cache_namespace(self) -> str:
+        """Key prefix for cached vectors; TF-IDF vectors depend on the pinned index view."""
+        backend = self.backend_name
+        if backend == "tfidf":
+            return f"tfidf:{self._ensure_lexical_view().key}"
+        return backend
+
+    def _ensure_lexical_view(self) -> "LexicalView":
+        """Pin the shared index's vocabulary and idf as this fallback's vector space.
+
+        One view per catalogue snapshot: admin edits keep updating the live
+        index for chat, but vectors here must keep a fixed width so POI
+        embeddings and queries of the same snapshot stay comparable.
+        """
+        version = deps.get_catalogue_version()
+        view = self._lexical_views.get(version)
+        if view is not None:
+            return view
+        with self._load_lock:
+            if version not in self._lexical_views:
+                self._lexical_views[version] = self.lexical_store.load().view()
+                while len(self._lexical_views) > 2:
+                    self._lexical_views.popitem(last=False)
+            return self._lexical_views[version]
+
+    def warm(self) -> None:
+        """Load whichever encoder is active so the first request pays nothing."""
+        if self._load_transformer() is None:
+            self._ensure_lexical_view()
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        model = self._load_transformer()
+        if model is not None:
+            return model.encode(texts, convert_to_numpy=True)
+        return self._ensure_lexical_view().transform(texts)
 
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
         if not texts:
             return []
-        model = self._load_transformer()
-        if model is not None:
-            embeddings = model.encode(texts, convert_to_numpy=True)
-            return embeddings.astype(float).tolist()
-        vectorizer = self._ensure_vectorizer()
-        embeddings = vectorizer.transform(texts).toarray()
-        return embeddings.astype(float).tolist()
+        if self._cache is None:
+            return self._encode_uncached(texts).astype(float).tolist()
+        namespace = self.cache_namespace
+        vectors = self._cache.get_many(namespace, texts)
+        misses = list(dict.fromkeys(text for text, vec in zip(texts, vectors) if vec is None))
+        if misses:
+            fresh = self._encode_uncached(misses)
+            self._cache.put_many(namespace, misses, fresh)
+            by_text = dict(zip(misses, fresh))
+            vectors = [by_text[text] if vec is None else vec for text, vec in zip(texts, vectors)]
+        return np.vstack(vectors).astype(float).tolist()
+
+    def _encode_uncached(self, texts: List[str]) -> np.ndarray:
+        if self._load_transformer() is None:
+            # cheap, and must run on the caller's catalogue snapshot, not the batcher thread
+            return self._ensure_lexical_view().transform(texts)
+        if self._batcher is not None:
+            return self._batcher.submit(texts)
+        return self._encode(texts)
+
+    def batch_stats(self) -> Dict[str, float]:
+        return self._batcher.stats() if self._batcher is not None else {}
+
+    def cache_stats(self) -> Dict[str, float]:
+        return self._cache.stats() if self._cache is not None else {}
 
     def similarity(self, a: np.ndarray, b: np.ndarray) -> float:
         if not a.any() or not b.any():
@@ -0,0 +1,91 @@
+"""CPU inference backends for the sentence-transformer encoder.
+
+``torch`` is the stock full-precision ``SentenceTransformer``. ``int8``
+applies PyTorch dynamic quantisation to its linear layers. ``onnx`` runs an
+exported graph (see ``python -m app.export_onnx``) under onnxruntime with the
+same mean pooling and L2 normalisation as all-MiniLM-L6-v2, so every backend
+returns ``(n, dim)`` float32 unit vectors.
+"""
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import List, Protocol
+
+import numpy as np
+
+from ..config import Settings
+
+logger = logging.getLogger(__name__)
+
+EMBED_BACKENDS = ("torch", "int8", "onnx")
+ONNX_MAX_LENGTH = 256
+
+
+class TextEncoder(Protocol):
+    def encode(self, texts: List[str], convert_to_numpy: bool = True) -> np.ndarray:
+        ...
+
+
+class OnnxEncoder:
+    """Tokenizer + onnxruntime session mirroring ``SentenceTransformer.encode``."""
+
+    def __init__(self, model_path: Path, tokenizer_name: str, cache_dir: Path, threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, cache_dir=str(cache_dir))
+        self._input_names = {node.name for node in self.session.get_inputs()}
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True) -> np.ndarray:
+        tokens = self.tokenizer(
+            list(texts),
+            padding=True,
+            truncation=True,
+            max_length=ONNX_MAX_LENGTH,
+            return_tensors="np",
+        )
+        feed = {
+            name: tokens[name].astype(np.int64) for name in tokens if name in self._input_names
+        }
+        hidden = self.session.run(None, feed)[0]
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def onnx_model_path(settings: Settings) -> Path:
+    if settings.embed_onnx_path is not None:
+        return settings.embed_onnx_path
+    slug = settings.embed_model.replace("/", "__")
+    return settings.embed_cache_dir / "onnx" / slug / "model.onnx"
+
+
+def load_encoder(settings: Settings) -> TextEncoder:
+    """Instantiate the encoder selected by ``EMBED_BACKEND``; raises if unavailable."""
+    backend = settings.embed_backend.lower()
+    if backend not in EMBED_BACKENDS:
+        logger.warning("Unknown EMBED_BACKEND %r; using torch", settings.embed_backend)
+        backend = "torch"
+    if backend == "onnx":
+        return OnnxEncoder(onnx_model_path(settings), settings.embed_model, settings.embed_cache_dir)
+
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(settings.embed_model, cache_folder=str(settings.embed_cache_dir))
+    if backend == "int8":
+        import torch
+
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+__all__ = ["EMBED_BACKENDS", "OnnxEncoder", "TextEncoder", "load_encoder", "onnx_model_path"]
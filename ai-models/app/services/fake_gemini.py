@@ -0,0 +1,99 @@
+"""Offline stand-in for Gemini with realistic streaming latency."""
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from typing import AsyncIterator, List, Optional
+
+from ..config import Settings
+from .gemini_client import GeminiClient, RateLimitError, build_rate_limiter
+from .rate_limit import PRIORITY_INTERACTIVE
+
+_REFERENCES = re.compile(r"^References: (.+)$", re.MULTILINE)
+_QUESTION = re.compile(r"^User question: (.+)$", re.MULTILINE)
+
+
+class FakeGeminiClient(GeminiClient):
+    """Answers from the prompt itself, no API key or network needed.
+
+    Enabled with ``GEMINI_FAKE=true`` for local runs, load tests and the
+    streaming benchmark. The first chunk arrives after ``first_token_ms``
+    and each further word after ``token_ms``, roughly the shape of a
+    ``gemini-2.5-flash`` completion; the rate limit still applies.
+    """
+
+    def __init__(self, settings: Settings, first_token_ms: float = 400.0, token_ms: float = 25.0):
+        self.settings = settings
+        self._limiter = build_rate_limiter(settings)
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.calls = 0
+
+    def warm(self) -> None:
+        return None
+
+    def generate(
+        self,
+        prompt: str,
+        priority: int = PRIORITY_INTERACTIVE,
+        deadline: Optional[float] = None,
+    ) -> str | None:
+        if not self._limiter.acquire(priority, deadline):
+            raise RateLimitError("Gemini usage limit reached")
+        words = self._words(prompt)
+        time.sleep(self._total_seconds(words))
+        return "".join(words).strip()
+
+    async def generate_async(
+        self,
+        prompt: str,
+        priority: int = PRIORITY_INTERACTIVE,
+        deadline: Optional[float] = None,
+    ) -> str | None:
+        if not await self._limiter.acquire_async(priority, deadline):
+            raise RateLimitError("Gemini usage limit reached")
+        words = self._words(prompt)
+        await asyncio.sleep(self._total_seconds(words))
+        return "".join(words).strip()
+
+    async def stream_async(
+        self,
+        prompt: str,
+        priority: int = PRIORITY_INTERACTIVE,
+        deadline: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        if not await self._limiter.acquire_async(priority, deadline):
+            raise RateLimitError("Gemini usage limit reached")
+        words = self._words(prompt)
+        await asyncio.sleep(self.first_token_ms / 1000)
+        for pos, word in enumerate(words):
+            if pos:
+                await asyncio.sleep(self.token_ms / 1000)
+            yield word
+
+    def _words(self, prompt: str) -> List[str]:
+        self.calls += 1
+        return re.findall(r"\S+\s*", fake_reply(prompt))
+
+    def _total_seconds(self, words: List[str]) -> float:
+        return (self.first_token_ms + self.token_ms * max(len(words) - 1, 0)) / 1000
+
+
+def fake_reply(prompt: str) -> str:
+    """A deterministic concierge-style answer built from the prompt's context."""
+    refs = _REFERENCES.search(prompt)
+    question = _QUESTION.search(prompt)
+    places = refs.group(1) if refs else "Gateway of India, Marine Drive"
+    asked = question.group(1) if question else "your trip"
+    return (
+        f"For {asked}, I would start with {places}. Each is easy to reach by local "
+        "train or cab, and together they make a relaxed half day without long "
+        "transfers. Go early to beat the crowds and the afternoon heat, keep some "
+        "cash for snacks and entry tickets, and check timings before you set out "
+        "since hours change on holidays. Stay aware of your belongings in busy "
+        "areas and enjoy the city at your own pace."
+    )
+
+
+__all__ = ["FakeGeminiClient", "fake_reply"]
@@ -3,42 +3,29 @@ from __future__ import annotations
 
 import logging
 import threading
-import time
-from collections import deque
-from typing import Deque, Optional
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional
 
 from ..config import Settings
+from .rate_limit import PRIORITY_INTERACTIVE, RateLimiter
 
-try:
+if TYPE_CHECKING:  # pragma: no cover
     import google.generativeai as genai
-except Exception:  # pragma: no cover - optional dependency
-    genai = None  # type: ignore
 
 logger = logging.getLogger(__name__)
 
-
-class RateLimitError(Exception):
-    """Raised when outbound Gemini calls exceed the configured rate."""
+GENERATION_CONFIG = {
+    "temperature": 0.35,
+    "max_output_tokens": 256,
+    "top_p": 0.9,
+}
 
 
-class RateLimiter:
-    """Simple sliding-window limiter to avoid hammering the API."""
+class RateLimitError(Exception):
+    """Raised when a Gemini call could not get a rate-limit slot in time."""
 
-    def __init__(self, max_calls: int, interval_seconds: int = 60):
-        self.max_calls = max(1, max_calls)
-        self.interval = max(1, interval_seconds)
-        self._timestamps: Deque[float] = deque()
-        self._lock = threading.Lock()
 
-    def allow(self) -> bool:
-        now = time.monotonic()
-        with self._lock:
-            while self._timestamps and now - self._timestamps[0] > self.interval:
-                self._timestamps.popleft()
-            if len(self._timestamps) >= self.max_calls:
-                return False
-            self._timestamps.append(now)
-            return True
+class GeminiStreamError(Exception):
+    """Raised when a streamed completion breaks off before it finished."""
 
 
 class GeminiClient:
@@ -46,15 +33,36 @@ class GeminiClient:
 
     def __init__(self, settings: Settings):
         self.settings = settings
-        self._limiter = RateLimiter(settings.gemini_requests_per_minute)
+        self._limiter = build_rate_limiter(settings)
         self._model: Optional["genai.GenerativeModel"] = None
-        self._configure()
+        self._configured = False
+        self._configure_lock = threading.Lock()
+        if not settings.gemini_api_key:
+            logger.warning("GEMINI_API_KEY missing; chatbot will fall back to heuristics.")
+
+    def warm(self) -> None:
+        """Import and configure the SDK now instead of on the first chat request."""
+        self._ensure_model()
+
+    def limiter_stats(self) -> Dict[str, float]:
+        return self._limiter.stats()
+
+    def _ensure_model(self) -> Optional["genai.GenerativeModel"]:
+        if self._configured:
+            return self._model
+        with self._configure_lock:
+            if not self._configured:
+                self._configure()
+                self._configured = True
+        return self._model
 
     def _configure(self) -> None:
         if not self.settings.gemini_api_key:
-            logger.warning("GEMINI_API_KEY missing; chatbot will fall back to heuristics.")
             return
-        if genai is None:
+        try:
+            # deferred: the SDK pulls in grpc/protobuf, which is slow to import
+            import google.generativeai as genai
+        except Exception:  # pragma: no cover - optional dependency
             logger.error(
                 "google-generativeai not installed; run `pip install google-generativeai` to enable Gemini."
             )
@@ -69,36 +77,109 @@ class GeminiClient:
             logger.error("Failed to configure Gemini model: %s", exc)
             self._model = None
 
-    def generate(self, prompt: str) -> str | None:
-        """Generate a concise completion, enforcing rate limits."""
-        if not self._model:
+    def generate(
+        self,
+        prompt: str,
+        priority: int = PRIORITY_INTERACTIVE,
+        deadline: Optional[float] = None,
+    ) -> str | None:
+        """Generate a concise completion, enforcing rate limits.
+
+        Waits for a rate-limit slot until ``deadline`` (``time.monotonic()``;
+        default ``GEMINI_MAX_WAIT_SECONDS`` from now), then raises
+        :class:`RateLimitError`.
+        """
+        if not self._ensure_model():
             return None
-        if not self._limiter.allow():
+        if not self._limiter.acquire(priority, deadline):
             raise RateLimitError("Gemini usage limit reached")
         try:
             response = self._model.generate_content(
-                prompt,
-                generation_config={
-                    "temperature": 0.35,
-                    "max_output_tokens": 256,
-                    "top_p": 0.9,
-                },
+                prompt, generation_config=GENERATION_CONFIG
             )
         except Exception as exc:  # noqa: BLE001
             logger.warning("Gemini request failed: %s", exc)
             return None
-        text = getattr(response, "text", None)
-        if text:
-            return text.strip()
+        return _response_text(response)
+
+    async def generate_async(
+        self,
+        prompt: str,
+        priority: int = PRIORITY_INTERACTIVE,
+        deadline: Optional[float] = None,
+    ) -> str | None:
+        """Non-blocking :meth:`generate` using the SDK's async transport."""
+        if not self._ensure_model():
+            return None
+        if not await self._limiter.acquire_async(priority, deadline):
+            raise RateLimitError("Gemini usage limit reached")
+        try:
+            response = await self._model.generate_content_async(
+                prompt, generation_config=GENERATION_CONFIG
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Gemini request failed: %s", exc)
+            return None
+        return _response_text(response)
+
+    async def stream_async(
+        self,
+        prompt: str,
+        priority: int = PRIORITY_INTERACTIVE,
+        deadline: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """Yield completion text chunks as Gemini produces them.
+
+        Yields nothing when Gemini is not configured; raises
+        :class:`GeminiStreamError` if the stream fails partway.
+        """
+        if not self._ensure_model():
+            return
+        if not await self._limiter.acquire_async(priority, deadline):
+            raise RateLimitError("Gemini usage limit reached")
         try:
-            candidates = response.candidates or []
-            if not candidates:
-                return None
-            parts = candidates[0].content.parts
-            combined = " ".join(part.text for part in parts if getattr(part, "text", ""))
-            return combined.strip() or None
-        except Exception:  # noqa: BLE001
+            response = await self._model.generate_content_async(
+                prompt, generation_config=GENERATION_CONFIG, stream=True
+            )
+            async for chunk in response:
+                text = _raw_text(chunk)
+                if text:
+                    yield text
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Gemini stream failed: %s", exc)
+            raise GeminiStreamError(str(exc)) from exc
+
+
+def build_rate_limiter(settings: Settings) -> RateLimiter:
+    return RateLimiter(
+        settings.gemini_requests_per_minute,
+        burst=settings.gemini_burst,
+        max_queue=settings.gemini_queue_limit,
+        max_wait_seconds=settings.gemini_max_wait_seconds,
+        shared_path=settings.gemini_limiter_path,
+    )
+
+
+def _response_text(response) -> str | None:
+    return (_raw_text(response) or "").strip() or None
+
+
+def _raw_text(response) -> str | None:
+    """Text of a response or stream chunk, whitespace kept (chunks are joined)."""
+    try:
+        text = getattr(response, "text", None)
+    except ValueError:  # blocked or empty candidates
+        text = None
+    if text:
+        return text
+    try:
+        candidates = response.candidates or []
+        if not candidates:
             return None
+        parts = candidates[0].content.parts
+        return " ".join(part.text for part in parts if getattr(part, "text", "")) or None
+    except Exception:  # noqa: BLE001
+        return None
 
 
-__all__ = ["GeminiClient", "RateLimitError"]
+__all__ = ["GeminiClient", "GeminiStreamError", "RateLimitError", "build_rate_limiter"]
@@ -0,0 +1,259 @@
+"""Chat guardrails compiled from ``configs/safety_policies.yaml``."""
+from __future__ import annotations
+
+import logging
+import re
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Sequence, Tuple
+
+import yaml
+
+from .. import deps
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY_PATH = Path(__file__).resolve().parents[2] / "configs" / "safety_policies.yaml"
+
+_EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+# Indian mobiles and Mumbai landlines with optional +91/0, or any +country number
+_PHONE = re.compile(
+    r"(?<![\w+])(?:(?:\+?91[\s-]?|0)?(?:[6-9]\d{4}[\s-]?\d{5}|22[\s-]?\d{4}[\s-]?\d{4})"
+    r"|\+\d{1,3}[\s-]?\d(?:[\s-]?\d){7,12})(?!\w)"
+)
+# Only numbers that read as part of an address: "flat 12", "house no. 4",
+# "12, Carter Road", "pincode 400050". Counts before a street name ("2 day
+# trip near Carter Road") are left alone so retrieval and answers keep them.
+_ADDRESS = re.compile(
+    r"\b(?:flat|apt|apartment|house|room|plot|shop|bldg|building|wing)\s*(?:no\.?|number|#)\s*"
+    r"\d+[a-z]?\b"
+    r"|\b(?:flat|apt|plot)\s+\d+[a-z]?\b"
+    r"|\b\d{1,5}[a-z]?(?:/\d{1,5})?,\s*(?:[\w.'-]+\s+){0,4}"
+    r"(?:road|rd|street|st|lane|marg|path|nagar|chowk|colony|society|cross)\b"
+    r"|\bpin(?:\s?code)?[\s:,-]*[1-9]\d{2}\s?\d{3}\b",
+    re.IGNORECASE,
+)
+PII_RULES = (
+    ("redact_email", _EMAIL, "[email]"),
+    ("redact_phone", _PHONE, "[phone]"),
+    ("redact_address", _ADDRESS, "[address]"),
+)
+
+
+class PatternAutomaton:
+    """Aho–Corasick automaton over labelled patterns.
+
+    :meth:`scan` reports every occurrence of every pattern in one pass over
+    the text, so a check costs time linear in the text (plus matches)
+    however many patterns there are.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, int]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # (pattern length, label) for every pattern ending at a node
+        self._out: List[Tuple[Tuple[int, int], ...]] = [()]
+        self.patterns = 0
+        for text, label in patterns:
+            if text:
+                self._insert(text, label)
+                self.patterns += 1
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def _insert(self, text: str, label: int) -> None:
+        node = 0
+        for char in text:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] += ((len(text), label),)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] += self._out[self._fail[child]]
+
+    def scan(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """``(end, length, label)`` for each match; ``text[end - length:end]``."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for pos, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                for length, label in out[node]:
+                    yield pos + 1, length, label
+
+
+@dataclass(frozen=True)
+class CategoryRule:
+    name: str
+    reply: str
+    patterns: Tuple[str, ...]
+    whole_words: bool = True
+    # benign phrases ("bloody mary") that clear this category's overlapping hits
+    exceptions: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class Verdict:
+    category: str
+    reply: str
+
+
+class GuardrailEngine:
+    """Blocked-category checks and PII redaction for chat queries.
+
+    All category patterns and exceptions share one :class:`PatternAutomaton`;
+    a query is lowercased, whitespace-collapsed and scanned once. A hit
+    counts unless an exception of its category overlaps it, and the
+    earliest listed category with a hit decides the reply.
+    """
+
+    def __init__(self, rules: Sequence[CategoryRule], redactors: Sequence[Tuple[Pattern, str]]):
+        self.rules = list(rules)
+        self.redactors = list(redactors)
+        # labels below len(rules) are category patterns, the rest exceptions
+        self._exception_rule: List[int] = []
+        patterns: List[Tuple[str, int]] = []
+        for label, rule in enumerate(self.rules):
+            patterns.extend((_normalise(pattern), label) for pattern in rule.patterns)
+            for exception in rule.exceptions:
+                exception_label = len(self.rules) + len(self._exception_rule)
+                patterns.append((_normalise(exception), exception_label))
+                self._exception_rule.append(label)
+        self._automaton = PatternAutomaton(patterns)
+        self._checks = 0
+        self._blocked = {rule.name: 0 for rule in self.rules}
+        self._redactions = {replacement: 0 for _, replacement in self.redactors}
+
+    @classmethod
+    def from_policy(cls, policy: dict) -> "GuardrailEngine":
+        pii = policy.get("pii_rules") or {}
+        fallback = pii.get("fallback_message") or "I can't help with that request."
+        rules_by_name = policy.get("category_rules") or {}
+        rules = []
+        for name in policy.get("blocked_categories") or []:
+            spec = rules_by_name.get(name) or {}
+            if not spec.get("patterns"):
+                logger.warning("Blocked category %s has no patterns; it is not enforced", name)
+                continue
+            match = spec.get("match", "word")
+            if match not in ("word", "substring"):
+                raise ValueError(f"category {name}: match must be 'word' or 'substring'")
+            rules.append(
+                CategoryRule(
+                    name,
+                    spec.get("reply") or fallback,
+                    tuple(str(pattern) for pattern in spec["patterns"]),
+                    whole_words=match == "word",
+                    exceptions=tuple(str(phrase) for phrase in spec.get("exceptions") or ()),
+                )
+            )
+        redactors = [(regex, token) for key, regex, token in PII_RULES if pii.get(key)]
+        return cls(rules, redactors)
+
+    def check(self, text: str) -> Optional[Verdict]:
+        """The verdict of the first listed category ``text`` falls in, if any."""
+        self._checks += 1
+        normalised = _normalise(text)
+        categories = len(self.rules)
+        hits: List[Tuple[int, int, int]] = []
+        cleared: Dict[int, List[Tuple[int, int]]] = {}
+        for end, length, label in self._automaton.scan(normalised):
+            rule = label if label < categories else self._exception_rule[label - categories]
+            if self.rules[rule].whole_words and not _is_whole_word(normalised, end, length):
+                continue
+            if label == rule:
+                hits.append((rule, end - length, end))
+            else:
+                cleared.setdefault(rule, []).append((end - length, end))
+        best = min(
+            (
+                rule
+                for rule, start, end in hits
+                if not any(a < end and start < b for a, b in cleared.get(rule, ()))
+            ),
+            default=None,
+        )
+        if best is None:
+            return None
+        rule = self.rules[best]
+        self._blocked[rule.name] += 1
+        return Verdict(rule.name, rule.reply)
+
+    def redact(self, text: str) -> str:
+        """``text`` with emails, phone numbers and addresses replaced by tokens."""
+        for regex, replacement in self.redactors:
+            text, count = regex.subn(replacement, text)
+            self._redactions[replacement] += count
+        return text
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "patterns": self._automaton.patterns,
+            "automaton_states": len(self._automaton),
+            "checks": self._checks,
+            "blocked": dict(self._blocked),
+            "redactions": dict(self._redactions),
+        }
+
+
+def _normalise(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _is_whole_word(text: str, end: int, length: int) -> bool:
+    start = end - length
+    return (start == 0 or not text[start - 1].isalnum()) and (
+        end == len(text) or not text[end].isalnum()
+    )
+
+
+def load_guardrails(path: Path) -> GuardrailEngine:
+    with open(path, encoding="utf-8") as fh:
+        policy = yaml.safe_load(fh) or {}
+    engine = GuardrailEngine.from_policy(policy)
+    logger.info(
+        "Compiled %d guardrail patterns in %d categories from %s",
+        engine.stats()["patterns"],
+        len(engine.rules),
+        path,
+    )
+    return engine
+
+
+@lru_cache(maxsize=1)
+def get_guardrails() -> GuardrailEngine:
+    path = get_settings().safety_policies_path
+    return load_guardrails(deps.resolve_path(path) if path is not None else DEFAULT_POLICY_PATH)
+
+
+__all__ = [
+    "CategoryRule",
+    "GuardrailEngine",
+    "PatternAutomaton",
+    "Verdict",
+    "get_guardrails",
+    "load_guardrails",
+]
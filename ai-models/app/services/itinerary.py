@@ -1,16 +1,46 @@
 """Day-plan construction heuristics."""
 from __future__ import annotations
 
+import datetime
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
+import numpy as np
 import pandas as pd
 
 from .. import deps
 from ..config import Settings
-from ..schemas import ItineraryRequest, ItineraryResponse, RecommendRequest
+from ..schemas import (
+    ItineraryDay,
+    ItineraryRequest,
+    ItineraryResponse,
+    MultiDayItineraryRequest,
+    MultiDayItineraryResponse,
+    RecommendRequest,
+    TimeWindow,
+)
+from .availability import Availability, get_availability
+from .poi_matrix import PoiTravelMatrix, get_poi_matrix
 from .recommend import RecommendService
-from .utils import haversine_km, two_opt
+from .spatial_index import get_spatial_index
+from .travel_matrix import TravelMatrixService
+from .utils import (
+    balanced_kmeans,
+    haversine_km,
+    optimize_route,
+    pairwise_km,
+    speed_at_minute,
+)
+
+logger = logging.getLogger(__name__)
+
+NEARBY_POOL = 40
+LUNCH_MINUTES = 45
 
 
 @dataclass
@@ -21,6 +51,7 @@ class PlanStop:
     longitude: float
     category: str
     rating: float | None
+    row: Optional[int] = None  # availability row, None when hours are unknown
 
     @property
     def coord(self) -> tuple[float, float]:
@@ -28,12 +59,56 @@ class PlanStop:
 
 
 class ItineraryService:
-    def __init__(self, settings: Settings, recommend_service: RecommendService):
+    def __init__(
+        self,
+        settings: Settings,
+        recommend_service: RecommendService,
+        travel_matrix: TravelMatrixService,
+    ):
         self.settings = settings
         self.recommend_service = recommend_service
+        self.travel_matrix = travel_matrix
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._pool_broken = False
+
+    def warm(self) -> None:
+        """Start the multi-day routing workers so the first trip skips the spawn."""
+        pool = self._route_pool()
+        if pool is None:
+            return
+        try:
+            pool.submit(abs, 0).result()
+        except Exception:  # noqa: BLE001
+            self._give_up_pool()
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _give_up_pool(self) -> None:
+        logger.warning("Routing workers unavailable; multi-day days route inline", exc_info=True)
+        self.shutdown()
+        self._pool_broken = True
+
+    def _route_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.settings.itinerary_workers <= 0 or self._pool_broken:
+            return None
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn, not fork: the parent runs server and inference threads
+                self._pool = ProcessPoolExecutor(
+                    self.settings.itinerary_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
 
-    def _select_pois(self, payload: ItineraryRequest) -> List[PlanStop]:
-        df = deps.get_poi_frame().copy()
+    def _select_pois(
+        self, payload: ItineraryRequest, availability: Availability, weekday: int
+    ) -> List[PlanStop]:
+        df = deps.get_poi_frame()
         if payload.poi_ids:
             df = df[df["id"].isin(payload.poi_ids)]
         if df.empty or not payload.poi_ids:
@@ -43,8 +118,12 @@ class ItineraryService:
             if recs:
                 df = pd.DataFrame(recs)
         if df.empty:
+            nearby, _ = get_spatial_index().nearest(
+                payload.start_location.lat, payload.start_location.lng, NEARBY_POOL
+            )
+            pool = deps.get_poi_frame().iloc[nearby]
             df = (
-                deps.get_poi_frame()
+                self._open_in_window(pool, payload.time_window, availability, [weekday])
                 .sort_values("rating", ascending=False)
                 .groupby("category", group_keys=False)
                 .head(2)
@@ -52,11 +131,14 @@ class ItineraryService:
         else:
             # encourage diversity by picking top-rated per category
             df = (
-                df.sort_values("rating", ascending=False)
+                self._open_in_window(df, payload.time_window, availability, [weekday])
+                .sort_values("rating", ascending=False)
                 .groupby("category", group_keys=False)
                 .head(2)
             )
-        df = df.head(8)  # manageable day
+        return self._plan_stops(df.head(8), availability)  # manageable day
+
+    def _plan_stops(self, df: pd.DataFrame, availability: Availability) -> List[PlanStop]:
         return [
             PlanStop(
                 poi_id=row["id"],
@@ -65,32 +147,104 @@ class ItineraryService:
                 longitude=row["longitude"],
                 category=row.get("category", ""),
                 rating=row.get("rating"),
+                row=availability.row(row["id"]),
             )
             for _, row in df.iterrows()
         ]
 
-    def _order(self, start: tuple[float, float], stops: List[PlanStop]) -> List[PlanStop]:
+    def _open_in_window(
+        self,
+        df: pd.DataFrame,
+        window: TimeWindow,
+        availability: Availability,
+        weekdays: Sequence[int],
+    ) -> pd.DataFrame:
+        """Drop POIs closed for the whole time window on every one of
+        ``weekdays`` (unknown ids are kept)."""
+        if df.empty:
+            return df
+        rows = np.array([availability.row(poi_id) for poi_id in df["id"]], dtype=object)
+        known = np.array([row is not None for row in rows])
+        keep = ~known
+        if known.any():
+            known_rows = rows[known].astype(np.int64)
+            start, end = _parse_minutes(window.start), _parse_minutes(window.end)
+            open_any = np.zeros(len(known_rows), dtype=bool)
+            for weekday in set(weekdays):
+                open_any |= availability.open_during(known_rows, weekday, start, end)
+            keep[known] = open_any
+        return df[keep]
+
+    def _route_inputs(
+        self,
+        start: tuple[float, float],
+        stops: List[PlanStop],
+        window: TimeWindow,
+        requested: Set[str],
+        availability: Availability,
+        weekday: int,
+    ) -> Dict[str, object]:
+        """Keyword arguments for :func:`optimize_route` (plain arrays, so a
+        worker process can run it)."""
+        start_minutes = _parse_minutes(window.start)
+        end_limit = _parse_minutes(window.end)
+        lats = np.array([s.latitude for s in stops], dtype=np.float64)
+        lngs = np.array([s.longitude for s in stops], dtype=np.float64)
+        coords = [start, *zip(lats, lngs)]
+        speed = speed_at_minute(start_minutes)
+        rows = [stop.row for stop in stops]
+        matrix = get_poi_matrix()
+        # road times where OSRM answered, else haversine at the start hour's
+        # speed; unfloored: the 5 minute minimum leg would make nearby stops tie
+        if matrix is not None and None not in rows:
+            # between POIs the precomputed matrix; only the start is online
+            pairs = [(0, pos) for pos in range(1, len(coords))]
+            road = self.travel_matrix.matrix(coords, start_minutes, pairs)
+            km = pairwise_km([start[0]], [start[1]], lats, lngs)[0]
+            origin = np.where(road.known[0, 1:], road.durations[0, 1:], km / speed * 60)
+            travel = matrix.minutes(rows, rows, start_minutes)
+        else:
+            road = self.travel_matrix.matrix(coords, start_minutes)
+            km = pairwise_km(np.r_[start[0], lats], np.r_[start[1], lngs])
+            minutes = np.where(road.known, road.durations, km / speed * 60)
+            origin, travel = minutes[0, 1:], minutes[1:, 1:]
+        dwell = np.array([self._dwell_minutes(s.category) for s in stops], dtype=np.float64)
+        windows = np.column_stack([np.full(len(stops), -np.inf), np.full(len(stops), np.inf)])
+        for pos, stop in enumerate(stops):
+            if stop.row is None:
+                continue
+            visit = availability.visit_window(stop.row, weekday, start_minutes, end_limit, dwell[pos])
+            windows[pos] = visit if visit is not None else (-np.inf, -np.inf)
+        return {
+            "travel": travel,
+            "origin_travel": origin,
+            "dwell": dwell,
+            "start": start_minutes,
+            "end": end_limit,
+            "windows": windows,
+            "mandatory": [pos for pos, stop in enumerate(stops) if stop.poi_id in requested],
+        }
+
+    def _order(
+        self,
+        start: tuple[float, float],
+        stops: List[PlanStop],
+        window: TimeWindow,
+        requested: Set[str],
+        availability: Availability,
+        weekday: int,
+        deadline: float,
+    ) -> List[PlanStop]:
+        """Route order from :func:`optimize_route` under the stops' opening
+        windows; stops it drops as unreachable go last for ``build`` to retry."""
         if not stops:
             return []
-        coords = [s.coord for s in stops]
-        remaining = list(range(len(stops)))
-        order: List[int] = []
-        current = start
-        while remaining:
-            next_idx = min(remaining, key=lambda idx: haversine_km(current, coords[idx]))
-            order.append(next_idx)
-            current = coords[next_idx]
-            remaining.remove(next_idx)
-        # apply 2-opt for refinement (with synthetic distance matrix)
-        n = len(order)
-        dist_matrix = [[0.0] * n for _ in range(n)]
-        for i in range(n):
-            for j in range(i + 1, n):
-                d = haversine_km(coords[order[i]], coords[order[j]])
-                dist_matrix[i][j] = dist_matrix[j][i] = d
-        optimized_positions = two_opt(list(range(n)), dist_matrix)
-        ordered_indices = [order[idx] for idx in optimized_positions]
-        return [stops[i] for i in ordered_indices]
+        plan = optimize_route(
+            **self._route_inputs(start, stops, window, requested, availability, weekday),
+            # leave half of what is left for scheduling
+            time_budget_ms=max((deadline - time.perf_counter()) * 500, 1.0),
+        )
+        return [stops[pos] for pos in plan.order + plan.dropped]
 
     def _dwell_minutes(self, category: str) -> int:
         category = (category or "").lower()
@@ -103,23 +257,219 @@ class ItineraryService:
         return 75
 
     def build(self, payload: ItineraryRequest) -> ItineraryResponse:
-        stops = self._select_pois(payload)
+        deadline = time.perf_counter() + self.settings.itinerary_budget_ms / 1000
+        weekday = (payload.date or datetime.date.today()).weekday()
+        availability = get_availability()
+        start = (payload.start_location.lat, payload.start_location.lng)
+        stops = self._select_pois(payload, availability, weekday)
         ordered = self._order(
-            (payload.start_location.lat, payload.start_location.lng), stops
+            start,
+            stops,
+            payload.time_window,
+            set(payload.poi_ids or []),
+            availability,
+            weekday,
+            deadline,
+        )
+        return self._schedule(
+            f"{payload.mood.title()} Trail",
+            start,
+            payload.time_window,
+            ordered,
+            availability,
+            weekday,
+            deadline,
+        )
+
+    def build_multi_day(self, payload: MultiDayItineraryRequest) -> MultiDayItineraryResponse:
+        """Plan one day per date: candidates are split into spatial clusters
+        of at most ``stops_per_day`` (one neighbourhood a day keeps travel
+        short), each cluster goes to the date where most of it is open, and
+        the days are routed in parallel in the worker pool."""
+        deadline = time.perf_counter() + self.settings.itinerary_budget_ms / 1000
+        availability = get_availability()
+        dates = [
+            payload.start_date + datetime.timedelta(days=offset) for offset in range(payload.days)
+        ]
+        weekdays = [date.weekday() for date in dates]
+        start = (payload.start_location.lat, payload.start_location.lng)
+        requested = set(payload.poi_ids or [])
+        stops = self._select_trip_pois(
+            payload, availability, weekdays, payload.days * payload.stops_per_day
+        )
+
+        labels = balanced_kmeans(
+            np.array([stop.latitude for stop in stops]),
+            np.array([stop.longitude for stop in stops]),
+            payload.days,
+            payload.stops_per_day,
+        )
+        clusters = [
+            [stop for stop, label in zip(stops, labels) if label == cluster]
+            for cluster in range(payload.days)
+        ]
+        day_stops = self._assign_days(clusters, payload.daily_window, availability, weekdays)
+
+        inputs = [
+            self._route_inputs(start, day, payload.daily_window, requested, availability, weekday)
+            if day
+            else None
+            for day, weekday in zip(day_stops, weekdays)
+        ]
+        pool = self._route_pool() if sum(day is not None for day in inputs) > 1 else None
+        # days run side by side in the pool, one after another inline
+        share = 1 if pool is not None else max(sum(day is not None for day in inputs), 1)
+        budget_ms = max((deadline - time.perf_counter()) * 500 / share, 1.0)
+        futures = [None] * len(inputs)
+        if pool is not None:
+            try:
+                futures = [
+                    pool.submit(optimize_route, **day, time_budget_ms=budget_ms)
+                    if day is not None
+                    else None
+                    for day in inputs
+                ]
+            except Exception:  # noqa: BLE001
+                self._give_up_pool()
+
+        days = []
+        placed: Set[str] = set()
+        for number, (date, weekday, stops_today, day, future) in enumerate(
+            zip(dates, weekdays, day_stops, inputs, futures), start=1
+        ):
+            ordered: List[PlanStop] = []
+            if day is not None:
+                plan = None
+                if future is not None:
+                    try:
+                        plan = future.result()
+                    except Exception:  # noqa: BLE001
+                        self._give_up_pool()
+                if plan is None:
+                    plan = optimize_route(**day, time_budget_ms=budget_ms)
+                ordered = [stops_today[pos] for pos in plan.order + plan.dropped]
+            plan_day = self._schedule(
+                f"{payload.mood.title()} Trail, day {number}",
+                start,
+                payload.daily_window,
+                ordered,
+                availability,
+                weekday,
+                deadline,
+            )
+            placed.update(item.poi_id for item in plan_day.items)
+            days.append(ItineraryDay(date=date, **plan_day.model_dump()))
+
+        selected = {stop.poi_id for stop in stops}
+        # requested ids never selected: unknown, closed every trip day or over capacity
+        skipped = [
+            poi_id for poi_id in dict.fromkeys(payload.poi_ids or []) if poi_id not in selected
+        ]
+        return MultiDayItineraryResponse(
+            title=f"{payload.mood.title()} Trail",
+            days=days,
+            unscheduled=[stop.poi_id for stop in stops if stop.poi_id not in placed] + skipped,
         )
-        start_minutes = _parse_minutes(payload.time_window.start)
-        end_limit = _parse_minutes(payload.time_window.end)
 
+    def _select_trip_pois(
+        self,
+        payload: MultiDayItineraryRequest,
+        availability: Availability,
+        weekdays: Sequence[int],
+        count: int,
+    ) -> List[PlanStop]:
+        """Up to ``count`` candidates open on at least one trip day:
+        the requested ids, else recommendations topped up with the best
+        rated POIs near the start. Past ``count``, the earliest requested ids win."""
+        frame = deps.get_poi_frame()
+        if payload.poi_ids:
+            requested = {poi_id: pos for pos, poi_id in enumerate(dict.fromkeys(payload.poi_ids))}
+            df = frame[frame["id"].isin(requested)]
+            df = df.iloc[np.argsort(df["id"].map(requested).to_numpy(), kind="stable")]
+        else:
+            recs = self.recommend_service.recommend(
+                RecommendRequest(mood=payload.mood, prefs={}, location=payload.start_location)
+            )
+            nearby, _ = get_spatial_index().nearest(
+                payload.start_location.lat, payload.start_location.lng, max(count * 3, NEARBY_POOL)
+            )
+            pool = frame.iloc[nearby].sort_values("rating", ascending=False)
+            # recommendations first, then the nearby pool by rating
+            df = pd.concat([pd.DataFrame(recs), pool]).drop_duplicates("id") if recs else pool
+            df = df.groupby("category", group_keys=False, sort=False).head(
+                max(2, -(-count // 3))
+            )
+        df = self._open_in_window(df, payload.daily_window, availability, weekdays)
+        return self._plan_stops(df.head(count), availability)
+
+    def _assign_days(
+        self,
+        clusters: List[List[PlanStop]],
+        window: TimeWindow,
+        availability: Availability,
+        weekdays: Sequence[int],
+    ) -> List[List[PlanStop]]:
+        """Match clusters to dates, greediest first, by how many of their
+        stops are open that day."""
+        start, end = _parse_minutes(window.start), _parse_minutes(window.end)
+        open_counts = np.zeros((len(clusters), len(weekdays)))
+        for c, cluster in enumerate(clusters):
+            rows = np.array([stop.row for stop in cluster if stop.row is not None], dtype=np.int64)
+            unknown = len(cluster) - len(rows)
+            for d, weekday in enumerate(weekdays):
+                opened = availability.open_during(rows, weekday, start, end).sum() if len(rows) else 0
+                open_counts[c, d] = opened + unknown
+        assigned: List[List[PlanStop]] = [[] for _ in weekdays]
+        free_clusters, free_days = set(range(len(clusters))), set(range(len(weekdays)))
+        for flat in np.argsort(-open_counts, axis=None, kind="stable"):
+            c, d = divmod(int(flat), len(weekdays))
+            if c in free_clusters and d in free_days:
+                assigned[d] = clusters[c]
+                free_clusters.discard(c)
+                free_days.discard(d)
+        return assigned
+
+    def _schedule(
+        self,
+        title: str,
+        start: Tuple[float, float],
+        window: TimeWindow,
+        ordered: List[PlanStop],
+        availability: Availability,
+        weekday: int,
+        deadline: float,
+    ) -> ItineraryResponse:
+        """Timed day plan visiting ``ordered`` around opening hours and breaks."""
+        start_minutes = _parse_minutes(window.start)
+        end_limit = _parse_minutes(window.end)
+
+        matrix = get_poi_matrix()
         items = []
         cursor = start_minutes
         total_distance = 0.0
-        prev_coord = (payload.start_location.lat, payload.start_location.lng)
+        prev_coord = start
+        prev_row: Optional[int] = None
         lunch_inserted = False
         evening_break_inserted = False
+        pending = list(ordered)
 
-        for stop in ordered:
-            distance = haversine_km(prev_coord, stop.coord)
-            travel = _travel_minutes(distance, cursor)
+        while pending:
+            choice = self._next_stop(
+                pending,
+                prev_coord,
+                prev_row,
+                matrix,
+                cursor,
+                lunch_inserted,
+                end_limit,
+                availability,
+                weekday,
+                searching=time.perf_counter() < deadline,
+            )
+            if choice is None:
+                break
+            stop, distance, travel, visit_start = choice
+            pending.remove(stop)
             cursor += travel
             total_distance += distance
 
@@ -131,17 +481,18 @@ class ItineraryService:
                         "lat": prev_coord[0],
                         "lng": prev_coord[1],
                         "start_time": _format_minutes(cursor),
-                        "end_time": _format_minutes(cursor + 45),
+                        "end_time": _format_minutes(cursor + LUNCH_MINUTES),
                         "travel_minutes": 0,
                         "distance_km": 0,
                     }
                 )
-                cursor += 45
+                cursor += LUNCH_MINUTES
                 lunch_inserted = True
 
+            wait = visit_start - cursor
             dwell = self._dwell_minutes(stop.category)
-            start_time = _format_minutes(cursor)
-            cursor += dwell
+            start_time = _format_minutes(visit_start)
+            cursor = visit_start + dwell
             end_time = _format_minutes(cursor)
 
             items.append(
@@ -154,9 +505,11 @@ class ItineraryService:
                     "end_time": end_time,
                     "travel_minutes": round(travel, 1),
                     "distance_km": round(distance, 2),
+                    "wait_minutes": round(wait, 1),
                 }
             )
             prev_coord = stop.coord
+            prev_row = stop.row
 
             if not evening_break_inserted and cursor >= 18 * 60:
                 items.append(
@@ -179,12 +532,54 @@ class ItineraryService:
 
         total_time = max(cursor - start_minutes, 0)
         return ItineraryResponse(
-            title=f"{payload.mood.title()} Trail",
+            title=title,
             total_distance_km=round(total_distance, 2),
             total_time_min=round(total_time, 1),
             items=items,
         )
 
+    def _next_stop(
+        self,
+        pending: List[PlanStop],
+        prev_coord: Tuple[float, float],
+        prev_row: Optional[int],
+        matrix: Optional[PoiTravelMatrix],
+        cursor: float,
+        lunch_inserted: bool,
+        end_limit: float,
+        availability: Availability,
+        weekday: int,
+        searching: bool,
+    ) -> Optional[Tuple[PlanStop, float, float, float]]:
+        """The next stop to visit as ``(stop, distance, travel, visit start)``.
+
+        Stops are tried in route order; the first one open on arrival wins.
+        Otherwise the one that opens soonest is visited after a wait. Stops
+        that cannot open before the window ends are dropped from ``pending``.
+        Once the planning budget is spent (``searching`` false) only the next
+        stop open on arrival is taken and closed ones are dropped.
+        """
+        best = None
+        for stop in list(pending):
+            distance, travel = _leg(matrix, prev_coord, prev_row, stop, cursor)
+            arrival = cursor + travel
+            if not lunch_inserted and arrival >= 13 * 60:
+                arrival += LUNCH_MINUTES
+            if stop.row is None:
+                return stop, distance, travel, arrival
+            dwell = self._dwell_minutes(stop.category)
+            if availability.is_open(stop.row, weekday, arrival, arrival + dwell):
+                return stop, distance, travel, arrival
+            if not searching:
+                pending.remove(stop)
+                continue
+            opens = availability.next_open(stop.row, weekday, arrival, dwell, end_limit)
+            if opens is None:
+                pending.remove(stop)
+            elif best is None or opens < best[3]:
+                best = (stop, distance, travel, opens)
+        return best
+
 
 def _parse_minutes(value: str) -> int:
     hour, minute = value.split(":")
@@ -198,11 +593,20 @@ def _format_minutes(value: float) -> str:
 
 
 def _travel_minutes(distance_km: float, current_minute: float) -> float:
-    hour = int(current_minute // 60) % 24
-    if hour in range(7, 11) or hour in range(17, 20):
-        speed = 18
-    elif hour in range(11, 16):
-        speed = 24
-    else:
-        speed = 28
-    return max(distance_km / max(speed, 5) * 60, 5)
+    return max(distance_km / speed_at_minute(current_minute) * 60, 5)
+
+
+def _leg(
+    matrix: Optional[PoiTravelMatrix],
+    prev_coord: Tuple[float, float],
+    prev_row: Optional[int],
+    stop: PlanStop,
+    cursor: float,
+) -> Tuple[float, float]:
+    """``(km, minutes)`` to ``stop`` leaving at ``cursor``: a matrix lookup
+    between catalogue POIs, haversine from anywhere else."""
+    if matrix is not None and prev_row is not None and stop.row is not None:
+        minutes = float(matrix.layer(cursor)[prev_row, stop.row])
+        return float(matrix.distances[prev_row, stop.row]), max(minutes, 5)
+    distance = haversine_km(prev_coord, stop.coord)
+    return distance, _travel_minutes(distance, cursor)
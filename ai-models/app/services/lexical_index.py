@@ -0,0 +1,309 @@
+"""Incrementally maintained TF-IDF index over the POI catalogue.
+
+Raw term counts are kept per document together with live document
+frequencies, so adding, updating or removing a POI only touches that
+document's row and the ``df`` of its terms; idf weights and row norms are
+recomputed lazily from those counts. New documents are appended as delta
+rows and removed ones are tombstoned until :meth:`LexicalIndex.compact`
+folds them back into a single CSR matrix and re-selects the vocabulary.
+Terms first seen in a delta row get new columns right away, so an edited
+POI is searchable by its new words before any compaction.
+
+Weighting matches scikit-learn's ``TfidfVectorizer`` defaults (lowercased
+``\\b\\w\\w+\\b`` tokens, raw tf, smoothed idf, L2 norm), so scores agree with
+the previous per-service vectorizers.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+Document = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class LexicalView:
+    """Frozen vocabulary + idf of one index state, for fixed-width vectors.
+
+    Dense embeddings built from the index (the TF-IDF encoder fallback) must
+    keep their width and weighting while POI edits land, so that path pins
+    a view instead of reading the live index.
+    """
+
+    key: str
+    vocabulary: Dict[str, int]
+    idf: np.ndarray
+    stopwords: frozenset
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float64)
+        for row, text in enumerate(texts):
+            for term, count in _term_counts(text, self.stopwords).items():
+                col = self.vocabulary.get(term)
+                if col is not None:
+                    out[row, col] = count * self.idf[col]
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return np.divide(out, norms, out=out, where=norms > 0)
+
+
+class LexicalIndex:
+    """TF-IDF document index supporting upserts, deletes and compaction."""
+
+    def __init__(
+        self,
+        stopwords: Iterable[str],
+        max_features: int,
+        base_key: str = "",
+        compact_delta_rows: int = 256,
+    ):
+        self.stopwords = frozenset(stopwords)
+        self.max_features = max(1, max_features)
+        self.base_key = base_key
+        self.compact_delta_rows = max(1, compact_delta_rows)
+        self.generation = 0
+        self.mutations = 0
+        self._lock = threading.RLock()
+        self._texts: Dict[str, str] = {}
+        self._reset(())
+
+    # -- construction -------------------------------------------------
+
+    @classmethod
+    def build(
+        cls,
+        documents: Iterable[Document],
+        stopwords: Iterable[str],
+        max_features: int,
+        base_key: str = "",
+        compact_delta_rows: int = 256,
+    ) -> "LexicalIndex":
+        index = cls(stopwords, max_features, base_key, compact_delta_rows)
+        index._reset(list(documents))
+        return index
+
+    def _reset(self, documents: Sequence[Document]) -> None:
+        counts = [_term_counts(text, self.stopwords) for _, text in documents]
+        self._vocab = _select_vocabulary(counts, self.max_features)
+        self._texts = {doc_id: text for doc_id, text in documents}
+        self._ids: List[str] = [doc_id for doc_id, _ in documents]
+        self._row_of: Dict[str, int] = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        self._base = _count_matrix(counts, self._vocab)
+        self._delta: List[sp.csr_matrix] = []
+        self._df = np.bincount(self._base.indices, minlength=len(self._vocab)).astype(np.int64)
+        self._counts: Optional[sp.csr_matrix] = self._base
+        self._idf: Optional[np.ndarray] = None
+        self._norms: Optional[np.ndarray] = None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    # -- mutation -----------------------------------------------------
+
+    def upsert(self, doc_id: str, text: str) -> None:
+        with self._lock:
+            self._tombstone(doc_id)
+            counts = _term_counts(text, self.stopwords)
+            self._extend_vocabulary(counts)
+            row = _count_matrix([counts], self._vocab)
+            self._df[row.indices] += 1
+            self._delta.append(row)
+            self._row_of[doc_id] = len(self._ids)
+            self._ids.append(doc_id)
+            self._alive = np.append(self._alive, True)
+            self._texts[doc_id] = text
+            self._touch()
+            if len(self._delta) >= self.compact_delta_rows:
+                self.compact()
+
+    def remove(self, doc_id: str) -> bool:
+        with self._lock:
+            if not self._tombstone(doc_id):
+                return False
+            self._texts.pop(doc_id, None)
+            self._touch()
+            if self.dead_rows * 4 > len(self._ids):
+                self.compact()
+            return True
+
+    def compact(self) -> None:
+        """Drop tombstones, merge delta rows and re-select the vocabulary."""
+        with self._lock:
+            live = [(doc_id, self._texts[doc_id]) for doc_id in self.live_ids()]
+            self._reset(live)
+            self.generation += 1
+
+    def _extend_vocabulary(self, counts: Counter) -> None:
+        """Append columns for unseen terms; compaction re-selects the vocabulary."""
+        new_terms = sorted(term for term in counts if term not in self._vocab)
+        if not new_terms:
+            return
+        # copy: views pinned by the TF-IDF encoder hold the previous dict
+        vocab = dict(self._vocab)
+        for term in new_terms:
+            vocab[term] = len(vocab)
+        self._vocab = vocab
+        self._df = np.concatenate([self._df, np.zeros(len(new_terms), dtype=np.int64)])
+
+    def _tombstone(self, doc_id: str) -> bool:
+        row = self._row_of.pop(doc_id, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        self._df[self._row_counts(row).indices] -= 1
+        return True
+
+    def _row_counts(self, row: int) -> sp.csr_matrix:
+        base_rows = self._base.shape[0]
+        if row < base_rows:
+            return self._base[row]
+        return self._delta[row - base_rows]
+
+    def _touch(self) -> None:
+        self.mutations += 1
+        self._counts = None
+        self._idf = None
+        self._norms = None
+
+    # -- queries ------------------------------------------------------
+
+    @property
+    def key(self) -> str:
+        return f"{self.base_key}.g{self.generation}.m{self.mutations}"
+
+    @property
+    def dead_rows(self) -> int:
+        return int(len(self._alive) - self._alive.sum())
+
+    def live_ids(self) -> List[str]:
+        with self._lock:
+            return [doc_id for doc_id, alive in zip(self._ids, self._alive) if alive]
+
+    def row_for(self, doc_id: str) -> Optional[int]:
+        return self._row_of.get(doc_id)
+
+    def doc_id(self, row: int) -> str:
+        return self._ids[row]
+
+    def delta_rows(self) -> np.ndarray:
+        """Rows appended since the last build or compaction."""
+        with self._lock:
+            return np.arange(self._base.shape[0], len(self._ids))
+
+    def view(self) -> LexicalView:
+        with self._lock:
+            return LexicalView(self.key, self._vocab, self.idf().copy(), self.stopwords)
+
+    def idf(self) -> np.ndarray:
+        with self._lock:
+            if self._idf is None:
+                n_docs = int(self._alive.sum())
+                self._idf = np.log((1 + n_docs) / (1 + self._df)) + 1.0
+            return self._idf
+
+    def search(
+        self, query: str, k: int, rows: Optional[np.ndarray] = None
+    ) -> List[Tuple[str, float]]:
+        """Top-``k`` live documents by cosine similarity, optionally within ``rows``."""
+        with self._lock:
+            counts, idf, norms = self._matrices()
+            if rows is None:
+                rows = np.flatnonzero(self._alive)
+            else:
+                rows = rows[self._alive[rows]]
+            ids = self._ids
+            if not len(rows):
+                return []
+            query_vec = np.zeros(len(idf))
+            for term, count in _term_counts(query, self.stopwords).items():
+                col = self._vocab.get(term)
+                if col is not None:
+                    query_vec[col] = count * idf[col]
+        q_norm = np.linalg.norm(query_vec)
+        if q_norm > 0:
+            query_vec /= q_norm
+        raw = counts[rows] @ (query_vec * idf)
+        scores = np.divide(raw, norms[rows], out=np.zeros_like(raw), where=norms[rows] > 0)
+        # same ordering as the previous ``cosine_similarity(...).argsort()[::-1]``
+        order = np.argsort(scores)[::-1][:k]
+        return [(ids[rows[pos]], float(scores[pos])) for pos in order]
+
+    def _matrices(self) -> Tuple[sp.csr_matrix, np.ndarray, np.ndarray]:
+        if self._counts is None:
+            width = len(self._vocab)
+            self._counts = sp.vstack(
+                [_widen(part, width) for part in (self._base, *self._delta)], format="csr"
+            )
+        idf = self.idf()
+        if self._norms is None:
+            squared = self._counts.multiply(self._counts) @ (idf * idf)
+            self._norms = np.sqrt(np.asarray(squared).ravel())
+        return self._counts, idf, self._norms
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "documents": int(self._alive.sum()),
+                "vocabulary": len(self._vocab),
+                "delta_rows": len(self._delta),
+                "dead_rows": self.dead_rows,
+                "generation": self.generation,
+                "mutations": self.mutations,
+            }
+
+
+def _term_counts(text: str, stopwords: frozenset) -> Counter:
+    return Counter(
+        token for token in TOKEN_PATTERN.findall(text.lower()) if token not in stopwords
+    )
+
+
+def _select_vocabulary(counts: Sequence[Counter], max_features: int) -> Dict[str, int]:
+    totals: Counter = Counter()
+    for doc in counts:
+        totals.update(doc)
+    terms = list(totals)
+    if len(terms) > max_features:
+        terms = sorted(terms, key=lambda term: (-totals[term], term))[:max_features]
+    return {term: col for col, term in enumerate(sorted(terms))}
+
+
+def _count_matrix(counts: Sequence[Counter], vocab: Dict[str, int]) -> sp.csr_matrix:
+    indptr = [0]
+    indices: List[int] = []
+    data: List[float] = []
+    for doc in counts:
+        cols = sorted((vocab[term], count) for term, count in doc.items() if term in vocab)
+        indices.extend(col for col, _ in cols)
+        data.extend(float(count) for _, count in cols)
+        indptr.append(len(indices))
+    return sp.csr_matrix(
+        (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32), indptr),
+        shape=(len(counts), len(vocab)),
+    )
+
+
+def _widen(matrix: sp.csr_matrix, width: int) -> sp.csr_matrix:
+    """``matrix`` with zero columns appended up to ``width`` (rows are unchanged)."""
+    if matrix.shape[1] == width:
+        return matrix
+    return sp.csr_matrix(
+        (matrix.data, matrix.indices, matrix.indptr), shape=(matrix.shape[0], width)
+    )
+
+
+__all__ = ["Document", "LexicalIndex", "LexicalView"]
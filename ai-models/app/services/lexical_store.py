@@ -0,0 +1,172 @@
+"""Shared lexical index over the POI catalogue, persisted between restarts."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .. import deps
+from ..config import Settings
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .lexical_index import LexicalIndex
+
+logger = logging.getLogger(__name__)
+
+# bump when LexicalIndex's pickled layout changes
+ARTIFACT_FORMAT = "1"
+# current catalogue snapshot plus the one in-flight requests may still use
+KEPT_VERSIONS = 2
+
+
+def poi_ids(df: pd.DataFrame) -> List[str]:
+    if "id" in df.columns:
+        return df["id"].astype(str).tolist()
+    return [str(pos) for pos in range(len(df))]
+
+
+def poi_snippet(record: dict) -> Tuple[str, str]:
+    """(reference name, context line) that chat retrieval quotes for a POI."""
+    tags = record.get("tags", [])
+    tags_str = ", ".join(tags) if tags else "no tags"
+    return (
+        record.get("name", "Unknown"),
+        f"{record.get('name')}: {record.get('description', '')} (tags: {tags_str})",
+    )
+
+
+@dataclass
+class _LexicalState:
+    index: "LexicalIndex"
+    records: Dict[str, dict]
+    frame_ids: List[str]
+    # built once per snapshot so retrieval does no per-hit formatting
+    snippets: Dict[str, Tuple[str, str]]
+
+
+class LexicalIndexStore:
+    """Owns the one :class:`LexicalIndex` shared by chat retrieval and the
+    TF-IDF encoder fallback, plus the POI records it points at.
+
+    The index built from the catalogue is pickled under ``embed_cache_dir``
+    keyed by catalogue version, stopwords and ``LEXICAL_MAX_FEATURES``, so
+    restarts load it instead of re-tokenising. Admin edits are applied in
+    memory through :meth:`upsert_poi` / :meth:`remove_poi` to the current
+    snapshot's index; a catalogue reload starts from the new source.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._states: "OrderedDict[str, _LexicalState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cache_key(self) -> str:
+        raw = ":".join(
+            [
+                ARTIFACT_FORMAT,
+                deps.get_catalogue_version(),
+                str(self.settings.lexical_max_features),
+                ",".join(deps.get_stopwords()),
+            ]
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    def path_for(self, key: str) -> Path:
+        return self.settings.embed_cache_dir / f"lexical-index-{key}.pkl"
+
+    def load(self) -> "LexicalIndex":
+        return self._state().index
+
+    @property
+    def frame_ids(self) -> List[str]:
+        """POI ids in catalogue frame order, for mapping frame positions to rows."""
+        return self._state().frame_ids
+
+    def _state(self) -> _LexicalState:
+        version = deps.get_catalogue_version()
+        state = self._states.get(version)
+        if state is not None:
+            return state
+        with self._lock:
+            if version not in self._states:
+                df = deps.get_poi_frame().reset_index(drop=True)
+                ids = poi_ids(df)
+                records = dict(zip(ids, df.to_dict(orient="records")))
+                snippets = {doc_id: poi_snippet(record) for doc_id, record in records.items()}
+                self._states[version] = _LexicalState(
+                    self._load_or_build(ids), records, ids, snippets
+                )
+                while len(self._states) > KEPT_VERSIONS:
+                    self._states.popitem(last=False)
+            return self._states[version]
+
+    def _load_or_build(self, ids: List[str]) -> "LexicalIndex":
+        # deferred: scipy.sparse is only needed once retrieval starts
+        from .lexical_index import LexicalIndex
+
+        key = self.cache_key()
+        path = self.path_for(key)
+        if path.exists():
+            try:
+                with open(path, "rb") as fh:
+                    index = pickle.load(fh)
+                logger.info("Loaded lexical index %s", path.name)
+                return index
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Discarding unreadable lexical index %s: %s", path, exc)
+
+        index = LexicalIndex.build(
+            zip(ids, deps.get_corpus()),
+            deps.get_stopwords(),
+            self.settings.lexical_max_features,
+            base_key=key,
+            compact_delta_rows=self.settings.lexical_compact_delta_rows,
+        )
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as fh:
+                pickle.dump(index, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning("Could not persist lexical index to %s: %s", path, exc)
+            tmp_path.unlink(missing_ok=True)
+        return index
+
+    def record(self, doc_id: str) -> Optional[dict]:
+        return self._state().records.get(doc_id)
+
+    def snippet(self, doc_id: str) -> Optional[Tuple[str, str]]:
+        return self._state().snippets.get(doc_id)
+
+    def upsert_poi(self, poi: dict) -> None:
+        state = self._state()
+        doc_id = str(poi["id"])
+        text = deps.corpus_text(
+            poi.get("name") or "", poi.get("description") or "", list(poi.get("tags") or [])
+        )
+        state.records[doc_id] = dict(poi)
+        state.snippets[doc_id] = poi_snippet(state.records[doc_id])
+        state.index.upsert(doc_id, text)
+
+    def remove_poi(self, doc_id: str) -> bool:
+        state = self._state()
+        removed = state.index.remove(doc_id)
+        state.records.pop(doc_id, None)
+        state.snippets.pop(doc_id, None)
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        state = self._states.get(deps.active_catalogue().version)
+        return state.index.stats() if state is not None else {}
+
+
+__all__ = ["LexicalIndexStore", "poi_ids", "poi_snippet"]
@@ -0,0 +1,164 @@
+"""Precomputed POI-to-POI travel matrix, memory-mapped per catalogue version.
+
+Built offline by ``python -m app.build_travel_matrix``: a directory with
+
+* ``durations.npy``: ``(layers, rows, rows)`` travel minutes between POI
+  ordinals (catalogue row positions), one layer per distinct time-of-day
+  profile;
+* ``distances.npy``: ``(rows, rows)`` km;
+* ``manifest.json``: the catalogue version the ordinals refer to, the bucket
+  width in minutes and ``bucket_layers`` mapping each time-of-day bucket to
+  its durations layer (a static OSRM profile needs one layer for all
+  buckets, the speed heuristic one per speed band).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .. import deps
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+# request coordinates are matched to POIs at ~1 m
+COORD_DIGITS = 5
+
+
+class PoiTravelMatrix:
+    def __init__(
+        self,
+        durations: np.ndarray,
+        distances: np.ndarray,
+        bucket_minutes: int,
+        bucket_layers: Sequence[int],
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+    ):
+        self.durations = durations
+        self.distances = distances
+        self.bucket_minutes = bucket_minutes
+        self.bucket_layers = list(bucket_layers)
+        self._row_at: Dict[Tuple[float, float], int] = {}
+        lats = np.round(latitudes, COORD_DIGITS).tolist()
+        lngs = np.round(longitudes, COORD_DIGITS).tolist()
+        for row, coord in enumerate(zip(lats, lngs)):
+            self._row_at.setdefault(coord, row)
+
+    def __len__(self) -> int:
+        return self.distances.shape[0]
+
+    def row_at(self, lat: float, lng: float) -> Optional[int]:
+        """Ordinal of the POI at exactly this coordinate, if any."""
+        return self._row_at.get((round(float(lat), COORD_DIGITS), round(float(lng), COORD_DIGITS)))
+
+    def layer(self, minute_of_day: float) -> np.ndarray:
+        bucket = int(minute_of_day % (24 * 60) // self.bucket_minutes)
+        return self.durations[self.bucket_layers[bucket % len(self.bucket_layers)]]
+
+    def minutes(
+        self, sources: Sequence[int], destinations: Sequence[int], minute_of_day: float
+    ) -> np.ndarray:
+        return np.asarray(self.layer(minute_of_day)[np.ix_(sources, destinations)], dtype=np.float64)
+
+    def km(self, sources: Sequence[int], destinations: Sequence[int]) -> np.ndarray:
+        return np.asarray(self.distances[np.ix_(sources, destinations)], dtype=np.float64)
+
+
+class MatrixWriter:
+    """Fills a new matrix directory block by block through writable memory
+    maps (the full matrix never has to fit in RAM), then swaps it in."""
+
+    def __init__(self, target: Path, rows: int, layers: int, dtype: str = "float16"):
+        self.target = Path(target)
+        self.staging = self.target.with_name(f".{self.target.name}.{os.getpid()}.tmp")
+        shutil.rmtree(self.staging, ignore_errors=True)
+        self.staging.mkdir(parents=True)
+        self.durations = np.lib.format.open_memmap(
+            self.staging / "durations.npy", mode="w+", dtype=dtype, shape=(layers, rows, rows)
+        )
+        self.distances = np.lib.format.open_memmap(
+            self.staging / "distances.npy", mode="w+", dtype=dtype, shape=(rows, rows)
+        )
+
+    def publish(
+        self,
+        catalogue_version: str,
+        bucket_minutes: int,
+        bucket_layers: Sequence[int],
+        source: str,
+    ) -> None:
+        """Write the manifest and replace ``target`` atomically."""
+        rows = int(self.distances.shape[0])
+        self.durations.flush()
+        self.distances.flush()
+        del self.durations, self.distances
+        manifest = {
+            "format": FORMAT_VERSION,
+            "catalogue_version": catalogue_version,
+            "rows": rows,
+            "bucket_minutes": bucket_minutes,
+            "bucket_layers": list(bucket_layers),
+            "source": source,
+        }
+        (self.staging / MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+        previous = self.target.with_name(f".{self.target.name}.{os.getpid()}.old")
+        if self.target.exists():
+            os.replace(self.target, previous)
+        os.replace(self.staging, self.target)
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def load_matrix(source: Path, catalogue_version: str) -> Optional[PoiTravelMatrix]:
+    """Map the matrix at ``source``; ``None`` if it was built for another catalogue."""
+    source = Path(source)
+    manifest = json.loads((source / MANIFEST).read_text(encoding="utf-8"))
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(
+            f"{source} has travel matrix format {manifest.get('format')}, need {FORMAT_VERSION}"
+        )
+    if manifest.get("catalogue_version") != catalogue_version:
+        logger.warning(
+            "Travel matrix %s was built for catalogue %s, not %s; rebuild it with "
+            "`python -m app.build_travel_matrix`",
+            source,
+            manifest.get("catalogue_version"),
+            catalogue_version,
+        )
+        return None
+    columns = deps.current_catalogue().columns
+    return PoiTravelMatrix(
+        np.load(source / "durations.npy", mmap_mode="r"),
+        np.load(source / "distances.npy", mmap_mode="r"),
+        int(manifest["bucket_minutes"]),
+        manifest["bucket_layers"],
+        np.asarray(columns.latitude),
+        np.asarray(columns.longitude),
+    )
+
+
+@lru_cache(maxsize=2)
+def _matrix_for_version(version: str, path: Optional[Path]) -> Optional[PoiTravelMatrix]:
+    if path is None or not (path / MANIFEST).exists():
+        return None
+    return load_matrix(path, version)
+
+
+def get_poi_matrix() -> Optional[PoiTravelMatrix]:
+    """The matrix for the active catalogue, or ``None`` when there is none."""
+    path = get_settings().poi_matrix_path
+    return _matrix_for_version(
+        deps.get_catalogue_version(), deps.resolve_path(path) if path is not None else None
+    )
+
+
+__all__ = ["MatrixWriter", "PoiTravelMatrix", "get_poi_matrix", "load_matrix"]
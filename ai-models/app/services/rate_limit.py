@@ -0,0 +1,277 @@
+"""Token-bucket rate limiting with a bounded, prioritised wait queue."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+# higher is served first
+PRIORITY_BACKGROUND = 0
+PRIORITY_INTERACTIVE = 1
+
+_STATE = struct.Struct("dd")  # tokens, wall-clock stamp of the last refill
+
+
+def _refill(
+    tokens: float, stamp: float, now: float, rate: float, capacity: float
+) -> Tuple[float, float]:
+    return min(capacity, tokens + max(0.0, now - stamp) * rate), max(stamp, now)
+
+
+class TokenBucket:
+    """``capacity`` tokens, refilled at ``rate`` per second, in this process."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, now: float, consume: bool = True) -> float:
+        """Seconds until a token is available; 0 means one was (and, with
+        ``consume``, has been) taken."""
+        with self._lock:
+            self._tokens, self._stamp = _refill(
+                self._tokens, self._stamp, now, self.rate, self.capacity
+            )
+            if self._tokens >= 1:
+                if consume:
+                    self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+class FileTokenBucket(TokenBucket):
+    """A :class:`TokenBucket` kept in a small ``flock``-ed file, so every
+    worker process on the host draws from one budget.
+
+    The file outlives the processes (and boots) that wrote it, so it holds
+    ``time.time()`` stamps rather than the callers' monotonic ``now``. A
+    stamp in the future, left by a clock stepped back, restarts refilling
+    from now instead of withholding tokens until the clock catches up."""
+
+    def __init__(self, path: Path, rate: float, capacity: float):
+        super().__init__(rate, capacity)
+        import fcntl  # POSIX only; the in-process bucket works everywhere
+
+        self._fcntl = fcntl
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def take(self, now: float, consume: bool = True) -> float:
+        # only the wait is returned, so the clock need not match ``now``'s
+        now = time.time()
+        # flock does not exclude threads sharing the descriptor
+        with self._lock:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+            try:
+                raw = os.pread(self._fd, _STATE.size, 0)
+                tokens, stamp = (
+                    _STATE.unpack(raw) if len(raw) == _STATE.size else (self.capacity, now)
+                )
+                if stamp > now:
+                    tokens, stamp = min(tokens, self.capacity), now
+                tokens, stamp = _refill(tokens, stamp, now, self.rate, self.capacity)
+                wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+                if wait == 0.0 and consume:
+                    tokens -= 1
+                os.pwrite(self._fd, _STATE.pack(tokens, stamp), 0)
+                return wait
+            finally:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+@dataclass(order=True)
+class _Waiter:
+    rank: int  # -priority
+    seq: int
+    deadline: float = field(compare=False)
+    enqueued: float = field(compare=False)
+    wake: Callable[[], None] = field(compare=False)
+    settled: bool = field(default=False, compare=False)
+    admitted: bool = field(default=False, compare=False)
+
+
+class RateLimiter:
+    """Token bucket with a bounded, prioritised wait queue.
+
+    Calls within the burst are admitted at once. Beyond it, callers queue
+    for the next token, highest priority first and then in arrival order,
+    until their deadline. A caller is turned away up front when the queue
+    is full or the tokens ahead of it cannot arrive before its deadline,
+    so short bursts wait a little instead of failing and only hopeless
+    requests fall back. With ``shared_path`` the bucket is a locked file
+    shared by every worker process; the queue stays per process.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        burst: int = 5,
+        max_queue: int = 32,
+        max_wait_seconds: float = 3.0,
+        shared_path: Optional[Path] = None,
+    ):
+        rate = max(1, requests_per_minute) / 60
+        capacity = float(max(1, burst))
+        self.bucket = (
+            FileTokenBucket(shared_path, rate, capacity)
+            if shared_path is not None
+            else TokenBucket(rate, capacity)
+        )
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max(0.0, max_wait_seconds)
+        self._queue: List[_Waiter] = []
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._waiting = 0
+        self._peak_waiting = 0
+        self._admitted = 0
+        self._queued = 0
+        self._expired = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._waited = 0  # admitted after queueing
+        self._wait_seconds = 0.0
+
+    def acquire(
+        self, priority: int = PRIORITY_INTERACTIVE, deadline: Optional[float] = None
+    ) -> bool:
+        """Block until admitted (``True``) or the call cannot be made by
+        ``deadline``, a ``time.monotonic()`` value (default: max wait)."""
+        event = threading.Event()
+        waiter = self._enqueue(priority, deadline, event.set)
+        if isinstance(waiter, bool):
+            return waiter
+        try:
+            while (delay := self._poll(waiter)) is not None:
+                event.wait(delay)
+                event.clear()
+        finally:
+            self._abandon(waiter)
+        return waiter.admitted
+
+    async def acquire_async(
+        self, priority: int = PRIORITY_INTERACTIVE, deadline: Optional[float] = None
+    ) -> bool:
+        """:meth:`acquire` without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = self._enqueue(priority, deadline, lambda: loop.call_soon_threadsafe(event.set))
+        if isinstance(waiter, bool):
+            return waiter
+        try:
+            while (delay := self._poll(waiter)) is not None:
+                try:
+                    await asyncio.wait_for(event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+        finally:
+            # also runs when the caller is cancelled, e.g. the client went away
+            self._abandon(waiter)
+        return waiter.admitted
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "rate_per_minute": round(self.bucket.rate * 60, 2),
+                "burst": self.bucket.capacity,
+                "admitted": self._admitted,
+                "queued": self._queued,
+                "waiting": self._waiting,
+                "peak_waiting": self._peak_waiting,
+                "expired": self._expired,
+                "rejected": self._rejected,
+                "cancelled": self._cancelled,
+                "avg_wait_ms": round(self._wait_seconds / self._waited * 1000, 1)
+                if self._waited
+                else 0.0,
+            }
+
+    def _enqueue(
+        self, priority: int, deadline: Optional[float], wake: Callable[[], None]
+    ) -> Union[bool, _Waiter]:
+        now = time.monotonic()
+        if deadline is None:
+            deadline = now + self.max_wait
+        with self._lock:
+            if self._head() is None and self.bucket.take(now) == 0.0:
+                self._admitted += 1
+                return True
+            if self._waiting >= self.max_queue:
+                self._rejected += 1
+                return False
+            ahead = sum(1 for w in self._queue if not w.settled and -w.rank >= priority)
+            eta = self.bucket.take(now, consume=False) + ahead / self.bucket.rate
+            if now + eta > deadline:
+                self._rejected += 1
+                return False
+            self._seq += 1
+            waiter = _Waiter(-priority, self._seq, deadline, now, wake)
+            heapq.heappush(self._queue, waiter)
+            self._waiting += 1
+            self._queued += 1
+            self._peak_waiting = max(self._peak_waiting, self._waiting)
+            return waiter
+
+    def _poll(self, waiter: _Waiter) -> Optional[float]:
+        """Settle ``waiter`` and return ``None``, or return how long it should
+        sleep before polling again (it is woken early on reaching the head)."""
+        now = time.monotonic()
+        with self._lock:
+            if waiter.settled:
+                return None
+            if now >= waiter.deadline:
+                self._settle(waiter)
+                self._expired += 1
+                return None
+            if self._head() is not waiter:
+                return waiter.deadline - now
+            wait = self.bucket.take(now)
+            if wait > 0:
+                return min(wait, waiter.deadline - now)
+            waiter.admitted = True
+            self._settle(waiter)
+            self._admitted += 1
+            self._waited += 1
+            self._wait_seconds += now - waiter.enqueued
+            return None
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        with self._lock:
+            if not waiter.settled:
+                self._settle(waiter)
+                self._cancelled += 1
+
+    def _settle(self, waiter: _Waiter) -> None:
+        waiter.settled = True
+        self._waiting -= 1
+        head = self._head()
+        if head is not None:
+            head.wake()
+
+    def _head(self) -> Optional[_Waiter]:
+        while self._queue and self._queue[0].settled:
+            heapq.heappop(self._queue)
+        return self._queue[0] if self._queue else None
+
+
+__all__ = [
+    "FileTokenBucket",
+    "PRIORITY_BACKGROUND",
+    "PRIORITY_INTERACTIVE",
+    "RateLimiter",
+    "TokenBucket",
+]
@@ -1,16 +1,20 @@
 """Multi-factor recommendation scoring."""
 from __future__ import annotations
 
-from typing import List
+import json
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
 from .. import deps
 from ..config import Settings
-from ..schemas import Filters, RecommendRequest
+from ..schemas import Location, RecommendRequest
+from .cache import TTLCache
+from .embedding_store import PoiEmbeddingStore, unit_rows
 from .embeddings import EmbeddingService
-from .utils import haversine_km, normalize
+from .scoring import PoiFeatures, get_poi_features, score_candidates, top_k
+from .spatial_index import get_spatial_index
 
 MOOD_CATEGORY_HINTS = {
     "Chill": ["Waterfront", "Park", "Cafe"],
@@ -19,88 +23,185 @@ MOOD_CATEGORY_HINTS = {
     "Culture": ["Heritage", "Museum", "Art"],
 }
 
+RESULT_LIMIT = 15
+
 
 class RecommendService:
-    def __init__(self, settings: Settings, embedding_service: EmbeddingService):
+    def __init__(
+        self,
+        settings: Settings,
+        embedding_service: EmbeddingService,
+        poi_store: PoiEmbeddingStore,
+    ):
         self.settings = settings
         self.embedding_service = embedding_service
-
-    def _apply_filters(self, df: pd.DataFrame, filters: Filters | None) -> pd.DataFrame:
-        if filters is None:
-            return df
-        mask = pd.Series([True] * len(df))
-        if filters.category:
-            mask &= df["category"].str.contains(filters.category, case=False, na=False)
-        if filters.tags:
-            mask &= df["tags"].apply(
-                lambda tags: bool(set(filters.tags or []) & set(tags or []))
-            )
-        if filters.rating_min is not None:
-            mask &= df["rating"].fillna(0) >= float(filters.rating_min)
-        if filters.price_level is not None:
-            mask &= df["price_level"].fillna(0) <= int(filters.price_level)
-        return df[mask]
+        self.poi_store = poi_store
+        self._cache = TTLCache(settings.reco_cache_size, settings.reco_cache_ttl_seconds)
 
     def recommend(self, payload: RecommendRequest) -> List[dict]:
-        df = deps.get_poi_frame().copy()
-        df = self._apply_filters(df, payload.filters)
-        if df.empty:
+        namespace = self._cache_namespace()
+        self._cache.ensure_namespace(namespace)
+        payload = self._canonical(payload)
+        # the namespace stays in the key: a request still draining on the previous
+        # catalogue snapshot must not write its results where new requests read
+        key = (namespace, self._cache_key(payload))
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        items = self._recommend(payload)
+        self._cache.set(key, items)
+        return items
+
+    def recommend_batch(self, payloads: List[RecommendRequest]) -> List[List[dict]]:
+        """Rank several requests, encoding each distinct mood prompt once."""
+        namespace = self._cache_namespace()
+        self._cache.ensure_namespace(namespace)
+        payloads = [self._canonical(payload) for payload in payloads]
+        keys = [(namespace, self._cache_key(payload)) for payload in payloads]
+        results = [self._cache.get(key) for key in keys]
+        missing = [pos for pos, items in enumerate(results) if items is None]
+        if missing:
+            fresh = self._recommend_batch([payloads[pos] for pos in missing])
+            for pos, items in zip(missing, fresh):
+                results[pos] = items
+                self._cache.set(keys[pos], items)
+        return results
+
+    def cache_stats(self) -> Dict[str, float]:
+        return self._cache.stats()
+
+    def _cache_namespace(self) -> tuple:
+        return (self.poi_store.cache_key(), tuple(self.settings.reco_weights))
+
+    def _canonical(self, payload: RecommendRequest) -> RecommendRequest:
+        """Snap the location to the cache grid so nearby requests share results."""
+        grid = self.settings.reco_cache_location_grid
+        if payload.location is None or grid <= 0 or not self._cache.max_entries:
+            return payload
+        location = Location(
+            lat=round(round(payload.location.lat / grid) * grid, 6),
+            lng=round(round(payload.location.lng / grid) * grid, 6),
+        )
+        return payload.model_copy(update={"location": location})
+
+    def _cache_key(self, payload: RecommendRequest) -> str:
+        data = payload.model_dump(mode="json")
+        if data.get("filters") and data["filters"].get("tags"):
+            data["filters"]["tags"] = sorted(set(data["filters"]["tags"]))
+        return json.dumps(data, sort_keys=True, default=str)
+
+    def _recommend(self, payload: RecommendRequest) -> List[dict]:
+        features = get_poi_features()
+        if not self._candidate_mask(payload, features).any():
             return []
+        mood_vector = self._encode_prompts([self._mood_prompt(payload)])[0]
+        return self._rank(payload, features, mood_vector)
 
-        texts = df["description"].fillna("") + " " + df["name"].fillna("")
-        mood_prompt = payload.mood + " " + " ".join(
+    def _recommend_batch(self, payloads: List[RecommendRequest]) -> List[List[dict]]:
+        if not payloads:
+            return []
+        features = get_poi_features()
+        prompts = [self._mood_prompt(payload) for payload in payloads]
+        distinct = list(dict.fromkeys(prompts))
+        columns = {prompt: col for col, prompt in enumerate(distinct)}
+        vectors = self._encode_prompts(distinct)
+        similarity_table = None
+        if not self._uses_index(len(features)):
+            similarity_table = self.poi_store.matrix() @ vectors.T
+        results = []
+        for payload, prompt in zip(payloads, prompts):
+            col = columns[prompt]
+            similarity_column = similarity_table[:, col] if similarity_table is not None else None
+            results.append(self._rank(payload, features, vectors[col], similarity_column))
+        return results
+
+    def _mood_prompt(self, payload: RecommendRequest) -> str:
+        return payload.mood + " " + " ".join(
             f"{k}:{v}" for k, v in sorted(payload.prefs.items())
         )
-        poi_vectors = np.array(self.embedding_service.embed_texts(texts.tolist()))
-        mood_vector = np.array(self.embedding_service.embed_texts([mood_prompt])[0])
-        similarities = [self.embedding_service.similarity(vec, mood_vector) for vec in poi_vectors]
-
-        categories = MOOD_CATEGORY_HINTS.get(payload.mood, [])
-        category_scores = [1.0 if row["category"] in categories else 0.3 for _, row in df.iterrows()]
-
-        if payload.location:
-            distances = [
-                haversine_km(
-                    (payload.location.lat, payload.location.lng),
-                    (row["latitude"], row["longitude"]),
-                )
-                for _, row in df.iterrows()
-            ]
-            distance_scores = [1 - d for d in normalize(distances)]
-        else:
-            distance_scores = [0.5] * len(df)
-
-        price_pref = payload.prefs.get("budget")
-        if price_pref:
-            target = {"low": 0, "medium": 2, "high": 4}.get(str(price_pref).lower(), 2)
-            price_scores = [
-                1 - abs((row.get("price_level") or 2) - target) / 4 for _, row in df.iterrows()
-            ]
-        else:
-            price_scores = [0.5] * len(df)
-
-        rating_scores = normalize(df["rating"].fillna(3.5).tolist())
-
-        weights = self.settings.reco_weights
-        comp = zip(similarities, category_scores, distance_scores, price_scores, rating_scores)
-        total_scores = [
-            weights[0] * sim
-            + weights[1] * cat
-            + weights[2] * dist
-            + weights[3] * price
-            + weights[4] * rating
-            for sim, cat, dist, price, rating in comp
-        ]
-
-        df = df.copy()
-        df["score"] = total_scores
-        df["reason"] = df.apply(
-            lambda row: f"Matches {payload.mood} mood via {row['category']} vibe with rating {row['rating'] or 'N/A'}",
-            axis=1,
+
+    def _encode_prompts(self, prompts: List[str]) -> np.ndarray:
+        return unit_rows(
+            np.asarray(self.embedding_service.embed_texts(prompts), dtype=np.float32)
+        )
+
+    def _uses_index(self, catalogue_size: int) -> bool:
+        limit = self.settings.retrieval_candidates
+        return 0 < limit < catalogue_size
+
+    def _retrieve(
+        self,
+        mood_vector: np.ndarray,
+        mask: np.ndarray,
+        similarity_column: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Candidate positions passing ``mask`` and their similarities."""
+        matrix = self.poi_store.matrix()
+        limit = self.settings.retrieval_candidates
+        if self._uses_index(len(mask)) and np.count_nonzero(mask) > limit:
+            candidates, sims = self.poi_store.index().search(
+                mood_vector, self.settings.retrieval_candidates
+            )
+            keep = mask[candidates]
+            # selective filters can leave too few of the nearest neighbours;
+            # then only the exact scan over every match fills a result page
+            if np.count_nonzero(keep) >= RESULT_LIMIT:
+                return candidates[keep], sims[keep]
+        idx = np.flatnonzero(mask)
+        if similarity_column is not None:
+            return idx, similarity_column[idx]
+        if idx.size <= limit:
+            return idx, matrix[idx] @ mood_vector
+        return idx, (matrix @ mood_vector)[idx]
+
+    def _candidate_mask(self, payload: RecommendRequest, features: PoiFeatures) -> np.ndarray:
+        """Filter mask, narrowed to POIs near ``payload.location`` when set."""
+        mask = features.filter_mask(payload.filters)
+        radius = self.settings.reco_radius_km
+        if payload.location is None or radius <= 0:
+            return mask
+        spatial = get_spatial_index()
+        lat, lng = payload.location.lat, payload.location.lng
+        nearby = np.zeros(len(mask), dtype=bool)
+        nearby[spatial.within(lat, lng, radius)[0]] = True
+        if np.count_nonzero(mask & nearby) < RESULT_LIMIT:
+            # sparse area: widen to the closest matches rather than return too few
+            nearby[spatial.nearest(lat, lng, RESULT_LIMIT * 4)[0]] = True
+        return mask & nearby
+
+    def _rank(
+        self,
+        payload: RecommendRequest,
+        features: PoiFeatures,
+        mood_vector: np.ndarray,
+        similarity_column: Optional[np.ndarray] = None,
+    ) -> List[dict]:
+        mask = self._candidate_mask(payload, features)
+        idx, similarities = self._retrieve(mood_vector, mask, similarity_column)
+        if idx.size == 0:
+            return []
+        scores = score_candidates(
+            features,
+            idx,
+            similarities,
+            categories=MOOD_CATEGORY_HINTS.get(payload.mood, []),
+            location=payload.location,
+            budget=payload.prefs.get("budget"),
+            weights=self.settings.reco_weights,
+            radius_km=self.settings.reco_radius_km,
         )
-        ranked = df.sort_values("score", ascending=False).head(15)
+        best = top_k(scores, RESULT_LIMIT)
+        return self._render(payload, deps.get_poi_frame(), idx[best], scores[best])
+
+    def _render(
+        self,
+        payload: RecommendRequest,
+        df: pd.DataFrame,
+        positions: np.ndarray,
+        scores: np.ndarray,
+    ) -> List[dict]:
         results: List[dict] = []
-        for _, row in ranked.iterrows():
+        for row, score in zip(df.iloc[positions].to_dict("records"), scores):
             results.append(
                 {
                     "id": row["id"],
@@ -109,12 +210,19 @@ class RecommendService:
                     "category": row.get("category", ""),
                     "latitude": row.get("latitude"),
                     "longitude": row.get("longitude"),
-                    "rating": row.get("rating"),
-                    "price_level": row.get("price_level"),
+                    "rating": _known(row.get("rating")),
+                    "price_level": _known(row.get("price_level")),
                     "tags": row.get("tags", []),
-                    "image_url": row.get("image_url"),
-                    "reason": row.get("reason", ""),
-                    "score": float(row.get("score", 0.0)),
+                    "image_url": _known(row.get("image_url")),
+                    "reason": f"Matches {payload.mood} mood via {row.get('category')} vibe with rating {_known(row.get('rating')) or 'N/A'}",
+                    "score": float(score),
                 }
             )
         return results
+
+
+def _known(value):
+    """Missing ratings, price levels and image urls come through the frame as NaN."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
@@ -0,0 +1,153 @@
+"""Semantic cache of Gemini chat answers keyed by query embedding and context."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cache import NamespaceWindow
+
+_Key = Tuple[Hashable, Tuple[str, ...]]
+
+
+@dataclass
+class _Entry:
+    key: _Key
+    vector: np.ndarray
+    answer: str
+    expires: float
+    cost_seconds: float
+
+
+class SemanticResponseCache:
+    """LRU of answers, each valid for one retrieved context.
+
+    A lookup hits when an unexpired entry has the same namespace and
+    context (the sorted reference snippets, so an edit to a referenced POI
+    misses) and a query vector with cosine similarity of at least
+    ``threshold``: "sunset spots" and "best sunset places" retrieving the
+    same three POIs share one Gemini answer. Vectors must be unit length.
+
+    The namespace names the embedding space and catalogue the vectors come
+    from. Entries of the last ``KEPT_NAMESPACES`` namespaces looked up live
+    side by side, so requests still draining on the previous catalogue
+    during a reload neither read nor wipe the new one's answers; older
+    namespaces are dropped. ``max_entries`` of zero disables the cache;
+    ``ttl_seconds`` of zero keeps entries until evicted.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, threshold: float):
+        self.max_entries = max(0, max_entries)
+        self.ttl = max(0.0, ttl_seconds)
+        self.threshold = threshold
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._by_context: Dict[_Key, List[int]] = {}
+        self._next_id = 0
+        self._namespaces = NamespaceWindow()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.seconds_saved = 0.0
+        self.calls = 0
+        self.call_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(
+        self, vector: np.ndarray, context: Sequence[str], namespace: Hashable = None
+    ) -> Optional[str]:
+        key = (namespace, tuple(sorted(context)))
+        now = time.monotonic()
+        with self._lock:
+            self._use_namespace(namespace)
+            best_id, best_score = None, self.threshold
+            for entry_id in list(self._by_context.get(key, ())):
+                entry = self._entries[entry_id]
+                if entry.expires and entry.expires < now:
+                    self._remove(entry_id)
+                    self.expirations += 1
+                    continue
+                score = float(np.dot(entry.vector, vector))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                self.misses += 1
+                return None
+            entry = self._entries[best_id]
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            self.seconds_saved += entry.cost_seconds
+            return entry.answer
+
+    def put(
+        self,
+        vector: np.ndarray,
+        context: Sequence[str],
+        answer: str,
+        cost_seconds: float,
+        namespace: Hashable = None,
+    ) -> None:
+        """Remember ``answer``, which took one Gemini call of ``cost_seconds``.
+
+        Answers for a namespace that has since been dropped are not kept.
+        """
+        with self._lock:
+            self.calls += 1
+            self.call_seconds += cost_seconds
+            if not self.max_entries or namespace not in self._namespaces:
+                return
+            key = (namespace, tuple(sorted(context)))
+            expires = time.monotonic() + self.ttl if self.ttl else 0.0
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(
+                key, np.array(vector, copy=True), answer, expires, cost_seconds
+            )
+            self._by_context.setdefault(key, []).append(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _use_namespace(self, namespace: Hashable) -> None:
+        for retired in self._namespaces.use(namespace):
+            for key in [key for key in self._by_context if key[0] == retired]:
+                for entry_id in list(self._by_context[key]):
+                    self._remove(entry_id)
+            self.invalidations += 1
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        ids = self._by_context[entry.key]
+        ids.remove(entry_id)
+        if not ids:
+            del self._by_context[entry.key]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "gemini_calls": self.calls,
+                "gemini_calls_saved": self.hits,
+                "gemini_seconds": round(self.call_seconds, 3),
+                "seconds_saved": round(self.seconds_saved, 3),
+            }
+
+
+__all__ = ["SemanticResponseCache"]
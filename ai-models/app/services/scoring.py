@@ -0,0 +1,203 @@
+"""Columnar POI features and vectorised recommendation scoring."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .. import deps
+from ..columnar import CatalogueColumns
+from ..schemas import Filters, Location
+from .utils import haversine_km_array, normalize_array
+
+BUDGET_TARGETS = {"low": 0, "medium": 2, "high": 4}
+
+
+@dataclass(frozen=True)
+class PoiFeatures:
+    """Per-POI columns as NumPy arrays, aligned with the frame's row order."""
+
+    lat: np.ndarray
+    lng: np.ndarray
+    rating: np.ndarray
+    price_level: np.ndarray
+    category_codes: np.ndarray
+    categories: np.ndarray
+    tag_offsets: np.ndarray
+    tag_codes: np.ndarray
+    tag_vocab: Dict[str, int]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PoiFeatures":
+        n = len(df)
+        if "category" in df.columns:
+            codes, uniques = pd.factorize(df["category"])
+        else:
+            codes, uniques = np.full(n, -1), np.array([], dtype=object)
+        tags_col = df["tags"] if "tags" in df.columns else pd.Series([[]] * n)
+        tag_vocab: Dict[str, int] = {}
+        lengths = np.zeros(n, dtype=np.int64)
+        flat: list[int] = []
+        for pos, tags in enumerate(tags_col):
+            tags = tags if isinstance(tags, list) else []
+            lengths[pos] = len(tags)
+            flat.extend(tag_vocab.setdefault(tag, len(tag_vocab)) for tag in tags)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(
+            lat=_float_column(df, "latitude"),
+            lng=_float_column(df, "longitude"),
+            rating=_float_column(df, "rating"),
+            price_level=_float_column(df, "price_level"),
+            category_codes=np.asarray(codes, dtype=np.int64),
+            categories=np.asarray(uniques, dtype=object),
+            tag_offsets=offsets,
+            tag_codes=np.asarray(flat, dtype=np.int64),
+            tag_vocab=tag_vocab,
+        )
+
+    @classmethod
+    def from_columns(cls, columns: CatalogueColumns) -> "PoiFeatures":
+        """Same features as :meth:`from_frame`, straight from the compiled arrays."""
+        codes, uniques = pd.factorize(columns.category)
+        categories = [columns.string(code) for code in uniques.tolist() if code >= 0]
+        if (uniques < 0).any():
+            # factorize keeps the missing marker as a category; map it back to -1
+            missing = int(np.flatnonzero(uniques < 0)[0])
+            codes = np.where(codes == missing, -1, codes - (codes > missing))
+        price = columns.price_level.astype(np.float64)
+        price[columns.price_level < 0] = np.nan
+        return cls(
+            lat=np.asarray(columns.latitude),
+            lng=np.asarray(columns.longitude),
+            rating=np.asarray(columns.rating),
+            price_level=price,
+            category_codes=np.asarray(codes, dtype=np.int64),
+            categories=np.asarray(categories, dtype=object),
+            tag_offsets=np.asarray(columns.tag_offsets, dtype=np.int64),
+            tag_codes=np.asarray(columns.tag_codes, dtype=np.int64),
+            tag_vocab={
+                columns.string(code): pos for pos, code in enumerate(columns.tag_names.tolist())
+            },
+        )
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def filter_mask(self, filters: Filters | None) -> np.ndarray:
+        mask = np.ones(len(self), dtype=bool)
+        if filters is None:
+            return mask
+        if filters.category:
+            hits = pd.Series(self.categories, dtype=object).str.contains(
+                filters.category, case=False, na=False
+            ).to_numpy(dtype=bool)
+            mask &= self._category_lookup(hits)
+        if filters.tags:
+            mask &= self.has_any_tag(filters.tags)
+        if filters.rating_min is not None:
+            mask &= np.nan_to_num(self.rating, nan=0.0) >= float(filters.rating_min)
+        if filters.price_level is not None:
+            mask &= np.nan_to_num(self.price_level, nan=0.0) <= int(filters.price_level)
+        return mask
+
+    def category_in(self, names: Iterable[str]) -> np.ndarray:
+        wanted = set(names)
+        hits = np.fromiter(
+            (c in wanted for c in self.categories), dtype=bool, count=len(self.categories)
+        )
+        return self._category_lookup(hits)
+
+    def has_any_tag(self, tags: Iterable[str]) -> np.ndarray:
+        wanted = [self.tag_vocab[t] for t in set(tags) if t in self.tag_vocab]
+        mask = np.zeros(len(self), dtype=bool)
+        if not wanted:
+            return mask
+        owners = np.repeat(np.arange(len(self)), np.diff(self.tag_offsets))
+        mask[owners[np.isin(self.tag_codes, wanted)]] = True
+        return mask
+
+    def _category_lookup(self, hits_per_category: np.ndarray) -> np.ndarray:
+        # code -1 marks a missing category, which never matches
+        padded = np.append(hits_per_category, False)
+        return padded[self.category_codes]
+
+
+def _float_column(df: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+
+
+@lru_cache(maxsize=2)
+def _features_for_version(version: str) -> PoiFeatures:
+    return PoiFeatures.from_columns(deps.current_catalogue().columns)
+
+
+def get_poi_features() -> PoiFeatures:
+    return _features_for_version(deps.get_catalogue_version())
+
+
+def score_candidates(
+    features: PoiFeatures,
+    idx: np.ndarray,
+    similarities: np.ndarray,
+    categories: Sequence[str],
+    location: Optional[Location],
+    budget: Optional[str],
+    weights: Sequence[float],
+    radius_km: float = 0.0,
+) -> np.ndarray:
+    """Weighted multi-factor score for the POIs at positions ``idx``.
+
+    With a positive ``radius_km`` the distance score decays linearly to zero
+    at the radius, so it does not depend on which other POIs are scored.
+    """
+    n = len(idx)
+    category_scores = np.where(features.category_in(categories)[idx], 1.0, 0.3)
+
+    if location is not None:
+        distances = haversine_km_array(
+            (location.lat, location.lng), features.lat[idx], features.lng[idx]
+        )
+        if radius_km > 0:
+            distance_scores = 1 - np.clip(distances / radius_km, 0.0, 1.0)
+        else:
+            distance_scores = 1 - normalize_array(distances)
+    else:
+        distance_scores = np.full(n, 0.5)
+
+    if budget:
+        target = BUDGET_TARGETS.get(str(budget).lower(), 2)
+        price = features.price_level[idx]
+        # unknown and free (0) price levels count as mid-range
+        price = np.where(np.isnan(price) | (price == 0), 2.0, price)
+        price_scores = 1 - np.abs(price - target) / 4
+    else:
+        price_scores = np.full(n, 0.5)
+
+    rating_scores = normalize_array(np.nan_to_num(features.rating[idx], nan=3.5))
+
+    return (
+        weights[0] * similarities
+        + weights[1] * category_scores
+        + weights[2] * distance_scores
+        + weights[3] * price_scores
+        + weights[4] * rating_scores
+    )
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` best scores, best first, ties by position."""
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(len(scores))
+    order = np.lexsort((part, -scores[part]))
+    return part[order]
+
+
+__all__ = ["PoiFeatures", "get_poi_features", "score_candidates", "top_k"]
@@ -0,0 +1,154 @@
+"""Uniform grid over projected POI coordinates for radius and k-NN queries."""
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from .. import deps
+from ..config import get_settings
+from .scoring import get_poi_features
+from .utils import EARTH_RADIUS_KM, haversine_km_array
+
+
+class GridIndex:
+    """Buckets points into square cells of an equirectangular projection.
+
+    Candidate cells are gathered from the grid and exact haversine
+    distances are computed only for the points inside them.
+    """
+
+    def __init__(self, lat: np.ndarray, lng: np.ndarray, cell_km: float = 1.0):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.cell_km = max(cell_km, 0.05)
+        valid = np.isfinite(self.lat) & np.isfinite(self.lng)
+        positions = np.flatnonzero(valid)
+        self._cells: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        self._order = np.zeros(0, dtype=np.int64)
+        self._ref_cos = 1.0
+        # projected x shrinks away from the reference latitude; keep queries conservative
+        self._scale = 1.0
+        self._bounds = (0, 0, 0, 0)
+        if positions.size == 0:
+            return
+        lats = self.lat[positions]
+        self._ref_cos = math.cos(math.radians(float(lats.mean())))
+        extreme_cos = min(math.cos(math.radians(float(v))) for v in (lats.min(), lats.max()))
+        self._scale = min(1.0, extreme_cos / max(self._ref_cos, 1e-9))
+        cx, cy = self._cell_coords(lats, self.lng[positions])
+        cells, inverse, counts = np.unique(
+            np.stack([cx, cy], axis=1), axis=0, return_inverse=True, return_counts=True
+        )
+        self._order = positions[np.argsort(inverse.ravel(), kind="stable")]
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        spans = zip(offsets[:-1].tolist(), offsets[1:].tolist())
+        for (x, y), span in zip(cells.tolist(), spans):
+            self._cells[(x, y)] = span
+        self._bounds = (
+            int(cells[:, 0].min()),
+            int(cells[:, 0].max()),
+            int(cells[:, 1].min()),
+            int(cells[:, 1].max()),
+        )
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def within(self, lat: float, lng: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions within ``radius_km`` of the point and their distances."""
+        if not self._cells or radius_km < 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        cx, cy = self._cell_of(lat, lng)
+        rings = min(self._rings_for(radius_km), self._max_ring(cx, cy))
+        candidates = self._gather(cx, cy, 0, rings)
+        distances = haversine_km_array((lat, lng), self.lat[candidates], self.lng[candidates])
+        keep = distances <= radius_km
+        return candidates[keep], distances[keep]
+
+    def nearest(self, lat: float, lng: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """The ``k`` closest positions, nearest first, with their distances."""
+        if not self._cells or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        cx, cy = self._cell_of(lat, lng)
+        max_ring = self._max_ring(cx, cy)
+        ring = self._min_ring(cx, cy)
+        candidates = self._gather(cx, cy, ring, ring)
+        while len(candidates) < k and ring < max_ring:
+            ring += 1
+            candidates = np.concatenate([candidates, self._gather(cx, cy, ring, ring)])
+        distances = haversine_km_array((lat, lng), self.lat[candidates], self.lng[candidates])
+        take = min(k, len(candidates))
+        kth = np.partition(distances, take - 1)[take - 1]
+        # closer points can only sit in cells up to the k-th distance away
+        needed = min(self._rings_for(kth), max_ring)
+        if needed > ring:
+            extra = self._gather(cx, cy, ring + 1, needed)
+            candidates = np.concatenate([candidates, extra])
+            distances = np.concatenate(
+                [distances, haversine_km_array((lat, lng), self.lat[extra], self.lng[extra])]
+            )
+        part = np.argpartition(distances, take - 1)[:take]
+        order = part[np.argsort(distances[part], kind="stable")]
+        return candidates[order], distances[order]
+
+    def _cell_of(self, lat: float, lng: float) -> Tuple[int, int]:
+        cx, cy = self._cell_coords(np.array([lat]), np.array([lng]))
+        return int(cx[0]), int(cy[0])
+
+    def _cell_coords(self, lat: np.ndarray, lng: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        y = np.radians(lat) * EARTH_RADIUS_KM
+        x = np.radians(lng) * EARTH_RADIUS_KM * self._ref_cos
+        return (
+            np.floor(x / self.cell_km).astype(np.int64),
+            np.floor(y / self.cell_km).astype(np.int64),
+        )
+
+    def _rings_for(self, distance_km: float) -> int:
+        return int(math.ceil(distance_km / (self.cell_km * self._scale)))
+
+    def _min_ring(self, cx: int, cy: int) -> int:
+        min_x, max_x, min_y, max_y = self._bounds
+        return max(0, min_x - cx, cx - max_x, min_y - cy, cy - max_y)
+
+    def _max_ring(self, cx: int, cy: int) -> int:
+        min_x, max_x, min_y, max_y = self._bounds
+        return max(abs(cx - min_x), abs(max_x - cx), abs(cy - min_y), abs(max_y - cy))
+
+    def _gather(self, cx: int, cy: int, lo: int, hi: int) -> np.ndarray:
+        """Positions in cells whose ring (Chebyshev cell distance) is in [lo, hi]."""
+        spans = list(self._spans(cx, cy, lo, hi))
+        if not spans:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([self._order[start:end] for start, end in spans])
+
+    def _spans(self, cx: int, cy: int, lo: int, hi: int) -> Iterator[Tuple[int, int]]:
+        cells = self._cells
+        probes = (2 * hi + 1) ** 2 - max(2 * lo - 1, 0) ** 2
+        if probes > len(cells):
+            # far or wide queries: scanning occupied cells beats probing empty ones
+            for (x, y), span in cells.items():
+                if lo <= max(abs(x - cx), abs(y - cy)) <= hi:
+                    yield span
+            return
+        for dx in range(-hi, hi + 1):
+            for dy in range(-hi, hi + 1):
+                if max(abs(dx), abs(dy)) >= lo:
+                    span = cells.get((cx + dx, cy + dy))
+                    if span:
+                        yield span
+
+
+@lru_cache(maxsize=2)
+def _index_for_version(version: str, cell_km: float) -> GridIndex:
+    features = get_poi_features()
+    return GridIndex(features.lat, features.lng, cell_km)
+
+
+def get_spatial_index() -> GridIndex:
+    return _index_for_version(deps.get_catalogue_version(), get_settings().spatial_cell_km)
+
+
+__all__ = ["GridIndex", "get_spatial_index"]
@@ -0,0 +1,243 @@
+"""Pairwise travel times from OSRM, cached per coordinate pair and time of day."""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+
+from ..config import Settings
+from .cache import TTLCache
+from .utils import pairwise_km
+
+logger = logging.getLogger(__name__)
+
+Coord = Tuple[float, float]
+Leg = Tuple[float, float]  # (minutes, km)
+
+OSRM_TIMEOUT_SECONDS = 2.0
+# after a failed table request OSRM is skipped for this long, so callers do
+# not each wait out the timeout while it is down
+OSRM_RETRY_SECONDS = 30.0
+
+
+@dataclass
+class TravelMatrix:
+    """``durations[i, j]`` in minutes (NaN where OSRM gave no answer) and
+    ``distances[i, j]`` in km (haversine where OSRM gave no answer)."""
+
+    durations: np.ndarray
+    distances: np.ndarray
+
+    @property
+    def known(self) -> np.ndarray:
+        return ~np.isnan(self.durations)
+
+
+@dataclass
+class _Lookup:
+    points: List[Coord]  # rounded
+    bucket: int
+    durations: np.ndarray
+    distances: np.ndarray
+    missing: List[Tuple[int, int]]
+
+
+@dataclass
+class _TableRequest:
+    points: List[Coord]
+    sources: List[int]
+    destinations: List[int]
+
+
+class TravelMatrixService:
+    """Shared OSRM table client for /travel-time and itinerary routing.
+
+    Durations and distances are cached per ordered pair of coordinates
+    (rounded to ``TRAVEL_CACHE_PRECISION`` decimals) and time-of-day bucket.
+    A matrix request sends a single OSRM table call covering only the points
+    with uncached pairs (``sources``/``destinations`` restricted to them), over
+    pooled keep-alive connections.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._cache = TTLCache(settings.travel_cache_size, settings.travel_cache_ttl_seconds)
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._client_lock = threading.Lock()
+        self._down_until = 0.0
+        self._table_requests = 0
+        self._table_failures = 0
+        self._pairs_fetched = 0
+
+    def matrix(
+        self,
+        coords: Sequence[Coord],
+        minute_of_day: float = 9 * 60,
+        pairs: Optional[Iterable[Tuple[int, int]]] = None,
+    ) -> TravelMatrix:
+        """Travel between ``coords`` starting around ``minute_of_day``; with
+        ``pairs`` only those ``(i, j)`` entries are filled in."""
+        lookup = self._lookup(coords, minute_of_day, pairs)
+        request = self._table_request(lookup)
+        if request is not None:
+            self._fill(lookup, request, self._fetch(request))
+        return self._result(coords, lookup)
+
+    async def matrix_async(
+        self,
+        coords: Sequence[Coord],
+        minute_of_day: float = 9 * 60,
+        pairs: Optional[Iterable[Tuple[int, int]]] = None,
+    ) -> TravelMatrix:
+        lookup = self._lookup(coords, minute_of_day, pairs)
+        request = self._table_request(lookup)
+        if request is not None:
+            self._fill(lookup, request, await self._fetch_async(request))
+        return self._result(coords, lookup)
+
+    def close(self) -> None:
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            **self._cache.stats(),
+            "table_requests": self._table_requests,
+            "table_failures": self._table_failures,
+            "pairs_fetched": self._pairs_fetched,
+            "osrm_backoff": time.monotonic() < self._down_until,
+        }
+
+    def _lookup(
+        self,
+        coords: Sequence[Coord],
+        minute_of_day: float,
+        pairs: Optional[Iterable[Tuple[int, int]]],
+    ) -> _Lookup:
+        digits = self.settings.travel_cache_precision
+        points = [(round(float(lat), digits), round(float(lng), digits)) for lat, lng in coords]
+        width = self.settings.travel_bucket_minutes
+        bucket = int(minute_of_day % (24 * 60) // width) if width > 0 else 0
+        n = len(points)
+        durations = np.full((n, n), np.nan)
+        distances = np.full((n, n), np.nan)
+        np.fill_diagonal(durations, 0.0)
+        np.fill_diagonal(distances, 0.0)
+        if pairs is None:
+            pairs = ((i, j) for i in range(n) for j in range(n))
+        missing = []
+        for i, j in pairs:
+            if i == j:
+                continue
+            leg = self._cache.get((points[i], points[j], bucket))
+            if leg is None:
+                missing.append((i, j))
+            else:
+                durations[i, j], distances[i, j] = leg
+        return _Lookup(points, bucket, durations, distances, missing)
+
+    def _table_request(self, lookup: _Lookup) -> Optional[_TableRequest]:
+        if not lookup.missing or time.monotonic() < self._down_until:
+            return None
+        sources = list(dict.fromkeys(lookup.points[i] for i, _ in lookup.missing))
+        destinations = list(dict.fromkeys(lookup.points[j] for _, j in lookup.missing))
+        points = list(dict.fromkeys(sources + destinations))
+        position = {point: pos for pos, point in enumerate(points)}
+        # in point order, so an all-pairs table can use OSRM's default
+        return _TableRequest(
+            points,
+            sorted(position[point] for point in sources),
+            sorted(position[point] for point in destinations),
+        )
+
+    def _url(self, request: _TableRequest) -> str:
+        coords = ";".join(f"{lng},{lat}" for lat, lng in request.points)
+        params = "annotations=duration,distance"
+        # OSRM defaults to every point in point order; anything else, including
+        # all points in another order, has to be spelled out
+        every = list(range(len(request.points)))
+        if request.sources != every:
+            params += "&sources=" + ";".join(map(str, request.sources))
+        if request.destinations != every:
+            params += "&destinations=" + ";".join(map(str, request.destinations))
+        return f"{self.settings.osrm_url}/table/v1/driving/{coords}?{params}"
+
+    def _fetch(self, request: _TableRequest) -> Optional[dict]:
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(timeout=OSRM_TIMEOUT_SECONDS)
+            client = self._client
+        self._table_requests += 1
+        try:
+            res = client.get(self._url(request))
+            res.raise_for_status()
+            return res.json()
+        except Exception as exc:  # noqa: BLE001
+            self._failed(exc)
+            return None
+
+    async def _fetch_async(self, request: _TableRequest) -> Optional[dict]:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(timeout=OSRM_TIMEOUT_SECONDS)
+        self._table_requests += 1
+        try:
+            res = await self._async_client.get(self._url(request))
+            res.raise_for_status()
+            return res.json()
+        except Exception as exc:  # noqa: BLE001
+            self._failed(exc)
+            return None
+
+    def _failed(self, exc: Exception) -> None:
+        logger.debug("OSRM table unavailable: %s", exc)
+        self._table_failures += 1
+        self._down_until = time.monotonic() + OSRM_RETRY_SECONDS
+
+    def _fill(self, lookup: _Lookup, request: _TableRequest, data: Optional[dict]) -> None:
+        """Cache every pair in the table, then fill the lookup's gaps from it."""
+        durations = (data or {}).get("durations")
+        distances = (data or {}).get("distances")
+        if not durations or not distances:
+            return
+        fetched: Dict[Tuple[Coord, Coord], Leg] = {}
+        for row, source in enumerate(request.sources):
+            for col, destination in enumerate(request.destinations):
+                try:
+                    seconds, meters = durations[row][col], distances[row][col]
+                except (IndexError, TypeError):
+                    continue
+                if seconds is None or meters is None:
+                    continue
+                pair = (request.points[source], request.points[destination])
+                fetched[pair] = (float(seconds) / 60, float(meters) / 1000)
+                self._cache.set((*pair, lookup.bucket), fetched[pair])
+        self._pairs_fetched += len(fetched)
+        for i, j in lookup.missing:
+            leg = fetched.get((lookup.points[i], lookup.points[j]))
+            if leg is not None:
+                lookup.durations[i, j], lookup.distances[i, j] = leg
+
+    def _result(self, coords: Sequence[Coord], lookup: _Lookup) -> TravelMatrix:
+        distances = lookup.distances
+        if np.isnan(distances).any():
+            lats = np.array([lat for lat, _ in coords], dtype=np.float64)
+            lngs = np.array([lng for _, lng in coords], dtype=np.float64)
+            distances = np.where(np.isnan(distances), pairwise_km(lats, lngs), distances)
+        return TravelMatrix(lookup.durations, distances)
+
+
+__all__ = ["TravelMatrix", "TravelMatrixService"]
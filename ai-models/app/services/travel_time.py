@@ -2,66 +2,75 @@
 from __future__ import annotations
 
 import logging
-from typing import List
-
-import requests
+from typing import List, Optional, Tuple
 
 from ..config import Settings
 from ..schemas import Location, TravelTimeResponse
+from .poi_matrix import PoiTravelMatrix, get_poi_matrix
+from .travel_matrix import TravelMatrix, TravelMatrixService
 from .utils import duration_minutes, haversine_km
 
 logger = logging.getLogger(__name__)
 
 
 class TravelTimeService:
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, travel_matrix: TravelMatrixService):
         self.settings = settings
-
-    def _coords_to_osrm(self, coords: List[Location]) -> str:
-        return ";".join(f"{c.lng},{c.lat}" for c in coords)
-
-    def _osrm_table(self, coords: List[Location]) -> tuple[list[list[float]], list[list[float]]] | None:
-        url = f"{self.settings.osrm_url}/table/v1/driving/{self._coords_to_osrm(coords)}?annotations=distance,duration"
-        try:
-            res = requests.get(url, timeout=2)
-            res.raise_for_status()
-            data = res.json()
-            durations = data.get("durations")
-            distances = data.get("distances")
-            if not durations or not distances:
-                return None
-            return durations, distances
-        except Exception as exc:  # noqa: BLE001
-            logger.debug("OSRM table unavailable: %s", exc)
-            return None
+        self.travel_matrix = travel_matrix
 
     def estimate(self, coords: List[Location]) -> TravelTimeResponse:
         if len(coords) < 2:
             return TravelTimeResponse(legs=[], total_distance_km=0, total_duration_min=0)
-        osrm_tables = self._osrm_table(coords)
+        matrix, rows, online = self._plan(coords)
+        road = self.travel_matrix.matrix(_points(coords), pairs=online) if online else None
+        return self._legs(coords, matrix, rows, road)
+
+    async def estimate_async(self, coords: List[Location]) -> TravelTimeResponse:
+        if len(coords) < 2:
+            return TravelTimeResponse(legs=[], total_distance_km=0, total_duration_min=0)
+        matrix, rows, online = self._plan(coords)
+        road = None
+        if online:
+            road = await self.travel_matrix.matrix_async(_points(coords), pairs=online)
+        return self._legs(coords, matrix, rows, road)
+
+    def _plan(
+        self, coords: List[Location]
+    ) -> Tuple[Optional[PoiTravelMatrix], List[Optional[int]], List[Tuple[int, int]]]:
+        """Catalogue ordinals of ``coords`` (via the precomputed matrix) and
+        the consecutive legs that still need an online lookup."""
+        matrix = get_poi_matrix()
+        rows = [matrix.row_at(c.lat, c.lng) if matrix is not None else None for c in coords]
+        online = [
+            (idx, idx + 1)
+            for idx in range(len(coords) - 1)
+            if rows[idx] is None or rows[idx + 1] is None
+        ]
+        return matrix, rows, online
+
+    def _legs(
+        self,
+        coords: List[Location],
+        matrix: Optional[PoiTravelMatrix],
+        rows: List[Optional[int]],
+        road: Optional[TravelMatrix],
+    ) -> TravelTimeResponse:
         legs = []
         total_distance = 0.0
         total_duration = 0.0
         for idx in range(len(coords) - 1):
             origin = coords[idx]
             dest = coords[idx + 1]
-            if osrm_tables:
-                durations, distances = osrm_tables
-                try:
-                    raw_duration = durations[idx][idx + 1]
-                    raw_distance = distances[idx][idx + 1]
-                except (IndexError, TypeError):
-                    raw_duration = None
-                    raw_distance = None
-                if raw_duration is None or raw_distance is None:
-                    distance = haversine_km((origin.lat, origin.lng), (dest.lat, dest.lng))
-                    duration = duration_minutes(distance, hour=9 + idx)
-                else:
-                    duration = float(raw_duration) / 60  # seconds -> minutes
-                    distance = float(raw_distance) / 1000  # meters -> km
+            hour = 9 + idx
+            if matrix is not None and rows[idx] is not None and rows[idx + 1] is not None:
+                duration = float(matrix.layer(hour * 60)[rows[idx], rows[idx + 1]])
+                distance = float(matrix.distances[rows[idx], rows[idx + 1]])
+            elif road is not None and road.known[idx, idx + 1]:
+                duration = float(road.durations[idx, idx + 1])
+                distance = float(road.distances[idx, idx + 1])
             else:
                 distance = haversine_km((origin.lat, origin.lng), (dest.lat, dest.lng))
-                duration = duration_minutes(distance, hour=9 + idx)
+                duration = duration_minutes(distance, hour=hour)
             total_distance += distance
             total_duration += duration
             legs.append(
@@ -77,3 +86,7 @@ class TravelTimeService:
             total_distance_km=round(total_distance, 2),
             total_duration_min=round(total_duration, 1),
         )
+
+
+def _points(coords: List[Location]) -> List[Tuple[float, float]]:
+    return [(c.lat, c.lng) for c in coords]
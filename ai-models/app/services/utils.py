@@ -2,8 +2,11 @@
 from __future__ import annotations
 
 import math
+import time
 from dataclasses import dataclass
-from typing import Iterable, List, Sequence, Tuple
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 
 EARTH_RADIUS_KM = 6371.0
@@ -22,6 +25,18 @@ def haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
     return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
 
 
+def haversine_km_array(
+    origin: Tuple[float, float], lats: np.ndarray, lngs: np.ndarray
+) -> np.ndarray:
+    """Vectorised :func:`haversine_km` from one origin to many points."""
+    lat1, lon1 = np.radians(origin[0]), np.radians(origin[1])
+    phi2 = np.radians(lats)
+    dphi = phi2 - lat1
+    dlambda = np.radians(lngs) - lon1
+    h = np.sin(dphi / 2) ** 2 + np.cos(lat1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
 def normalize(values: Sequence[float]) -> List[float]:
     if not values:
         return []
@@ -31,6 +46,17 @@ def normalize(values: Sequence[float]) -> List[float]:
     return [(v - vmin) / (vmax - vmin) for v in values]
 
 
+def normalize_array(values: np.ndarray) -> np.ndarray:
+    """Array counterpart of :func:`normalize`."""
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return values
+    vmin, vmax = values.min(), values.max()
+    if math.isclose(vmin, vmax):
+        return np.full(values.shape, 0.5)
+    return (values - vmin) / (vmax - vmin)
+
+
 def speed_for_hour(hour: int) -> float:
     """Return km/h heuristic for Mumbai traffic."""
     if 7 <= hour < 10:
@@ -42,9 +68,14 @@ def speed_for_hour(hour: int) -> float:
     return 30
 
 
+def speed_at_minute(minute_of_day: float) -> float:
+    """km/h used for travel estimates departing ``minute_of_day``; the
+    travel-matrix build and the online fallbacks must agree on it."""
+    return max(speed_for_hour(int(minute_of_day // 60) % 24), 5)
+
+
 def duration_minutes(distance_km: float, hour: int) -> float:
-    speed = speed_for_hour(hour)
-    return (distance_km / max(speed, 5)) * 60
+    return distance_km / speed_at_minute(hour * 60) * 60
 
 
 def two_opt(route: List[int], distance_matrix: List[List[float]]) -> List[int]:
@@ -72,6 +103,335 @@ def total_distance(route: Sequence[int], distance_matrix: List[List[float]]) ->
     return sum(distance_matrix[route[i]][route[i + 1]] for i in range(len(route) - 1))
 
 
+def pairwise_km(
+    lats: np.ndarray,
+    lngs: np.ndarray,
+    to_lats: Optional[np.ndarray] = None,
+    to_lngs: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Haversine distance matrix between all pairs of points, or from each
+    point to each of ``to_lats``/``to_lngs``."""
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lngs = np.radians(np.asarray(lngs, dtype=np.float64))
+    to_lats = lats if to_lats is None else np.radians(np.asarray(to_lats, dtype=np.float64))
+    to_lngs = lngs if to_lngs is None else np.radians(np.asarray(to_lngs, dtype=np.float64))
+    dphi = lats[:, None] - to_lats[None, :]
+    dlambda = lngs[:, None] - to_lngs[None, :]
+    h = (
+        np.sin(dphi / 2) ** 2
+        + np.cos(lats)[:, None] * np.cos(to_lats)[None, :] * np.sin(dlambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def balanced_kmeans(
+    lats: np.ndarray,
+    lngs: np.ndarray,
+    k: int,
+    capacity: int,
+    iterations: int = 25,
+    seed: int = 0,
+) -> np.ndarray:
+    """Cluster points into ``k`` spatial groups of at most ``capacity`` each.
+
+    Lloyd's k-means (k-means++ seeding) on an equirectangular projection,
+    then overfull clusters hand the points that are cheapest to move to the
+    nearest cluster with room. Returns one label per point.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    n = len(lats)
+    k = max(1, min(k, n))
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    capacity = max(capacity, -(-n // k))
+    points = np.column_stack([lngs * math.cos(math.radians(float(lats.mean()))), lats])
+    rng = np.random.default_rng(seed)
+    centroids = [points[rng.integers(n)]]
+    for _ in range(1, k):
+        gaps = ((points[:, None, :] - np.asarray(centroids)[None]) ** 2).sum(axis=2).min(axis=1)
+        total = gaps.sum()
+        pick = rng.choice(n, p=gaps / total) if total > 0 else rng.integers(n)
+        centroids.append(points[pick])
+    centroids = np.asarray(centroids)
+    labels = np.zeros(n, dtype=np.int64)
+    for _ in range(iterations):
+        distances = ((points[:, None, :] - centroids[None]) ** 2).sum(axis=2)
+        new_labels = distances.argmin(axis=1)
+        for cluster in range(k):
+            members = points[new_labels == cluster]
+            if len(members):
+                centroids[cluster] = members.mean(axis=0)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    distances = ((points[:, None, :] - centroids[None]) ** 2).sum(axis=2)
+    sizes = np.bincount(labels, minlength=k)
+    while sizes.max() > capacity:
+        full = int(sizes.argmax())
+        members = np.flatnonzero(labels == full)
+        room = np.flatnonzero(sizes < capacity)
+        extra = distances[np.ix_(members, room)] - distances[members, full][:, None]
+        member, target = np.unravel_index(int(extra.argmin()), extra.shape)
+        labels[members[member]] = room[target]
+        sizes[full] -= 1
+        sizes[room[target]] += 1
+    return labels
+
+
+@dataclass
+class RoutePlan:
+    """Result of :func:`optimize_route`; stop indices refer to the input arrays."""
+
+    order: List[int]
+    starts: List[float]
+    dropped: List[int]
+    travel_minutes: float
+    finish: float
+    # minutes past time windows and the end of the day; 0 when feasible
+    lateness: float
+    iterations: int
+
+    @property
+    def feasible(self) -> bool:
+        return self.lateness <= _EPS
+
+
+_EPS = 1e-6
+# improving moves verified exactly per pass before giving up on a neighbourhood
+_CANDIDATES_PER_PASS = 8
+
+
+def optimize_route(
+    travel: np.ndarray,
+    origin_travel: np.ndarray,
+    dwell: Sequence[float],
+    start: float,
+    end: float,
+    windows: Optional[np.ndarray] = None,
+    mandatory: Iterable[int] = (),
+    time_budget_ms: float = 25.0,
+    max_iterations: int = 500,
+) -> RoutePlan:
+    """Order stops for a one-way day trip with time windows (TSPTW heuristic).
+
+    ``travel[i, j]`` is the time from stop ``i`` to ``j`` and
+    ``origin_travel[i]`` from the starting point to ``i``; ``windows[i]`` is
+    the ``(earliest, latest)`` visit start (waiting for ``earliest`` is
+    allowed). A window-aware nearest-neighbour tour is improved with 2-opt
+    and Or-opt moves whose travel delta is computed in O(1) from the matrix
+    (vectorised over all moves), then checked against the schedule. Routes
+    compare by lateness first, then travel. While the route is late the
+    optional stop whose removal helps most is dropped; ``mandatory`` stops
+    are never dropped. Search stops after ``time_budget_ms`` or
+    ``max_iterations`` improving moves.
+    """
+    problem = _RouteProblem(travel, origin_travel, dwell, start, end, windows)
+    deadline = time.perf_counter() + time_budget_ms / 1000
+    required = set(mandatory)
+    order = problem.construct()
+    dropped: List[int] = []
+    iterations = 0
+    while True:
+        order, iterations = problem.improve(order, deadline, max_iterations, iterations)
+        lateness = problem.evaluate(order)[0]
+        if lateness <= _EPS:
+            break
+        victim = problem.drop_candidate(order, required)
+        if victim is None:
+            break
+        order = [stop for stop in order if stop != victim]
+        dropped.append(victim)
+    lateness, travel_total, starts, finish = problem.schedule(order)
+    return RoutePlan(order, starts, dropped, travel_total, finish, lateness, iterations)
+
+
+class _RouteProblem:
+    def __init__(self, travel, origin_travel, dwell, start, end, windows):
+        self.travel = np.asarray(travel, dtype=np.float64)
+        self.origin = np.asarray(origin_travel, dtype=np.float64)
+        self.dwell = np.asarray(dwell, dtype=np.float64)
+        n = len(self.dwell)
+        if windows is None:
+            windows = np.column_stack([np.full(n, -np.inf), np.full(n, np.inf)])
+        self.earliest = np.asarray(windows, dtype=np.float64)[:, 0]
+        self.latest = np.asarray(windows, dtype=np.float64)[:, 1]
+        self.start = float(start)
+        self.end = float(end)
+
+    def schedule(self, order: Sequence[int]) -> Tuple[float, float, List[float], float]:
+        """``(lateness, travel, visit starts, finish)`` of visiting ``order``."""
+        clock = self.start
+        lateness = 0.0
+        travel = 0.0
+        starts: List[float] = []
+        prev = -1
+        for stop in order:
+            leg = self.origin[stop] if prev < 0 else self.travel[prev, stop]
+            travel += leg
+            begin = max(clock + leg, self.earliest[stop])
+            lateness += max(0.0, begin - self.latest[stop])
+            starts.append(begin)
+            clock = begin + self.dwell[stop]
+            prev = stop
+        lateness += max(0.0, clock - self.end)
+        return lateness, travel, starts, clock
+
+    def evaluate(self, order: Sequence[int]) -> Tuple[float, float]:
+        lateness, travel, _, _ = self.schedule(order)
+        return round(lateness, 6), travel
+
+    def construct(self) -> List[int]:
+        """Next stop = the one that can start soonest, preferring those on time."""
+        remaining = np.ones(len(self.dwell), dtype=bool)
+        order: List[int] = []
+        clock = self.start
+        legs = self.origin
+        while remaining.any():
+            begin = np.maximum(clock + legs, self.earliest)
+            late = np.maximum(0.0, begin - self.latest)
+            # argmin over the remaining stops only: a closed stop's key is inf
+            candidates = np.flatnonzero(remaining)
+            key = late[candidates] * 1e6 + begin[candidates] + legs[candidates] * _EPS
+            stop = int(candidates[np.argmin(key)])
+            order.append(stop)
+            remaining[stop] = False
+            clock = begin[stop] + self.dwell[stop]
+            legs = self.travel[stop]
+        return order
+
+    def improve(
+        self, order: List[int], deadline: float, max_iterations: int, iterations: int
+    ) -> Tuple[List[int], int]:
+        best = self.evaluate(order)
+        while iterations < max_iterations and time.perf_counter() < deadline:
+            for moves in (self._two_opt_moves, self._or_opt_moves, self._late_moves):
+                candidate = self._first_better(moves(order), best, deadline)
+                if candidate is not None:
+                    order, best = candidate
+                    iterations += 1
+                    break
+            else:
+                break
+        return order, iterations
+
+    def _first_better(self, candidates, best, deadline):
+        for order in candidates:
+            if time.perf_counter() >= deadline:
+                return None
+            score = self.evaluate(order)
+            if _better(score, best):
+                return order, score
+        return None
+
+    def _leg_costs(self, order: Sequence[int]) -> np.ndarray:
+        """Cost of the leg arriving at each position."""
+        idx = np.asarray(order, dtype=np.int64)
+        costs = np.empty(len(idx))
+        if len(idx):
+            costs[0] = self.origin[idx[0]]
+            costs[1:] = self.travel[idx[:-1], idx[1:]]
+        return costs
+
+    def _two_opt_moves(self, order: List[int]):
+        m = len(order)
+        if m < 2:
+            return
+        idx = np.asarray(order, dtype=np.int64)
+        legs = self._leg_costs(order)
+        i, j = np.triu_indices(m, 1)
+        before_i = idx[np.maximum(i - 1, 0)]
+        into_j = np.where(i == 0, self.origin[idx[j]], self.travel[before_i, idx[j]])
+        has_next = j + 1 < m
+        nxt = idx[np.minimum(j + 1, m - 1)]
+        out_i = np.where(has_next, self.travel[idx[i], nxt], 0.0)
+        old = legs[i] + np.where(has_next, legs[np.minimum(j + 1, m - 1)], 0.0)
+        delta = into_j + out_i - old
+        for pos in np.argsort(delta)[:_CANDIDATES_PER_PASS]:
+            if delta[pos] >= -_EPS:
+                return
+            a, b = int(i[pos]), int(j[pos])
+            yield order[:a] + order[a : b + 1][::-1] + order[b + 1 :]
+
+    def _or_opt_moves(self, order: List[int]):
+        m = len(order)
+        moves = []
+        for length in (1, 2, 3):
+            for first in range(0, m - length + 1):
+                segment = order[first : first + length]
+                rest = order[:first] + order[first + length :]
+                if not rest:
+                    continue
+                head, tail = segment[0], segment[-1]
+                prev = rest[first - 1] if first > 0 else -1
+                nxt = rest[first] if first < len(rest) else -1
+                removed = self._edge(prev, head) + (self._edge(tail, nxt) if nxt >= 0 else 0.0)
+                removed -= self._edge(prev, nxt) if nxt >= 0 else 0.0
+                idx = np.asarray(rest, dtype=np.int64)
+                into = np.concatenate([[self.origin[head]], self.travel[idx, head]])
+                out = np.concatenate([self.travel[tail, idx], [0.0]])
+                legs = np.concatenate([self._leg_costs(rest), [0.0]])
+                delta = into + out - legs - removed
+                delta[first] = np.inf  # putting it back where it was
+                at = int(np.argmin(delta))
+                if delta[at] < -_EPS:
+                    moves.append((float(delta[at]), rest[:at] + segment + rest[at:]))
+        moves.sort(key=lambda move: move[0])
+        for _, candidate in moves[:_CANDIDATES_PER_PASS]:
+            yield candidate
+
+    def _late_moves(self, order: List[int]):
+        """Pull the first late stop earlier, wherever that helps most."""
+        _, _, starts, _ = self.schedule(order)
+        late = [pos for pos, stop in enumerate(order) if starts[pos] - self.latest[stop] > _EPS]
+        if not late:
+            return
+        pos = late[0]
+        stop = order[pos]
+        rest = order[:pos] + order[pos + 1 :]
+        for at in range(pos):
+            yield rest[:at] + [stop] + rest[at:]
+
+    def drop_candidate(self, order: List[int], required: set) -> Optional[int]:
+        """Optional stop to drop from a late route: the first late stop or one
+        of the stops before it that costs the most time, whichever helps most."""
+        _, _, starts, _ = self.schedule(order)
+        late = [pos for pos, stop in enumerate(order) if starts[pos] - self.latest[stop] > _EPS]
+        upto = late[0] if late else len(order) - 1
+        costs = []
+        for pos in range(upto + 1):
+            stop = order[pos]
+            if stop in required:
+                continue
+            prev = order[pos - 1] if pos > 0 else -1
+            nxt = order[pos + 1] if pos + 1 < len(order) else -1
+            detour = self._edge(prev, stop)
+            if nxt >= 0:
+                detour += self._edge(stop, nxt) - self._edge(prev, nxt)
+            costs.append((detour + self.dwell[stop], pos, stop))
+        costs.sort(reverse=True)
+        candidates = [stop for _, pos, stop in costs if pos == upto]
+        candidates += [stop for _, _, stop in costs[:3]]
+        best_stop, best_score = None, None
+        for stop in dict.fromkeys(candidates):
+            score = self.evaluate([other for other in order if other != stop])
+            if best_score is None or _better(score, best_score):
+                best_stop, best_score = stop, score
+        return best_stop
+
+    def _edge(self, a: int, b: int) -> float:
+        return float(self.origin[b] if a < 0 else self.travel[a, b])
+
+
+def _better(score: Tuple[float, float], best: Tuple[float, float]) -> bool:
+    """Less lateness, or as late with less travel (ignoring float noise)."""
+    if score[0] < best[0] - _EPS:
+        return True
+    # ``==`` first: two stops that can never fit are both infinitely late
+    same = score[0] == best[0] or abs(score[0] - best[0]) <= _EPS
+    return same and score[1] < best[1] - _EPS
+
+
 @dataclass
 class Poi:
     id: str
@@ -0,0 +1,159 @@
+"""Vector indexes over the unit-normalised POI embedding matrix."""
+from __future__ import annotations
+
+import logging
+import math
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from ..config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(len(scores))
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class FlatIndex:
+    """Exact inner-product search over every row."""
+
+    kind = "flat"
+
+    def __init__(self, matrix: np.ndarray):
+        self.matrix = matrix
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.matrix @ query
+        ids = _top(scores, k)
+        return ids, scores[ids]
+
+
+class IVFIndex:
+    """Inverted-file index: spherical k-means lists, probed nearest-first.
+
+    ``order`` holds row ids grouped by list; list ``c`` spans
+    ``order[offsets[c]:offsets[c + 1]]``.
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        centroids: np.ndarray,
+        order: np.ndarray,
+        offsets: np.ndarray,
+        nprobe: int,
+    ):
+        self.matrix = matrix
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.nprobe = max(1, min(nprobe, len(centroids)))
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @classmethod
+    def build(
+        cls,
+        matrix: np.ndarray,
+        nlist: int,
+        nprobe: int,
+        iterations: int = 15,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        n = matrix.shape[0]
+        nlist = max(1, min(nlist, n))
+        rng = np.random.default_rng(seed)
+        data = np.asarray(matrix, dtype=np.float32)
+        centroids = data[rng.choice(n, nlist, replace=False)].copy()
+        assign = np.zeros(n, dtype=np.int64)
+        for _ in range(iterations):
+            assign = _assign(data, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, data)
+            counts = np.bincount(assign, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = data[rng.choice(n, int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.divide(sums, norms, out=np.zeros_like(sums), where=norms > 0)
+        assign = _assign(data, centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=nlist), out=offsets[1:])
+        return cls(matrix, centroids, order, offsets, nprobe)
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        probes = _top(self.centroids @ query, self.nprobe)
+        candidates = np.concatenate(
+            [self.order[self.offsets[c] : self.offsets[c + 1]] for c in probes]
+        )
+        scores = self.matrix[candidates] @ query
+        best = _top(scores, k)
+        return candidates[best], scores[best]
+
+    def save(self, path: Path) -> None:
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as fh:
+            np.savez(fh, centroids=self.centroids, order=self.order, offsets=self.offsets)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, matrix: np.ndarray, nprobe: int) -> Optional["IVFIndex"]:
+        try:
+            with np.load(path) as data:
+                centroids, order, offsets = data["centroids"], data["order"], data["offsets"]
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Discarding unreadable IVF index %s: %s", path, exc)
+            return None
+        if len(order) != matrix.shape[0] or centroids.shape[1] != matrix.shape[1]:
+            return None
+        return cls(matrix, centroids, order, offsets, nprobe)
+
+
+def _assign(data: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    out = np.empty(data.shape[0], dtype=np.int64)
+    for start in range(0, data.shape[0], chunk):
+        out[start : start + chunk] = np.argmax(data[start : start + chunk] @ centroids.T, axis=1)
+    return out
+
+
+def build_vector_index(settings: Settings, matrix: np.ndarray, key: str):
+    """Return the index selected by ``VECTOR_INDEX`` for ``matrix``."""
+    kind = settings.vector_index.lower()
+    if kind == "flat" or matrix.shape[0] == 0 or matrix.shape[1] == 0:
+        return FlatIndex(matrix)
+    if kind != "ivf":
+        logger.warning("Unknown VECTOR_INDEX %r; using exact search", settings.vector_index)
+        return FlatIndex(matrix)
+    nlist = settings.ivf_nlist or max(1, int(math.sqrt(matrix.shape[0])))
+    path = settings.embed_cache_dir / f"ivf-{key}-{nlist}.npz"
+    if path.exists():
+        index = IVFIndex.load(path, matrix, settings.ivf_nprobe)
+        if index is not None:
+            return index
+    index = IVFIndex.build(matrix, nlist, settings.ivf_nprobe)
+    try:
+        index.save(path)
+    except OSError as exc:
+        logger.warning("Could not persist IVF index to %s: %s", path, exc)
+    logger.info("Built IVF index with %d lists over %d vectors", nlist, matrix.shape[0])
+    return index
+
+
+__all__ = ["FlatIndex", "IVFIndex", "build_vector_index"]
@@ -0,0 +1,81 @@
+"""Startup phase timing and readiness tracking."""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+WarmupStep = Tuple[str, Callable[[], object]]
+
+
+class StartupTracker:
+    """Records how long each startup phase took and whether warmup finished.
+
+    Liveness only needs the process to answer; readiness flips once every
+    warmup step has run, so orchestrators can hold traffic until models and
+    indexes are resident.
+    """
+
+    def __init__(self) -> None:
+        self._phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._error: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._phases[name] = round(seconds * 1000, 1)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.record(name, elapsed)
+            logger.info("Startup phase %s took %.1f ms", name, elapsed * 1000)
+
+    def warm_up(self, steps: Sequence[WarmupStep]) -> None:
+        try:
+            for name, step in steps:
+                with self.phase(name):
+                    step()
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Warmup failed")
+            with self._lock:
+                self._error = f"{type(exc).__name__}: {exc}"
+            return
+        self._ready.set()
+
+    def warm_up_in_background(self, steps: Sequence[WarmupStep]) -> None:
+        self._thread = threading.Thread(
+            target=self.warm_up, args=(steps,), name="warmup", daemon=True
+        )
+        self._thread.start()
+
+    def mark_ready(self) -> None:
+        self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def report(self) -> Dict[str, object]:
+        with self._lock:
+            phases = dict(self._phases)
+            error = self._error
+        return {
+            "ready": self.ready,
+            "phases_ms": phases,
+            "total_ms": round(sum(phases.values()), 1),
+            "error": error,
+        }
+
+
+__all__ = ["StartupTracker", "WarmupStep"]
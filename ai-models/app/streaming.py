@@ -0,0 +1,74 @@
+"""Server-sent event framing and latency tracking for streamed responses."""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict
+
+import numpy as np
+
+# recent streams kept for the latency percentiles
+TIMING_WINDOW = 1024
+
+
+def sse_event(event: str, data: object) -> str:
+    """One ``text/event-stream`` frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class StreamTimings:
+    """Time to first byte and total duration of recent streamed responses.
+
+    Both are measured from when the handler started, so time queued for an
+    endpoint slot counts; they are reported separately because the point
+    of streaming is that the first can be far below the second.
+    """
+
+    def __init__(self, window: int = TIMING_WINDOW):
+        self._ttfb: Deque[float] = deque(maxlen=window)
+        self._total: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._aborted = 0
+
+    async def timed(self, chunks: AsyncIterator[str], started: float) -> AsyncIterator[str]:
+        """Pass ``chunks`` through, recording when the first and last go out."""
+        first = None
+        finished = False
+        try:
+            async for chunk in chunks:
+                if first is None:
+                    first = time.perf_counter() - started
+                yield chunk
+            finished = True
+        finally:
+            total = time.perf_counter() - started
+            with self._lock:
+                if first is not None:
+                    self._ttfb.append(first)
+                if finished:
+                    self._total.append(total)
+                    self._completed += 1
+                else:
+                    self._aborted += 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "completed": self._completed,
+                "aborted": self._aborted,
+                "ttfb_ms": _percentiles(self._ttfb),
+                "total_ms": _percentiles(self._total),
+            }
+
+
+def _percentiles(samples: Deque[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    p50, p95, p99 = np.percentile(np.fromiter(samples, dtype=np.float64), [50, 95, 99]) * 1000
+    return {"p50": round(float(p50), 1), "p95": round(float(p95), 1), "p99": round(float(p99), 1)}
+
+
+__all__ = ["StreamTimings", "sse_event"]
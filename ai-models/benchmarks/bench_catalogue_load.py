@@ -0,0 +1,62 @@
+"""Catalogue load time: CSV parsing vs the compiled columnar catalogue.
+
+Builds a synthetic CSV by replicating the seed rows with fresh ids, then
+times each step of both paths. Run from ``ai-models/``::
+
+    python -m benchmarks.bench_catalogue_load --pois 50000
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app import columnar, deps
+from app.services.scoring import PoiFeatures
+
+SEED_CSV = Path(__file__).resolve().parents[2] / "backend" / "seed" / "pois.csv"
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {label:28s} {(time.perf_counter() - start) * 1000:8.1f} ms")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pois", type=int, default=50_000)
+    args = parser.parse_args()
+
+    seed = pd.read_csv(SEED_CSV)
+    rows = seed.iloc[np.arange(args.pois) % len(seed)].reset_index(drop=True)
+    rows["id"] = [f"poi-{i}" for i in range(args.pois)]
+    rows["name"] = rows["name"] + " " + rows.index.astype(str)
+    rng = np.random.default_rng(5)
+    rows["latitude"] += rng.normal(0, 0.02, args.pois)
+    rows["longitude"] += rng.normal(0, 0.02, args.pois)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "pois.csv"
+        rows.to_csv(csv_path, index=False)
+        compiled = Path(tmp) / "catalogue"
+
+        print(f"CSV path ({args.pois} POIs)")
+        frame = timed("read_poi_frame", lambda: deps.read_poi_frame(csv_path))
+        timed("PoiFeatures.from_frame", lambda: PoiFeatures.from_frame(frame))
+
+        columns = columnar.compile_frame(frame)
+        columnar.save_columns(columns, compiled)
+        print("compiled path")
+        loaded = timed("load_columns (mmap)", lambda: columnar.load_columns(compiled))
+        timed("PoiFeatures.from_columns", lambda: PoiFeatures.from_columns(loaded))
+        timed("to_frame (first frame read)", loaded.to_frame)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Time to first byte vs total latency of /chat and /chat/stream.
+
+Runs the app in-process with the fake Gemini client (``GEMINI_FAKE``; its
+first-token delay and per-word pace are set by ``--first-token-ms`` and
+``--token-ms``) and the answer cache off, and drives the ASGI app directly
+so each body chunk is timed as the server sends it. Run from
+``ai-models/``::
+
+    python -m benchmarks.bench_chat_stream --requests 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+QUERIES = (
+    "sunset spots near the sea",
+    "quiet heritage walk in south Mumbai",
+    "street food for a rainy evening",
+    "family friendly museums",
+    "temples to visit early morning",
+)
+
+
+async def timed_post(app, path: str, body: dict) -> Tuple[float, float, int]:
+    """(ttfb, total) in ms and the number of body chunks for one request."""
+    raw = json.dumps(body).encode()
+    received = False
+    first, chunks = None, 0
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": raw, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first, chunks
+        if message["type"] == "http.response.body" and message.get("body"):
+            chunks += 1
+            if first is None:
+                first = time.perf_counter()
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1),
+        "server": ("127.0.0.1", 80),
+    }
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    total = time.perf_counter() - started
+    return (first - started) * 1000, total * 1000, chunks
+
+
+async def run(app, path: str, requests: int) -> List[Tuple[float, float, int]]:
+    results = []
+    for i in range(requests):
+        query = f"{QUERIES[i % len(QUERIES)]} #{i}"
+        results.append(await timed_post(app, path, {"query": query}))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--first-token-ms", type=float, default=400.0)
+    parser.add_argument("--token-ms", type=float, default=25.0)
+    args = parser.parse_args()
+    os.environ.update(GEMINI_FAKE="true", CHAT_CACHE_SIZE="0", GEMINI_REQUESTS_PER_MINUTE="100000")
+
+    from app import main as service
+
+    service.gemini_client.first_token_ms = args.first_token_ms
+    service.gemini_client.token_ms = args.token_ms
+    service.chat_service.warm()
+
+    for path in ("/chat", "/chat/stream"):
+        results = asyncio.run(run(service.app, path, args.requests))
+        ttfb, total, chunks = (np.array(col) for col in zip(*results))
+        print(
+            f"{path:13s} ttfb p50 {np.percentile(ttfb, 50):6.0f} ms  p95 {np.percentile(ttfb, 95):6.0f} ms"
+            f" | total p50 {np.percentile(total, 50):6.0f} ms  p95 {np.percentile(total, 95):6.0f} ms"
+            f" | {chunks.mean():.0f} chunks"
+        )
+    print("server-side /metrics chat_stream:", service.chat_stream_timings.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Encode throughput, peak RSS and parity of the EMBED_BACKEND options.
+
+Each backend runs in its own subprocess so peak RSS is not shared between
+them. Parity is the per-text cosine similarity against the ``torch``
+baseline; the run exits non-zero if any backend drops below ``--tolerance``.
+Run from ``ai-models/`` (the ``onnx`` backend needs ``python -m
+app.export_onnx`` first)::
+
+    python -m benchmarks.bench_encoder_backends --backends torch int8 onnx
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+SAMPLE_TEXTS = [
+    "quiet sea-facing promenade for an evening walk",
+    "heritage architecture and colonial era museums",
+    "street food crawl with spicy chaat and vada pav",
+    "family friendly park with open lawns",
+    "rooftop cafe with live music and city views",
+    "ancient rock-cut caves on an island ferry ride",
+    "budget shopping for handicrafts and textiles",
+    "peaceful temple visit early in the morning",
+]
+
+
+def texts(count: int) -> List[str]:
+    return [f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} #{i}" for i in range(count)]
+
+
+def worker(backend: str, count: int, batch: int, out: Path) -> None:
+    from app.config import get_settings
+    from app.services.encoders import load_encoder
+
+    settings = get_settings().model_copy(update={"embed_backend": backend})
+    started = time.perf_counter()
+    encoder = load_encoder(settings)
+    load_s = time.perf_counter() - started
+    corpus = texts(count)
+    encoder.encode(corpus[:batch], convert_to_numpy=True)
+    started = time.perf_counter()
+    vectors = np.vstack(
+        [encoder.encode(corpus[i : i + batch], convert_to_numpy=True) for i in range(0, count, batch)]
+    ).astype(np.float32)
+    encode_s = time.perf_counter() - started
+    np.save(out, vectors)
+    print(
+        json.dumps(
+            {
+                "load_s": round(load_s, 2),
+                "texts_per_s": round(count / encode_s, 1),
+                "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                "dim": int(vectors.shape[1]),
+            }
+        )
+    )
+
+
+def unit(rows: np.ndarray) -> np.ndarray:
+    return rows / np.clip(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12, None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--tolerance", type=float, default=0.98, help="min cosine vs torch")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.texts, args.batch, Path(args.out))
+        return
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = None
+        for backend in backends:
+            out = Path(tmp) / f"{backend}.npy"
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_encoder_backends", "--worker", backend,
+                 "--out", str(out), "--texts", str(args.texts), "--batch", str(args.batch)],
+                capture_output=True,
+                text=True,
+            )
+            if proc.returncode != 0:
+                print(f"{backend:6s} unavailable: {proc.stderr.strip().splitlines()[-1:]}")
+                failed = True
+                continue
+            report = json.loads(proc.stdout.strip().splitlines()[-1])
+            vectors = np.load(out)
+            if baseline is None:
+                baseline = vectors
+            if vectors.shape != baseline.shape:
+                report["parity"] = f"shape {vectors.shape} != {baseline.shape}"
+                failed = True
+            else:
+                cosine = (unit(vectors) * unit(baseline)).sum(axis=1)
+                report["min_cosine"] = round(float(cosine.min()), 4)
+                report["mean_cosine"] = round(float(cosine.mean()), 4)
+                failed |= bool(cosine.min() < args.tolerance)
+            print(f"{backend:6s} {report}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
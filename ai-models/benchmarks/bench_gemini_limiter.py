@@ -0,0 +1,59 @@
+"""How many bursty Gemini calls fall back under the rate limiter.
+
+Simulates chat traffic arriving in bursts (``--burst-size`` requests at
+once every ``--burst-every`` seconds, averaging just under the rate) and
+counts calls admitted, and how long they waited, with ``--max-wait 0``
+(reject as soon as the bucket is empty, like the old sliding window)
+against the queueing limiter. Run from ``ai-models/``::
+
+    python -m benchmarks.bench_gemini_limiter --rpm 120 --bursts 6
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from app.services.rate_limit import RateLimiter
+
+
+async def run(limiter: RateLimiter, bursts: int, size: int, every: float) -> list:
+    async def call():
+        started = time.monotonic()
+        ok = await limiter.acquire_async()
+        return ok, time.monotonic() - started
+
+    tasks = []
+    for _ in range(bursts):
+        tasks += [asyncio.create_task(call()) for _ in range(size)]
+        await asyncio.sleep(every)
+    return await asyncio.gather(*tasks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rpm", type=int, default=120)
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--bursts", type=int, default=6)
+    parser.add_argument("--burst-size", type=int, default=8)
+    parser.add_argument("--burst-every", type=float, default=4.5)
+    parser.add_argument("--max-wait", type=float, default=3.0)
+    args = parser.parse_args()
+
+    for max_wait in (0.0, args.max_wait):
+        limiter = RateLimiter(args.rpm, burst=args.burst, max_wait_seconds=max_wait)
+        results = asyncio.run(run(limiter, args.bursts, args.burst_size, args.burst_every))
+        waits = np.array([wait for ok, wait in results if ok]) * 1000
+        admitted = len(waits)
+        print(
+            f"max wait {max_wait:3.1f} s: {admitted}/{len(results)} answered by Gemini, "
+            f"{len(results) - admitted} fell back; wait p50 {np.percentile(waits, 50):.0f} ms "
+            f"p95 {np.percentile(waits, 95):.0f} ms"
+        )
+        print("  ", limiter.stats())
+
+
+if __name__ == "__main__":
+    main()
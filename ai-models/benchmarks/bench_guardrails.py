@@ -0,0 +1,70 @@
+"""Guardrail check cost against the number of patterns and the query length.
+
+Compiles ``--patterns`` random two-word phrases (none of which occur in
+the queries, the common case) into the Aho–Corasick automaton and times
+``GuardrailEngine.check`` next to the scans it replaces: ``any(p in
+text)`` over a list, and one compiled regex alternation. Run from
+``ai-models/``::
+
+    python -m benchmarks.bench_guardrails --patterns 100 1000 5000 --lengths 80 800
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import string
+import time
+
+from app.services.guardrails import CategoryRule, GuardrailEngine
+
+QUERY_WORDS = (
+    "quiet sunset walk near the sea with street food and a heritage museum "
+    "for a family day in south mumbai during the monsoon evening"
+).split()
+
+
+def per_call_us(fn, texts, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - started) / (repeat * len(texts)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patterns", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[80, 800])
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    rng = random.Random(3)
+
+    def word() -> str:
+        return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+
+    for length in args.lengths:
+        texts = []
+        for _ in range(args.queries):
+            words = []
+            while len(" ".join(words)) < length:
+                words.append(rng.choice(QUERY_WORDS))
+            texts.append(" ".join(words)[:length])
+        for count in args.patterns:
+            patterns = [f"{word()} {word()}" for _ in range(count)]
+            started = time.perf_counter()
+            engine = GuardrailEngine([CategoryRule("bench", "no", tuple(patterns))], [])
+            build_ms = (time.perf_counter() - started) * 1000
+            alternation = re.compile("|".join(map(re.escape, patterns)))
+            repeat = max(1, 20000 // (count * args.queries) + 1)
+            automaton = per_call_us(engine.check, texts, repeat * 4)
+            naive = per_call_us(lambda t: any(p in t.lower() for p in patterns), texts, repeat)
+            regex = per_call_us(lambda t: alternation.search(t.lower()), texts, repeat)
+            print(
+                f"{length:5d} chars, {count:5d} patterns: automaton {automaton:7.1f} us"
+                f" (built in {build_ms:5.1f} ms) | any(in) {naive:8.1f} us | regex {regex:8.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
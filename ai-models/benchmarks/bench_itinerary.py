@@ -0,0 +1,122 @@
+"""/itinerary planning latency on a large synthetic catalogue.
+
+Replicates the seed POIs with fresh ids, jittered coordinates and varied
+opening hours (split shifts, late openers, closed days), then times
+``ItineraryService.build`` for random starts and windows, or with
+``--trip-days`` ``build_multi_day`` for trips of that many days. Run from
+``ai-models/``::
+
+    python -m benchmarks.bench_itinerary --pois 5000 --plans 200
+    python -m benchmarks.bench_itinerary --pois 5000 --plans 20 --trip-days 7
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SEED_CSV = Path(__file__).resolve().parents[2] / "backend" / "seed" / "pois.csv"
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+SCHEDULES = (
+    [["09:00", "21:00"]],
+    [["06:00", "10:00"], ["16:00", "20:00"]],
+    [["11:00", "23:59"]],
+    [["00:00", "02:00"], ["18:00", "23:59"]],
+    [["10:00", "17:00"]],
+)
+
+
+def write_catalogue(path: Path, pois: int) -> None:
+    seed = pd.read_csv(SEED_CSV)
+    rng = np.random.default_rng(11)
+    rows = seed.iloc[np.arange(pois) % len(seed)].reset_index(drop=True)
+    rows["id"] = [f"poi-{i}" for i in range(pois)]
+    rows["latitude"] += rng.normal(0, 0.03, pois)
+    rows["longitude"] += rng.normal(0, 0.03, pois)
+    hours = []
+    for _ in range(pois):
+        schedule = SCHEDULES[rng.integers(len(SCHEDULES))]
+        closed = rng.integers(-3, 7)  # mostly open all week
+        week = {day: [] if pos == closed else schedule for pos, day in enumerate(DAYS)}
+        hours.append(json.dumps(week))
+    rows["opening_hours"] = hours
+    rows.to_csv(path, index=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pois", type=int, default=5000)
+    parser.add_argument("--plans", type=int, default=200)
+    parser.add_argument("--trip-days", type=int, default=0)
+    parser.add_argument("--stops-per-day", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "pois.csv"
+        write_catalogue(csv_path, args.pois)
+        os.environ["POI_CSV_PATH"] = str(csv_path)
+        os.environ["EMBED_CACHE_DIR"] = tmp
+        os.environ.setdefault("CATALOGUE_WATCH_SECONDS", "0")
+
+        from app import main as service
+        from app.schemas import ItineraryRequest, MultiDayItineraryRequest
+
+        for _, step in service.warmup_steps():
+            step()
+        budget = service.settings.itinerary_budget_ms
+        rng = np.random.default_rng(3)
+        moods = ("Chill", "Culture", "Family", "Adventure")
+        timings = []
+        stops = 0
+        for plan in range(args.plans):
+            start = int(rng.integers(6, 12))
+            location = {"lat": 19.0 + rng.normal(0, 0.05), "lng": 72.85 + rng.normal(0, 0.03)}
+            window = {"start": f"{start:02d}:00", "end": f"{start + 10:02d}:00"}
+            date = datetime.date(2024, 1, 1) + datetime.timedelta(days=plan % 7)
+            began = time.perf_counter()
+            if args.trip_days:
+                result = service.itinerary_service.build_multi_day(
+                    MultiDayItineraryRequest(
+                        mood=moods[plan % len(moods)],
+                        start_location=location,
+                        start_date=date,
+                        end_date=date + datetime.timedelta(days=args.trip_days - 1),
+                        daily_window=window,
+                        stops_per_day=args.stops_per_day,
+                    )
+                )
+                days = result.days
+            else:
+                days = [
+                    service.itinerary_service.build(
+                        ItineraryRequest(
+                            mood=moods[plan % len(moods)],
+                            start_location=location,
+                            time_window=window,
+                            date=date,
+                        )
+                    )
+                ]
+            timings.append((time.perf_counter() - began) * 1000)
+            stops += sum(
+                not item.poi_id.endswith("-break") for day in days for item in day.items
+            )
+
+        timings = np.asarray(timings)
+        trip = f", {args.trip_days}-day trips" if args.trip_days else ""
+        print(f"{args.pois} POIs, {args.plans} plans{trip}, budget {budget:.0f} ms")
+        print(
+            f"  p50 {np.percentile(timings, 50):.1f} ms  p95 {np.percentile(timings, 95):.1f} ms"
+            f"  max {timings.max():.1f} ms  stops/plan {stops / args.plans:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Throughput of concurrent single-text encodes with and without micro-batching.
+
+By default a synthetic encoder models a transformer on CPU: a fixed cost per
+call plus a smaller cost per text, with calls serialised because one encode
+already occupies every core. ``--real`` uses the configured
+EmbeddingService model instead. Run from ``ai-models/``::
+
+    python -m benchmarks.bench_microbatch --threads 32 --calls 2000
+"""
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+
+from app.services.batching import MicroBatcher
+
+
+class SyntheticEncoder:
+    def __init__(self, call_ms: float, text_ms: float, dim: int = 384):
+        self.call_ms = call_ms
+        self.text_ms = text_ms
+        self.dim = dim
+        self._device = threading.Lock()
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        with self._device:
+            time.sleep((self.call_ms + self.text_ms * len(texts)) / 1000)
+        return np.zeros((len(texts), self.dim), dtype=np.float32)
+
+
+def run(encode, threads: int, calls: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda i: encode([f"mood prompt {i}"]), range(calls)))
+    return calls / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--real", action="store_true", help="use the configured encoder")
+    args = parser.parse_args()
+
+    if args.real:
+        from app.config import get_settings
+        from app.services.embeddings import EmbeddingService
+
+        service = EmbeddingService(get_settings().model_copy(update={"embed_batch_max_wait_ms": 0}))
+        encode = service._encode
+        encode(["warm up"])
+    else:
+        encode = SyntheticEncoder(call_ms=4.0, text_ms=0.2)
+
+    direct = run(encode, args.threads, args.calls)
+    batcher = MicroBatcher(encode, args.max_wait_ms, args.max_batch)
+    batched = run(batcher.submit, args.threads, args.calls)
+    print(f"direct:  {direct:8.1f} texts/s")
+    print(f"batched: {batched:8.1f} texts/s  ({batched / direct:.1f}x)  {batcher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""places.json ingestion: ``json.load`` of the whole file vs streaming.
+
+Writes a synthetic ``places.json`` by replicating the shipped records with
+fresh ids, then reports wall time and tracemalloc peak (from a separate run)
+for reading every record both ways, and for the full merge into the
+catalogue frame. Run from ``ai-models/``::
+
+    python -m benchmarks.bench_places_ingest --copies 100
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from app import places
+
+SHIPPED = Path(__file__).resolve().parents[1] / "app" / "places.json"
+
+
+def measured(label: str, fn):
+    # timed untraced; tracemalloc slows allocation-heavy code several-fold
+    start = time.perf_counter()
+    result = fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:30s} {elapsed:8.1f} ms  peak {peak / 2**20:7.1f} MiB")
+    return result
+
+
+def count_loaded(path: Path) -> int:
+    with open(path, encoding="utf-8") as fh:
+        records = json.load(fh)
+    return sum(len(r) if isinstance(r, list) else 1 for r in records)
+
+
+def count_streamed(path: Path) -> int:
+    return sum(1 for _ in places.iter_places(path))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copies", type=int, default=100)
+    args = parser.parse_args()
+
+    records = list(places.iter_places(SHIPPED))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "places.json"
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write("[\n")
+            for copy in range(args.copies):
+                for pos, record in enumerate(records):
+                    record = dict(
+                        record, id=f"{record['id']}-{copy}", name=f"{record['name']} {copy}"
+                    )
+                    fh.write("," if copy or pos else "")
+                    json.dump(record, fh, indent=1)
+            fh.write("\n]\n")
+
+        size = path.stat().st_size / 2**20
+        print(f"{len(records) * args.copies} records, {size:.1f} MiB")
+        loaded = measured("json.load", lambda: count_loaded(path))
+        streamed = measured("iter_places", lambda: count_streamed(path))
+        assert loaded == streamed, (loaded, streamed)
+        _, stats = measured(
+            "merge_places (into frame)",
+            lambda: places.merge_places(pd.DataFrame(), places.iter_places(path)),
+        )
+        print(f"  merged {stats.added}, duplicates {stats.duplicates}, invalid {stats.invalid}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Route ordering: greedy nearest-neighbour + ``two_opt`` vs ``optimize_route``.
+
+For 8, 25 and 100 random stops around Mumbai, compares tour travel time and
+runtime on a plain open tour, and lateness on a variant with random opening
+windows and dwell times (the legacy ordering ignores windows; its route is
+scored with the same schedule). Run from ``ai-models/``::
+
+    python -m benchmarks.bench_route_optimizer --trials 5
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.utils import optimize_route, pairwise_km, two_opt
+
+SPEED_KMH = 24.0
+ORIGIN = (19.0, 72.85)
+
+
+def legacy_order(origin_travel: np.ndarray, travel: np.ndarray) -> list:
+    """What ItineraryService._order did: greedy from the start, then two_opt."""
+    n = len(origin_travel)
+    visited = np.zeros(n, dtype=bool)
+    order = []
+    legs = origin_travel
+    for _ in range(n):
+        costs = np.where(visited, np.inf, legs)
+        nxt = int(np.argmin(costs))
+        order.append(nxt)
+        visited[nxt] = True
+        legs = travel[nxt]
+    matrix = travel[np.ix_(order, order)].tolist()
+    return [order[pos] for pos in two_opt(list(range(n)), matrix)]
+
+
+def schedule(order, origin_travel, travel, dwell, windows, start):
+    clock, lateness, total, prev = start, 0.0, 0.0, None
+    for stop in order:
+        leg = origin_travel[stop] if prev is None else travel[prev, stop]
+        total += leg
+        begin = max(clock + leg, windows[stop, 0])
+        lateness += max(0.0, begin - windows[stop, 1])
+        clock = begin + dwell[stop]
+        prev = stop
+    return total, lateness
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(17)
+
+    print(f"{'stops':>5} {'case':6} {'legacy min':>11} {'late':>7} {'ms':>8} "
+          f"{'new min':>9} {'late':>7} {'dropped':>7} {'ms':>7}")
+    for n in (8, 25, 100):
+        rows = {"tour": [], "tsptw": []}
+        for _ in range(args.trials):
+            lat = ORIGIN[0] + rng.normal(0, 0.06, n)
+            lng = ORIGIN[1] + rng.normal(0, 0.04, n)
+            km = pairwise_km(np.r_[ORIGIN[0], lat], np.r_[ORIGIN[1], lng])
+            minutes = np.maximum(km / SPEED_KMH * 60, 5.0)
+            origin_travel, travel = minutes[0, 1:], minutes[1:, 1:]
+
+            started = time.perf_counter()
+            old = legacy_order(origin_travel, travel)
+            old_ms = (time.perf_counter() - started) * 1000
+
+            cases = {
+                "tour": (np.zeros(n), np.column_stack([np.full(n, -np.inf), np.full(n, np.inf)])),
+            }
+            # windows of a third of the horizon, scattered over it
+            dwell = rng.choice([30.0, 45.0, 60.0], n)
+            horizon = n * (dwell.mean() + travel.mean() / 2)
+            opens = 9 * 60 + rng.uniform(0, horizon * 2 / 3, n)
+            cases["tsptw"] = (dwell, np.column_stack([opens, opens + horizon / 3]))
+            for case, (case_dwell, windows) in cases.items():
+                old_travel, old_late = schedule(old, origin_travel, travel, case_dwell, windows, 9 * 60)
+                started = time.perf_counter()
+                plan = optimize_route(
+                    travel,
+                    origin_travel,
+                    case_dwell,
+                    start=9 * 60,
+                    end=np.inf,
+                    windows=windows,
+                    time_budget_ms=args.budget_ms,
+                )
+                new_ms = (time.perf_counter() - started) * 1000
+                rows[case].append(
+                    (old_travel, old_late, old_ms, plan.travel_minutes, plan.lateness,
+                     len(plan.dropped), new_ms)
+                )
+        for case, values in rows.items():
+            mean = np.mean(values, axis=0)
+            print(f"{n:5d} {case:6} {mean[0]:11.1f} {mean[1]:7.1f} {mean[2]:8.1f} "
+                  f"{mean[3]:9.1f} {mean[4]:7.1f} {mean[5]:7.1f} {mean[6]:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare the columnar scoring engine with the previous per-row loops.
+
+Run from ``ai-models/``::
+
+    python -m benchmarks.bench_scoring --pois 50000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.schemas import Location
+from app.services.scoring import PoiFeatures, score_candidates, top_k
+from app.services.utils import haversine_km, normalize
+
+CATEGORIES = ["Waterfront", "Park", "Cafe", "Heritage", "Museum", "Fort", "Market", "Art"]
+TAGS = ["sunset", "family", "heritage", "food", "night", "art", "sea", "walk"]
+
+
+def synthetic_frame(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "id": [f"poi-{i}" for i in range(n)],
+            "name": [f"POI {i}" for i in range(n)],
+            "category": rng.choice(CATEGORIES, n),
+            "latitude": 18.9 + rng.random(n) * 0.3,
+            "longitude": 72.8 + rng.random(n) * 0.15,
+            "rating": np.round(3 + rng.random(n) * 2, 1),
+            "price_level": rng.integers(0, 5, n),
+            "tags": [list(rng.choice(TAGS, 3, replace=False)) for _ in range(n)],
+        }
+    )
+
+
+def legacy_scores(df, sims, categories, location, budget, weights):
+    category_scores = [1.0 if row["category"] in categories else 0.3 for _, row in df.iterrows()]
+    distances = [
+        haversine_km((location.lat, location.lng), (row["latitude"], row["longitude"]))
+        for _, row in df.iterrows()
+    ]
+    distance_scores = [1 - d for d in normalize(distances)]
+    target = {"low": 0, "medium": 2, "high": 4}[budget]
+    price_scores = [
+        1 - abs((row.get("price_level") or 2) - target) / 4 for _, row in df.iterrows()
+    ]
+    rating_scores = normalize(df["rating"].fillna(3.5).tolist())
+    comp = zip(sims, category_scores, distance_scores, price_scores, rating_scores)
+    return np.array(
+        [
+            weights[0] * s + weights[1] * c + weights[2] * d + weights[3] * p + weights[4] * r
+            for s, c, d, p, r in comp
+        ]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pois", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    df = synthetic_frame(args.pois, rng)
+    matrix = rng.standard_normal((args.pois, args.dim)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    query = matrix[0] + 0.1 * rng.standard_normal(args.dim).astype(np.float32)
+    query /= np.linalg.norm(query)
+    weights = [0.45, 0.2, 0.2, 0.05, 0.1]
+    location = Location(lat=18.93, lng=72.83)
+    categories = ["Waterfront", "Park", "Cafe"]
+
+    features = PoiFeatures.from_frame(df)
+    idx = np.arange(args.pois)
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        sims = (matrix @ query)[idx]
+        scores = score_candidates(features, idx, sims, categories, location, "low", weights)
+        best = top_k(scores, 15)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"columnar: median {np.median(timings):.2f} ms over {args.repeat} runs")
+
+    start = time.perf_counter()
+    reference = legacy_scores(df, sims.tolist(), categories, location, "low", weights)
+    print(f"legacy loops: {(time.perf_counter() - start) * 1000:.0f} ms")
+    expected = np.argsort(-reference, kind="stable")[:15]
+    print("same top-15 ranking:", np.array_equal(expected, best))
+
+
+if __name__ == "__main__":
+    main()
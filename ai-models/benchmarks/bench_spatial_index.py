@@ -0,0 +1,54 @@
+"""Radius and k-nearest query latency of the grid spatial index.
+
+Run from ``ai-models/``::
+
+    python -m benchmarks.bench_spatial_index --pois 100000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.spatial_index import GridIndex
+from app.services.utils import haversine_km_array
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pois", type=int, default=100_000)
+    parser.add_argument("--cell-km", type=float, default=1.0)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    lat = 18.9 + rng.random(args.pois) * 0.3
+    lng = 72.8 + rng.random(args.pois) * 0.15
+    start = time.perf_counter()
+    index = GridIndex(lat, lng, args.cell_km)
+    print(f"build: {(time.perf_counter() - start) * 1000:.0f} ms for {args.pois} POIs")
+
+    origins = np.stack(
+        [18.9 + rng.random(args.queries) * 0.3, 72.8 + rng.random(args.queries) * 0.15], axis=1
+    )
+    for label, query in (
+        ("radius 1 km", lambda la, ln: index.within(la, ln, 1.0)),
+        ("radius 3 km", lambda la, ln: index.within(la, ln, 3.0)),
+        ("nearest 20", lambda la, ln: index.nearest(la, ln, 20)),
+        ("brute force", lambda la, ln: haversine_km_array((la, ln), lat, lng)),
+    ):
+        timings = []
+        for la, ln in origins:
+            tick = time.perf_counter()
+            query(la, ln)
+            timings.append((time.perf_counter() - tick) * 1000)
+        print(f"{label:12s} p50 {np.median(timings):.3f} ms  p99 {np.percentile(timings, 99):.3f} ms")
+
+    la, ln = origins[0]
+    exact = np.sort(haversine_km_array((la, ln), lat, lng))[:20]
+    print("nearest matches brute force:", np.allclose(index.nearest(la, ln, 20)[1], exact))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Precomputed POI travel matrix: build cost, size and lookup latency.
+
+Builds the heuristic matrix for a synthetic catalogue (see
+``bench_itinerary``), then times the travel minutes for random 8-stop
+routes read from the memory-mapped matrix against the online path
+(``TravelMatrixService`` cache + haversine, OSRM unreachable). Run from
+``ai-models/``::
+
+    python -m benchmarks.bench_travel_matrix --pois 5000 --routes 2000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_itinerary import write_catalogue
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pois", type=int, default=5000)
+    parser.add_argument("--routes", type=int, default=2000)
+    parser.add_argument("--stops", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "pois.csv"
+        write_catalogue(csv_path, args.pois)
+        matrix_dir = Path(tmp) / "matrix"
+        os.environ.update(
+            POI_CSV_PATH=str(csv_path),
+            POI_MATRIX_PATH=str(matrix_dir),
+            OSRM_URL="http://127.0.0.1:9",
+            EMBED_CACHE_DIR=tmp,
+        )
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "app.build_travel_matrix"], check=True, capture_output=True
+        )
+        build_s = time.perf_counter() - started
+        size = sum(f.stat().st_size for f in matrix_dir.iterdir()) / 2**20
+
+        from app import deps
+        from app.config import get_settings
+        from app.services.poi_matrix import get_poi_matrix
+        from app.services.travel_matrix import TravelMatrixService
+        from app.services.utils import pairwise_km
+
+        matrix = get_poi_matrix()
+        online = TravelMatrixService(get_settings())
+        columns = deps.current_catalogue().columns
+        lats, lngs = np.asarray(columns.latitude), np.asarray(columns.longitude)
+        rng = np.random.default_rng(5)
+        routes = [rng.choice(len(matrix), args.stops, replace=False) for _ in range(args.routes)]
+
+        started = time.perf_counter()
+        for rows in routes:
+            matrix.minutes(rows, rows, 10 * 60)
+        lookup_us = (time.perf_counter() - started) / args.routes * 1e6
+
+        started = time.perf_counter()
+        for rows in routes:
+            road = online.matrix(list(zip(lats[rows], lngs[rows])), 10 * 60)
+            np.where(road.known, road.durations, pairwise_km(lats[rows], lngs[rows]) / 28 * 60)
+        online_us = (time.perf_counter() - started) / args.routes * 1e6
+
+        print(f"{len(matrix)} POIs: build {build_s:.1f} s (incl. catalogue load), {size:.1f} MiB")
+        print(f"  {args.stops}-stop route matrix: mmap lookup {lookup_us:.0f} us, "
+              f"online path {online_us:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
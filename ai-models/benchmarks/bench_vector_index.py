@@ -0,0 +1,61 @@
+"""Recall and latency of the IVF index against exact flat search.
+
+Run from ``ai-models/``::
+
+    python -m benchmarks.bench_vector_index --vectors 100000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.vector_index import FlatIndex, IVFIndex
+
+
+def clustered_vectors(n: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    data = centres[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+def timed_search(index, queries: np.ndarray, k: int):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(index.search(query, k)[0])
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return results, elapsed_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(3)
+    matrix = clustered_vectors(args.vectors, args.dim, 200, rng)
+    queries = clustered_vectors(args.queries, args.dim, 200, rng)
+
+    exact, flat_ms = timed_search(FlatIndex(matrix), queries, args.k)
+    print(f"flat        {flat_ms:7.2f} ms/query  recall@{args.k} 1.000")
+
+    nlist = int(np.sqrt(args.vectors))
+    start = time.perf_counter()
+    ivf = IVFIndex.build(matrix, nlist, nprobe=1)
+    print(f"ivf build   {time.perf_counter() - start:7.2f} s ({nlist} lists)")
+    for nprobe in (1, 4, 8, 16, 32):
+        ivf.nprobe = nprobe
+        approx, ivf_ms = timed_search(ivf, queries, args.k)
+        recall = np.mean(
+            [len(set(a.tolist()) & set(e.tolist())) / args.k for a, e in zip(approx, exact)]
+        )
+        print(f"ivf nprobe={nprobe:<3d} {ivf_ms:5.2f} ms/query  recall@{args.k} {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
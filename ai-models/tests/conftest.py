@@ -0,0 +1,17 @@
+"""Point the service at the seed catalogue and a throwaway cache before any app import."""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("POI_CSV_PATH", str(ROOT.parent / "backend" / "seed" / "pois.csv"))
+os.environ.setdefault("EMBED_CACHE_DIR", tempfile.mkdtemp(prefix="ai-models-tests-"))
+# route optimisation inline: spawn workers would re-import the test module
+os.environ.setdefault("ITINERARY_WORKERS", "0")
+os.environ.setdefault("GEMINI_API_KEY", "")
+os.environ.setdefault("OSRM_URL", "http://127.0.0.1:9")
@@ -0,0 +1,42 @@
+"""Admin catalogue edits are off by default and need the configured token."""
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app, lexical_store, settings
+
+POI = {"name": "Sassoon Dock", "description": "Dawn fish auction at the docks", "tags": ["food"]}
+
+
+@pytest.fixture
+def client():
+    # no context manager: startup warmup and the catalogue watcher are not needed
+    return TestClient(app)
+
+
+def test_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "")
+    assert client.put("/admin/pois/admin-test", json=POI).status_code == 403
+    assert client.delete("/admin/pois/admin-test").status_code == 403
+    assert lexical_store.record("admin-test") is None
+
+
+def test_wrong_token_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "s3cret")
+    for headers in ({}, {"X-Admin-Token": "nope"}):
+        assert client.put("/admin/pois/admin-test", json=POI, headers=headers).status_code == 401
+        assert client.delete("/admin/pois/admin-test", headers=headers).status_code == 401
+    assert lexical_store.record("admin-test") is None
+
+
+def test_token_allows_edits(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "s3cret")
+    headers = {"X-Admin-Token": "s3cret"}
+    response = client.put("/admin/pois/admin-test", json=POI, headers=headers)
+    assert response.status_code == 200 and response.json()["status"] == "upserted"
+    try:
+        assert "admin-test" in [doc_id for doc_id, _ in lexical_store.load().search("auction", 3)]
+    finally:
+        assert client.delete("/admin/pois/admin-test", headers=headers).status_code == 200
+    assert client.delete("/admin/pois/admin-test", headers=headers).status_code == 404
@@ -0,0 +1,88 @@
+"""Opening-hours bitmap against a minute-by-minute reference."""
+from __future__ import annotations
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.columnar import DAYS, compile_frame
+from app.services.availability import SLOT_MINUTES, Availability
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri"]
+HOURS = {
+    "museum": {day: [["10:00", "18:00"]] for day in WEEKDAYS},
+    "split": {day: [["09:00", "12:00"], ["14:00", "18:00"]] for day in DAYS},
+    "late": {"sat": [["20:00", "23:59"]], "sun": [["00:00", "02:00"]]},
+    "unknown": None,
+}
+
+
+@pytest.fixture(scope="module")
+def availability():
+    frame = pd.DataFrame({"id": list(HOURS), "opening_hours": list(HOURS.values())})
+    return Availability.from_columns(compile_frame(frame))
+
+
+def minutes(text):
+    hours, _, mins = text.partition(":")
+    close = int(hours) * 60 + int(mins)
+    return 24 * 60 if close == 24 * 60 - 1 else close
+
+
+def reference_open(poi, weekday, start, end):
+    hours = HOURS[poi]
+    if hours is None:
+        return True
+    for minute in range(start, end):
+        day, at = DAYS[(weekday + minute // (24 * 60)) % 7], minute % (24 * 60)
+        if not any(minutes(a) <= at < minutes(b) for a, b in hours.get(day, [])):
+            return False
+    return True
+
+
+def test_slot_aligned_windows_match_reference(availability):
+    starts = range(0, 24 * 60, 2 * SLOT_MINUTES)
+    for poi, weekday, start, length in itertools.product(HOURS, range(7), starts, (15, 60, 150)):
+        row = availability.row(poi)
+        assert availability.is_open(row, weekday, start, start + length) == reference_open(
+            poi, weekday, start, start + length
+        ), (poi, weekday, start, length)
+
+
+def test_partial_slots_err_towards_closed(availability):
+    row = availability.row("museum")
+    assert availability.is_open(row, 0, 10 * 60, 18 * 60)
+    assert not availability.is_open(row, 0, 9 * 60 + 50, 11 * 60)
+    assert not availability.is_open(row, 0, 17 * 60, 18 * 60 + 5)
+    assert not availability.is_open(row, 5, 10 * 60, 11 * 60)
+
+
+def test_visit_can_run_past_midnight(availability):
+    row = availability.row("late")
+    assert availability.is_open(row, 5, 23 * 60, 25 * 60)
+    assert not availability.is_open(row, 5, 23 * 60, 26 * 60 + 30)
+
+
+def test_next_open_and_visit_window(availability):
+    row = availability.row("split")
+    assert availability.next_open(row, 0, 8 * 60, 60, 20 * 60) == 9 * 60
+    assert availability.next_open(row, 0, 11 * 60 + 30, 60, 20 * 60) == 14 * 60
+    assert availability.next_open(row, 0, 11 * 60 + 30, 60, 13 * 60) is None
+    assert availability.next_open(row, 0, 9 * 60 + 10, 30, 20 * 60) == 9 * 60 + 10
+    assert availability.visit_window(row, 0, 8 * 60, 20 * 60, 60) == (9 * 60, 17 * 60)
+    assert availability.visit_window(row, 0, 8 * 60, 20 * 60, 4 * 60) == (14 * 60, 14 * 60)
+    assert availability.visit_window(row, 0, 8 * 60, 20 * 60, 5 * 60) is None
+
+
+def test_open_during_and_unknown_hours(availability):
+    rows = np.array([availability.row(poi) for poi in HOURS])
+    assert availability.open_during(rows, 0, 12 * 60, 14 * 60).tolist() == [
+        True,
+        False,
+        False,
+        True,
+    ]
+    assert availability.open_during(rows, 6, 0, 60).tolist() == [False, False, True, True]
+    assert availability.row("missing") is None
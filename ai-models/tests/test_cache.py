@@ -0,0 +1,55 @@
+"""TTL cache: LRU order, expiry and namespaced entries across reloads."""
+from __future__ import annotations
+
+import time
+
+from app.services.cache import KEPT_NAMESPACES, NamespaceWindow, TTLCache
+
+
+def test_lru_eviction_and_expiry(monkeypatch):
+    cache = TTLCache(2, ttl_seconds=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+    later = time.monotonic() + 11
+    monkeypatch.setattr(time, "monotonic", lambda: later)
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1 and cache.stats()["expirations"] == 1
+
+
+def test_overlapping_namespaces_keep_their_entries():
+    cache = TTLCache(16)
+    for namespace in ("old", "new"):
+        cache.ensure_namespace(namespace)
+        cache.set((namespace, "q"), namespace)
+    # requests pinned to either snapshot interleave during a reload
+    for _ in range(3):
+        cache.ensure_namespace("old")
+        assert cache.get(("old", "q")) == "old"
+        cache.ensure_namespace("new")
+        assert cache.get(("new", "q")) == "new"
+    assert cache.stats()["invalidations"] == 0
+
+
+def test_third_namespace_drops_the_least_recent():
+    cache = TTLCache(16)
+    for namespace in ("v1", "v2"):
+        cache.ensure_namespace(namespace)
+        cache.set((namespace, "q"), namespace)
+    cache.ensure_namespace("v1")
+    cache.ensure_namespace("v3")
+    assert cache.get(("v2", "q")) is None
+    assert cache.get(("v1", "q")) == "v1"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_namespace_window_retires_the_least_recently_used():
+    window = NamespaceWindow()
+    assert KEPT_NAMESPACES == 2
+    assert window.use("v1") == [] and window.use("v2") == []
+    assert window.use("v1") == []  # refreshes v1, so v2 is now the oldest
+    assert window.use("v3") == ["v2"]
+    assert "v1" in window and "v3" in window and "v2" not in window
+    assert NamespaceWindow(keep=1).use("v1") == []
@@ -0,0 +1,122 @@
+"""Compiled catalogue columns: a save/load round trip keeps the frame."""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import columnar, deps
+
+ROWS = [
+    {
+        "id": "fort-cafe",
+        "name": "Fort Cafe",
+        "description": "Breakfast and a long lunch break",
+        "category": "Cafe",
+        "latitude": 18.93,
+        "longitude": 72.83,
+        "rating": 4.2,
+        "price_level": 2,
+        "tags": ["coffee", "breakfast"],
+        "image_url": "https://example.com/cafe.jpg",
+        "opening_hours": {
+            "mon": [["08:00", "11:30"], ["13:00", "23:00"]],
+            "tue": [["08:00", "11:30"], ["13:00", "23:00"], ["23:30", "23:59"]],
+            "sun": [["09:00", "15:00"]],
+        },
+        "subcategory": "Bakery",
+        "duration_hours": 1.5,
+        "time_to_visit": ["morning"],
+        "best_weather": ["rain", "clear"],
+    },
+    {
+        "id": "open-ground",
+        "name": "Open Ground",
+        "description": "",
+        "category": "Park",
+        "latitude": 19.01,
+        "longitude": 72.84,
+        "rating": np.nan,
+        "price_level": np.nan,
+        "tags": [],
+        "image_url": None,
+        "opening_hours": {},
+        "subcategory": None,
+        "duration_hours": np.nan,
+        "time_to_visit": [],
+        "best_weather": [],
+    },
+    {
+        "id": "sea-face",
+        "name": "Sea Face",
+        "description": "Evening walks",
+        "category": "Waterfront",
+        "latitude": 19.05,
+        "longitude": 72.82,
+        "rating": 4.6,
+        "price_level": 0,
+        "tags": ["sunset", "coffee"],
+        "image_url": "https://example.com/sea.jpg",
+        "opening_hours": {"mon": [["00:00", "23:59"]]},
+        "subcategory": None,
+        "duration_hours": 2.0,
+        "time_to_visit": ["evening"],
+        "best_weather": [],
+    },
+]
+
+
+@pytest.fixture
+def round_trip(tmp_path):
+    columns = columnar.compile_frame(pd.DataFrame(ROWS))
+    columnar.save_columns(columns, tmp_path / "catalogue")
+    loaded = columnar.load_columns(tmp_path / "catalogue")
+    return columns, loaded, loaded.to_frame()
+
+
+def test_round_trip_keeps_text_numbers_and_lists(round_trip):
+    columns, loaded, frame = round_trip
+    assert loaded.version == columns.version and len(loaded) == 3
+    assert list(frame.columns) == list(columnar.FRAME_COLUMNS)
+    assert frame["id"].tolist() == [row["id"] for row in ROWS]
+    assert frame["tags"].tolist() == [["coffee", "breakfast"], [], ["sunset", "coffee"]]
+    assert frame["best_weather"].tolist() == [["rain", "clear"], [], []]
+    np.testing.assert_allclose(frame["latitude"], [18.93, 19.01, 19.05])
+    np.testing.assert_allclose(frame["duration_hours"], [1.5, np.nan, 2.0])
+
+
+def test_round_trip_keeps_missing_values(round_trip):
+    _, _, frame = round_trip
+    missing = frame.iloc[1]
+    assert pd.isna(missing["image_url"]) and pd.isna(missing["subcategory"])
+    assert missing["description"] == ""
+    assert np.isnan(missing["rating"]) and np.isnan(missing["price_level"])
+    assert missing["opening_hours"] == {}
+    # a missing price turns the column float, as read_csv would
+    assert frame["price_level"].tolist()[::2] == [2.0, 0.0]
+
+
+def test_round_trip_keeps_multi_slot_hours(round_trip):
+    _, loaded, frame = round_trip
+    assert loaded.hours.shape == (3, 7, 3, 2)
+    cafe = frame.iloc[0]["opening_hours"]
+    assert cafe["mon"] == [["08:00", "11:30"], ["13:00", "23:00"]]
+    assert cafe["tue"] == [["08:00", "11:30"], ["13:00", "23:00"], ["23:30", "23:59"]]
+    assert cafe["sun"] == [["09:00", "15:00"]] and cafe["wed"] == []
+    assert frame.iloc[2]["opening_hours"]["mon"] == [["00:00", "23:59"]]
+
+
+def test_snapshot_builds_its_frame_on_first_read(tmp_path, monkeypatch):
+    columnar.save_columns(columnar.compile_frame(pd.DataFrame(ROWS)), tmp_path / "catalogue")
+    settings = deps.get_settings().model_copy(update={"poi_catalogue_path": tmp_path / "catalogue"})
+    built = []
+    to_frame = columnar.CatalogueColumns.to_frame
+
+    def counting(self):
+        built.append(self.version)
+        return to_frame(self)
+
+    monkeypatch.setattr(columnar.CatalogueColumns, "to_frame", counting)
+    snapshot = deps.load_catalogue(settings)
+    assert built == [] and len(snapshot.columns) == 3
+    assert snapshot.frame is snapshot.frame and built == [snapshot.version]
@@ -0,0 +1,95 @@
+"""Encoder backends: fallback order and cosine parity with full-precision torch."""
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pytest
+
+from app.config import get_settings
+from app.services import embeddings as embeddings_module
+from app.services.embeddings import EmbeddingService
+from app.services.encoders import load_encoder, onnx_model_path
+
+TEXTS = [
+    "sunset views by the sea with street food",
+    "rooftop cafe with live music and city views",
+    "ancient rock-cut caves on an island ferry ride",
+    "budget shopping for handicrafts and textiles",
+    "peaceful temple visit early in the morning",
+]
+
+
+class _StubEncoder:
+    def encode(self, texts, convert_to_numpy=True):
+        return np.ones((len(texts), 4), dtype=np.float32) / 2
+
+
+def _service(monkeypatch, backend, loadable):
+    tried = []
+
+    def fake_load(settings):
+        tried.append(settings.embed_backend)
+        if settings.embed_backend not in loadable:
+            raise RuntimeError(f"{settings.embed_backend} unavailable")
+        return _StubEncoder()
+
+    monkeypatch.setattr(embeddings_module, "load_encoder", fake_load)
+    settings = get_settings().model_copy(update={"embed_backend": backend})
+    return EmbeddingService(settings), tried
+
+
+@pytest.mark.parametrize("backend", ["onnx", "int8"])
+def test_failed_fast_backend_falls_back_to_torch(monkeypatch, caplog, backend):
+    service, tried = _service(monkeypatch, backend, loadable={"torch"})
+    with caplog.at_level(logging.WARNING, logger=embeddings_module.logger.name):
+        assert service.backend_name == service.settings.embed_model
+    assert tried == [backend, "torch"]
+    assert f"Could not load {backend} encoder" in caplog.text
+
+
+def test_tfidf_only_when_torch_fails_too(monkeypatch, caplog):
+    service, tried = _service(monkeypatch, "onnx", loadable=set())
+    with caplog.at_level(logging.WARNING, logger=embeddings_module.logger.name):
+        assert service.backend_name == "tfidf"
+    assert tried == ["onnx", "torch"]
+    assert "Falling back to TF-IDF" in caplog.text
+
+
+def test_loaded_fast_backend_names_the_cache_namespace(monkeypatch):
+    service, tried = _service(monkeypatch, "onnx", loadable={"onnx", "torch"})
+    assert service.cache_namespace == f"{service.settings.embed_model}:onnx"
+    assert tried == ["onnx"]
+
+
+def _encode(backend):
+    settings = get_settings().model_copy(update={"embed_backend": backend})
+    return np.asarray(load_encoder(settings).encode(TEXTS, convert_to_numpy=True), dtype=np.float32)
+
+
+def _row_cosines(left, right):
+    left = left / np.linalg.norm(left, axis=1, keepdims=True)
+    right = right / np.linalg.norm(right, axis=1, keepdims=True)
+    return (left * right).sum(axis=1)
+
+
+@pytest.fixture(scope="module")
+def torch_vectors():
+    pytest.importorskip("torch")
+    pytest.importorskip("sentence_transformers")
+    try:
+        return _encode("torch")
+    except OSError as exc:  # model not downloadable here
+        pytest.skip(f"embedding model unavailable: {exc}")
+
+
+def test_int8_matches_torch(torch_vectors):
+    assert _row_cosines(_encode("int8"), torch_vectors).min() > 0.97
+
+
+def test_onnx_matches_torch(torch_vectors):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("transformers")
+    if not onnx_model_path(get_settings()).exists():
+        pytest.skip("no ONNX export; run python -m app.export_onnx")
+    assert _row_cosines(_encode("onnx"), torch_vectors).min() > 0.97
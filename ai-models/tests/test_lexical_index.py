@@ -0,0 +1,86 @@
+"""Incremental TF-IDF: edits are searchable at once and agree with a rebuild."""
+from __future__ import annotations
+
+import pytest
+
+from app.services.lexical_index import LexicalIndex
+
+DOCS = [
+    ("1", "Marine Drive sea promenade sunset walk"),
+    ("2", "Gateway of India monument and ferry rides"),
+    ("3", "Crawford Market street food and spices"),
+    ("4", "Sanjay Gandhi National Park forest trails"),
+    ("5", "Juhu Beach street food and sunset"),
+]
+STOPWORDS = {"and", "of"}
+
+
+def build(documents, **kwargs):
+    return LexicalIndex.build(documents, STOPWORDS, max_features=4096, **kwargs)
+
+
+def matches(index, query):
+    return {doc: score for doc, score in index.search(query, 10) if score > 0}
+
+
+def assert_same_ranking(left, right, query):
+    # zero-score ties come back in row order, which edits change
+    got, want = matches(left, query), matches(right, query)
+    assert got.keys() == want.keys()
+    assert [got[doc] for doc in want] == pytest.approx(list(want.values()))
+
+
+def test_new_term_is_searchable_before_compaction():
+    index = build(DOCS)
+    index.upsert("6", "Kala Ghoda art galleries and cafes")
+    assert index.stats()["delta_rows"] == 1
+    assert index.search("galleries", 3)[0][0] == "6"
+    rebuilt = build(DOCS + [("6", "Kala Ghoda art galleries and cafes")])
+    assert_same_ranking(index, rebuilt, "art cafes")
+
+
+def test_update_replaces_the_old_text():
+    index = build(DOCS)
+    index.upsert("2", "Elephanta caves island ferry")
+    assert index.search("caves", 3)[0][0] == "2"
+    assert "2" not in matches(index, "monument")
+    edited = [(doc, "Elephanta caves island ferry" if doc == "2" else text) for doc, text in DOCS]
+    assert_same_ranking(index, build(edited), "ferry sunset")
+
+
+def test_removed_document_is_not_returned():
+    index = build(DOCS)
+    assert index.remove("3")
+    assert not index.remove("3")
+    assert "3" not in matches(index, "street food")
+    assert_same_ranking(index, build([d for d in DOCS if d[0] != "3"]), "street food")
+
+
+def test_compaction_keeps_scores():
+    index = build(DOCS)
+    index.upsert("6", "Bandra bandstand sea walk")
+    index.remove("4")
+    before = matches(index, "sea walk sunset")
+    index.compact()
+    assert index.stats()["delta_rows"] == 0 and index.stats()["dead_rows"] == 0
+    after = matches(index, "sea walk sunset")
+    assert after.keys() == before.keys()
+    assert [after[doc] for doc in before] == pytest.approx(list(before.values()))
+
+
+def test_delta_rows_trigger_compaction():
+    index = build(DOCS, compact_delta_rows=2)
+    index.upsert("6", "Worli sea face")
+    index.upsert("7", "Haji Ali dargah")
+    assert index.generation == 1
+    assert index.stats()["delta_rows"] == 0
+
+
+def test_pinned_view_keeps_its_width():
+    index = build(DOCS)
+    view = index.view()
+    width = len(view.vocabulary)
+    index.upsert("6", "Kala Ghoda art galleries")
+    assert len(view.vocabulary) == width
+    assert view.transform(["art galleries"]).shape == (1, width)
+    assert len(index.view().vocabulary) > width
@@ -0,0 +1,75 @@
+"""Multi-day trips: balanced day clusters and what a plan reports as unscheduled."""
+from __future__ import annotations
+
+import datetime
+
+import numpy as np
+import pytest
+
+from app import deps
+from app.main import itinerary_service
+from app.schemas import MultiDayItineraryRequest
+from app.services.utils import balanced_kmeans
+
+
+@pytest.mark.parametrize("n, k, capacity", [(30, 3, 10), (25, 4, 7), (12, 5, 3), (5, 2, 2)])
+def test_balanced_kmeans_labels_every_point_within_capacity(n, k, capacity):
+    rng = np.random.default_rng(n)
+    # one dense neighbourhood and a few outliers: plain k-means would overfill
+    lats = np.r_[rng.normal(19.0, 0.005, n - 3), rng.uniform(18.9, 19.2, 3)]
+    lngs = np.r_[rng.normal(72.83, 0.005, n - 3), rng.uniform(72.8, 72.95, 3)]
+    labels = balanced_kmeans(lats, lngs, k, capacity)
+    assert labels.shape == (n,) and set(labels.tolist()) <= set(range(k))
+    assert np.bincount(labels, minlength=k).max() <= max(capacity, -(-n // k))
+
+
+def test_balanced_kmeans_keeps_separate_neighbourhoods_apart():
+    lats = np.r_[np.full(4, 18.92), np.full(4, 19.21)]
+    lngs = np.r_[np.full(4, 72.83), np.full(4, 72.91)]
+    labels = balanced_kmeans(lats, lngs, 2, 4)
+    assert len(set(labels[:4])) == 1 and len(set(labels[4:])) == 1
+    assert labels[0] != labels[4]
+
+
+def test_balanced_kmeans_raises_capacity_when_points_cannot_fit():
+    labels = balanced_kmeans(np.linspace(18.9, 19.2, 7), np.full(7, 72.83), 2, 2)
+    assert np.bincount(labels).max() == 4
+    assert balanced_kmeans(np.zeros(0), np.zeros(0), 3, 2).shape == (0,)
+
+
+def trip(poi_ids=None, days=2, stops_per_day=3):
+    start = datetime.date(2024, 3, 4)
+    return MultiDayItineraryRequest(
+        mood="heritage",
+        start_location={"lat": 18.9220, "lng": 72.8347},
+        start_date=start,
+        end_date=start + datetime.timedelta(days=days - 1),
+        daily_window={"start": "09:00", "end": "20:00"},
+        poi_ids=poi_ids,
+        stops_per_day=stops_per_day,
+    )
+
+
+def test_multi_day_plans_each_date_within_stops_per_day():
+    plan = itinerary_service.build_multi_day(trip(days=3))
+    assert [day.date.isoformat() for day in plan.days] == [
+        "2024-03-04",
+        "2024-03-05",
+        "2024-03-06",
+    ]
+    visited = [item.poi_id for day in plan.days for item in day.items]
+    assert visited and len(visited) == len(set(visited))
+    assert all(len(day.items) <= 3 for day in plan.days)
+    assert not set(visited) & set(plan.unscheduled)
+
+
+def test_every_requested_id_is_planned_or_unscheduled():
+    catalogue = deps.get_poi_frame()["id"].tolist()
+    requested = catalogue[:10] + ["no-such-place"]
+    plan = itinerary_service.build_multi_day(trip(requested, days=2, stops_per_day=3))
+    visited = [item.poi_id for day in plan.days for item in day.items]
+    assert len(visited) <= 6
+    assert sorted(visited + plan.unscheduled) == sorted(requested)
+    # beyond capacity the earliest requested ids are the ones planned
+    assert set(visited) <= set(catalogue[:6])
+    assert "no-such-place" in plan.unscheduled
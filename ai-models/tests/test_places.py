@@ -0,0 +1,97 @@
+"""places.json ingestion: streaming parser, opening-hours text and merging."""
+from __future__ import annotations
+
+import json
+
+import pandas as pd
+import pytest
+
+from app.places import iter_places, merge_places, parse_hours
+
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+def place(place_id, name, **extra):
+    return {"id": place_id, "name": name, "location": {"coordinates": [72.83, 18.92]}, **extra}
+
+
+@pytest.fixture
+def write(tmp_path):
+    def write(text):
+        path = tmp_path / "places.json"
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    return write
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64 * 1024])
+def test_iter_places_reads_records_across_chunk_boundaries(write, chunk_size):
+    records = [place(f"p{i}", f"Place {i}", description="x" * i * 5) for i in range(6)]
+    path = write(json.dumps(records, indent=2))
+    assert list(iter_places(path, chunk_size=chunk_size)) == records
+
+
+@pytest.mark.parametrize("chunk_size", [2, 64 * 1024])
+def test_iter_places_flattens_nested_arrays(write, chunk_size):
+    path = write('[{"id": 1}, [{"id": 2}, {"id": 3}], {"id": 4}, []]')
+    assert [r["id"] for r in iter_places(path, chunk_size=chunk_size)] == [1, 2, 3, 4]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"id": 1}',  # not an array
+        '[{"id": 1}, {"id": ',  # truncated inside a record
+        '[{"id": 1}, [{"id": 2}',  # truncated inside an array
+        '[{"id": 1} {"id": 2} oops]',
+    ],
+)
+def test_iter_places_rejects_malformed_input(write, text):
+    with pytest.raises(ValueError):
+        list(iter_places(write(text), chunk_size=4))
+
+
+def test_parse_hours_splits_overnight_ranges_into_the_next_day():
+    hours = parse_hours("6:00 PM - 2:00 AM")
+    assert all(hours[day] == [["00:00", "02:00"], ["18:00", "23:59"]] for day in DAYS)
+
+
+def test_overnight_range_after_a_closed_day_does_not_spill():
+    hours = parse_hours("8:00 PM - 1:30 AM (Closed Mondays)")
+    # Sunday night runs into Monday; nothing carries from Monday into Tuesday
+    assert hours["mon"] == [["00:00", "01:30"]]
+    assert hours["tue"] == [["20:00", "23:59"]]
+    assert hours["wed"] == [["00:00", "01:30"], ["20:00", "23:59"]]
+
+
+def test_parse_hours_all_day_and_closing_at_midnight():
+    assert parse_hours("24/7") == {day: [["00:00", "23:59"]] for day in DAYS}
+    assert parse_hours("Open 24 hours")["sun"] == [["00:00", "23:59"]]
+    assert parse_hours("5:00 PM - 12:00 AM")["tue"] == [["17:00", "23:59"]]
+
+
+def test_parse_hours_closed_days_and_unknown_text():
+    hours = parse_hours("6:00 AM - 10:00 AM, 4:00 PM - 8:00 PM (Closed Mondays)")
+    assert hours["mon"] == []
+    assert hours["tue"] == [["06:00", "10:00"], ["16:00", "20:00"]]
+    partial = parse_hours("10:00 AM - 6:00 PM (Closed on Sunday afternoons)")
+    assert partial["sun"] == [["10:00", "18:00"]]
+    assert parse_hours("Varies by show") == {}
+    assert parse_hours(None) == {}
+
+
+def test_merge_places_skips_slugged_duplicates_and_invalid_records():
+    df = pd.DataFrame([{"id": "gateway-india", "name": "Gateway of India"}])
+    records = [
+        place("gateway_of_india", "The Gateway"),  # id slug matches the CSV name
+        place("GATEWAY INDIA", "Somewhere else"),  # id slug matches the CSV id
+        place("kala-ghoda", "Kala Ghoda"),
+        place("kala_ghoda_2", "KALA GHODA"),  # repeat within places.json, by name
+        {"id": "no-location", "name": "Nowhere"},
+        "not a record",
+    ]
+    merged, stats = merge_places(df, records)
+    assert merged["id"].tolist() == ["gateway-india", "kala-ghoda"]
+    assert (stats.read, stats.added, stats.duplicates, stats.invalid) == (6, 1, 3, 2)
+    assert stats.elapsed_ms >= 0 and (stats.peak_rss_mib is None or stats.peak_rss_mib > 0)
@@ -0,0 +1,136 @@
+"""Token buckets and the prioritised wait queue in front of Gemini."""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.services.rate_limit import (
+    _STATE,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    FileTokenBucket,
+    RateLimiter,
+    TokenBucket,
+)
+
+
+def test_bucket_allows_a_burst_then_refills():
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    now = time.monotonic()
+    assert [bucket.take(now) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take(now) == pytest.approx(0.5)
+    assert bucket.take(now + 0.5) == 0.0
+    assert bucket.take(now + 100, consume=False) == 0.0
+    assert [bucket.take(now + 100) for _ in range(4)][-1] > 0
+
+
+def test_file_bucket_is_shared_between_instances(tmp_path):
+    first = FileTokenBucket(tmp_path / "gemini.bucket", rate=0.01, capacity=2)
+    second = FileTokenBucket(tmp_path / "gemini.bucket", rate=0.01, capacity=2)
+    try:
+        assert first.take(0.0) == 0.0
+        assert second.take(0.0) == 0.0
+        assert first.take(0.0) > 0 and second.take(0.0) > 0
+    finally:
+        first.close()
+        second.close()
+
+
+@pytest.mark.parametrize(
+    "stamp, admitted",
+    [
+        # written before a reboot, when monotonic stamps were still small
+        (123.0, True),
+        # a clock stepped back: do not lock callers out until it catches up
+        (time.time() + 86400, False),
+    ],
+)
+def test_file_bucket_survives_foreign_stamps(tmp_path, stamp, admitted):
+    path = tmp_path / "gemini.bucket"
+    path.write_bytes(_STATE.pack(0.0, stamp))
+    bucket = FileTokenBucket(path, rate=1.0, capacity=2)
+    try:
+        wait = bucket.take(time.monotonic())
+        assert (wait == 0.0) is admitted
+        assert wait <= 1.0
+        _, saved = _STATE.unpack(os.pread(bucket._fd, _STATE.size, 0))
+        assert saved <= time.time()
+    finally:
+        bucket.close()
+
+
+def test_burst_is_admitted_and_hopeless_calls_are_turned_away():
+    limiter = RateLimiter(requests_per_minute=1, burst=2, max_wait_seconds=0.5)
+    assert limiter.acquire() and limiter.acquire()
+    started = time.monotonic()
+    # the next token is a minute away: rejected up front instead of waiting
+    assert not limiter.acquire()
+    assert time.monotonic() - started < 0.1
+    stats = limiter.stats()
+    assert stats["admitted"] == 2 and stats["rejected"] == 1 and stats["queued"] == 0
+
+
+def test_full_queue_rejects():
+    limiter = RateLimiter(requests_per_minute=600, burst=1, max_queue=0)
+    assert limiter.acquire()
+    assert not limiter.acquire()
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_interactive_callers_are_served_before_background():
+    limiter = RateLimiter(requests_per_minute=1200, burst=1, max_wait_seconds=2)
+    order = []
+
+    async def call(name, priority):
+        if await limiter.acquire_async(priority):
+            order.append(name)
+
+    async def scenario():
+        assert await limiter.acquire_async()
+        background = asyncio.create_task(call("background", PRIORITY_BACKGROUND))
+        await asyncio.sleep(0)
+        first = asyncio.create_task(call("interactive-1", PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(call("interactive-2", PRIORITY_INTERACTIVE))
+        await asyncio.gather(background, first, second)
+
+    asyncio.run(scenario())
+    assert order == ["interactive-1", "interactive-2", "background"]
+    stats = limiter.stats()
+    assert stats["queued"] == 3 and stats["waiting"] == 0 and stats["avg_wait_ms"] > 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    limiter = RateLimiter(requests_per_minute=60, burst=1, max_wait_seconds=5)
+
+    async def scenario():
+        assert await limiter.acquire_async()
+        waiter = asyncio.create_task(limiter.acquire_async())
+        await asyncio.sleep(0.05)
+        assert limiter.stats()["waiting"] == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(scenario())
+    stats = limiter.stats()
+    assert stats["cancelled"] == 1 and stats["waiting"] == 0 and stats["admitted"] == 1
+
+
+def test_deadline_accounts_for_callers_ahead():
+    limiter = RateLimiter(requests_per_minute=120, burst=1, max_wait_seconds=5)
+
+    async def scenario():
+        assert await limiter.acquire_async()
+        ahead = asyncio.create_task(limiter.acquire_async())
+        await asyncio.sleep(0)
+        # alone it would get the token in ~0.5 s; behind ``ahead`` it needs ~1 s
+        assert not await limiter.acquire_async(deadline=time.monotonic() + 0.8)
+        return await ahead
+
+    assert asyncio.run(scenario())
+    stats = limiter.stats()
+    assert stats["rejected"] == 1 and stats["admitted"] == 2 and stats["expired"] == 0
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import pytest
+
+from app.main import recommend_service
+from app.schemas import Filters, RecommendRequest
+from app.services.recommend import RESULT_LIMIT
+from app.services.scoring import get_poi_features
+
+
+def ranked(payload: RecommendRequest):
+    features = get_poi_features()
+    vector = recommend_service._encode_prompts([recommend_service._mood_prompt(payload)])[0]
+    return [
+        (item["id"], round(item["score"], 6))
+        for item in recommend_service._rank(payload, features, vector)
+    ]
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [Filters(tags=["family"]), Filters(rating_min=4.7), Filters(tags=["date", "music"])],
+)
+def test_filtered_index_search_matches_exact_scan(monkeypatch, filters):
+    payload = RecommendRequest(mood="Chill", filters=filters)
+    settings = recommend_service.settings
+    monkeypatch.setattr(settings, "retrieval_candidates", 0)
+    exact = ranked(payload)
+    # an index search over fewer neighbours than there are filter matches
+    monkeypatch.setattr(settings, "retrieval_candidates", 10)
+    assert recommend_service._uses_index(len(get_poi_features()))
+    assert ranked(payload) == exact
+    assert len(exact) == min(RESULT_LIMIT, int(get_poi_features().filter_mask(filters).sum()))
+
+
+def test_unfiltered_index_search_fills_a_page(monkeypatch):
+    monkeypatch.setattr(recommend_service.settings, "retrieval_candidates", 20)
+    assert len(ranked(RecommendRequest(mood="Culture"))) == RESULT_LIMIT
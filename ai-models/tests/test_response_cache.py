@@ -0,0 +1,64 @@
+"""Semantic response cache: similarity, context and namespace keying."""
+from __future__ import annotations
+
+import numpy as np
+
+from app.services.response_cache import SemanticResponseCache
+
+CONTEXT = ["Marine Drive: sea promenade", "Juhu Beach: street food"]
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float64)
+    return vector / np.linalg.norm(vector)
+
+
+def test_similar_query_with_same_context_hits():
+    cache = SemanticResponseCache(8, 0, threshold=0.9)
+    assert cache.get(unit(1, 0), CONTEXT, "v1") is None
+    cache.put(unit(1, 0), CONTEXT, "answer", 1.5, "v1")
+    assert cache.get(unit(1, 0.2), list(reversed(CONTEXT)), "v1") == "answer"
+    assert cache.get(unit(1, 1), CONTEXT, "v1") is None
+    assert cache.get(unit(1, 0), CONTEXT[:1], "v1") is None
+    assert cache.stats()["seconds_saved"] == 1.5
+
+
+def test_overlapping_namespaces_do_not_evict_each_other():
+    cache = SemanticResponseCache(8, 0, threshold=0.9)
+    for namespace in ("old", "new"):
+        cache.get(unit(1, 0), CONTEXT, namespace)
+        cache.put(unit(1, 0), CONTEXT, f"{namespace} answer", 1.0, namespace)
+    # requests on both snapshots interleave during a reload
+    for _ in range(3):
+        assert cache.get(unit(1, 0), CONTEXT, "old") == "old answer"
+        assert cache.get(unit(1, 0), CONTEXT, "new") == "new answer"
+    assert cache.stats()["invalidations"] == 0
+
+
+def test_namespace_beyond_the_last_two_is_dropped():
+    cache = SemanticResponseCache(8, 0, threshold=0.9)
+    for namespace in ("v1", "v2", "v3"):
+        cache.get(unit(1, 0), CONTEXT, namespace)
+        cache.put(unit(1, 0), CONTEXT, namespace, 1.0, namespace)
+    assert cache.stats()["entries"] == 2 and cache.stats()["invalidations"] == 1
+    # a late answer for the retired namespace is not stored
+    cache.put(unit(1, 0), CONTEXT, "late", 1.0, "v1")
+    assert cache.stats()["entries"] == 2
+    assert cache.get(unit(1, 0), CONTEXT, "v3") == "v3"
+    assert cache.get(unit(1, 0), CONTEXT, "v2") == "v2"
+
+
+def test_lru_eviction_and_disabled_cache():
+    cache = SemanticResponseCache(2, 0, threshold=0.9)
+    cache.get(unit(1, 0), CONTEXT, "v1")
+    for pos in range(3):
+        cache.put(unit(1, 0), [f"poi {pos}"], str(pos), 1.0, "v1")
+    assert cache.get(unit(1, 0), ["poi 0"], "v1") is None
+    assert cache.get(unit(1, 0), ["poi 2"], "v1") == "2"
+    assert cache.stats()["evictions"] == 1
+
+    off = SemanticResponseCache(0, 0, threshold=0.9)
+    off.get(unit(1, 0), CONTEXT, "v1")
+    off.put(unit(1, 0), CONTEXT, "answer", 1.0, "v1")
+    assert off.get(unit(1, 0), CONTEXT, "v1") is None
+    assert off.stats()["gemini_calls"] == 1
@@ -0,0 +1,90 @@
+"""Time-window route optimisation for a day's stops."""
+from __future__ import annotations
+
+import itertools
+
+import numpy as np
+import pytest
+
+from app.services.utils import optimize_route
+
+
+def random_instance(seed, n=6):
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 10, size=(n + 1, 2))
+    dist = np.linalg.norm(points[:, None] - points[None], axis=2)
+    return dist[1:, 1:], dist[0, 1:]
+
+
+def brute_force_travel(travel, origin):
+    best = np.inf
+    for order in itertools.permutations(range(len(origin))):
+        total = origin[order[0]] + sum(travel[a, b] for a, b in zip(order, order[1:]))
+        best = min(best, total)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_open_day_route_is_optimal_on_small_instances(seed):
+    travel, origin = random_instance(seed)
+    plan = optimize_route(travel, origin, [0] * 6, 0, 1e9, time_budget_ms=500)
+    assert sorted(plan.order) == list(range(6)) and not plan.dropped and plan.feasible
+    assert plan.travel_minutes == pytest.approx(brute_force_travel(travel, origin))
+
+
+def test_schedule_follows_travel_dwell_and_windows():
+    travel = np.array([[0, 10, 20], [10, 0, 10], [20, 10, 0]], dtype=float)
+    origin = np.array([5, 15, 25], dtype=float)
+    windows = np.array([[0, 1e9], [100, 1e9], [0, 1e9]])
+    plan = optimize_route(travel, origin, [30, 30, 30], 0, 1e9, windows=windows)
+    assert plan.feasible
+    for stop, begin in zip(plan.order, plan.starts):
+        assert begin >= windows[stop, 0]
+    # waiting for the window is allowed; visits never overlap
+    for (a, begin_a), (b, begin_b) in zip(
+        zip(plan.order, plan.starts), zip(plan.order[1:], plan.starts[1:])
+    ):
+        assert begin_b >= begin_a + 30 + travel[a, b]
+    assert plan.finish == pytest.approx(plan.starts[-1] + 30)
+
+
+def test_windows_force_the_visit_order():
+    # geographically 0 -> 1 -> 2, but stop 2 closes before 1 opens
+    travel = np.array([[0, 5, 10], [5, 0, 5], [10, 5, 0]], dtype=float)
+    origin = np.array([5, 10, 15], dtype=float)
+    windows = np.array([[0, 1e9], [120, 1e9], [0, 60]])
+    plan = optimize_route(travel, origin, [20, 20, 20], 0, 1e9, windows=windows)
+    assert plan.feasible
+    assert plan.order.index(2) < plan.order.index(1)
+
+
+def test_overfull_day_drops_optional_stops_only():
+    travel, origin = random_instance(7)
+    plan = optimize_route(travel, origin, [60] * 6, 0, 200, mandatory=[3, 4])
+    assert plan.feasible
+    assert plan.dropped and {3, 4} <= set(plan.order)
+    assert sorted(plan.order + plan.dropped) == list(range(6))
+    assert plan.finish <= 200
+
+
+def test_infeasible_mandatory_stops_report_lateness():
+    travel, origin = random_instance(8, n=3)
+    plan = optimize_route(travel, origin, [120] * 3, 0, 60, mandatory=[0, 1, 2])
+    assert not plan.dropped and not plan.feasible
+    assert plan.lateness == pytest.approx(plan.finish - 60)
+
+
+def test_stop_that_can_never_fit_is_dropped():
+    travel = np.array([[0, 5, 10], [5, 0, 5], [10, 5, 0]], dtype=float)
+    origin = np.array([5, 10, 15], dtype=float)
+    windows = np.array([[0, 1e9], [-np.inf, -np.inf], [0, 1e9]])
+    plan = optimize_route(travel, origin, [20] * 3, 0, 1e9, windows=windows)
+    assert plan.dropped == [1] and sorted(plan.order) == [0, 2]
+    assert plan.feasible
+
+
+def test_route_ends_when_no_stop_can_fit():
+    travel, origin = random_instance(9, n=3)
+    windows = np.full((3, 2), -np.inf)
+    plan = optimize_route(travel, origin, [20] * 3, 0, 1e9, windows=windows)
+    assert plan.order == [] and sorted(plan.dropped) == [0, 1, 2]
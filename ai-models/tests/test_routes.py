@@ -0,0 +1,72 @@
+"""The precomputed POI travel matrix."""
+from __future__ import annotations
+
+import itertools
+
+import numpy as np
+import pytest
+
+from app import deps
+from app.build_travel_matrix import build_heuristic, bucket_speeds
+from app.services.poi_matrix import MatrixWriter, load_matrix
+from app.services.itinerary import PlanStop, _leg
+from app.services.utils import pairwise_km, speed_at_minute
+
+
+@pytest.fixture(scope="module")
+def matrix(tmp_path_factory):
+    columns = deps.current_catalogue().columns
+    lats = np.asarray(columns.latitude, dtype=np.float64)
+    lngs = np.asarray(columns.longitude, dtype=np.float64)
+    target = tmp_path_factory.mktemp("matrix") / "travel_matrix"
+    speeds, layers = bucket_speeds(60)
+    writer = MatrixWriter(target, len(lats), len(speeds), "float32")
+    build_heuristic(writer, lats, lngs, speeds, block=7)
+    writer.publish(deps.get_catalogue_version(), 60, layers, "heuristic")
+    return target, lats, lngs
+
+
+def test_heuristic_matrix_matches_online_estimate(matrix):
+    target, lats, lngs = matrix
+    loaded = load_matrix(target, deps.get_catalogue_version())
+    assert len(loaded) == len(lats)
+    rows = np.arange(min(12, len(lats)))
+    km = pairwise_km(lats[rows], lngs[rows])
+    np.testing.assert_allclose(loaded.km(rows, rows), km, rtol=1e-5, atol=1e-5)
+    for hour in (3, 8, 12, 18):
+        expected = km / speed_at_minute(hour * 60) * 60
+        np.testing.assert_allclose(
+            loaded.minutes(rows, rows, hour * 60 + 30), expected, rtol=1e-5, atol=1e-4
+        )
+    assert len(set(loaded.bucket_layers)) == len(bucket_speeds(60)[0]) < 24
+
+
+@pytest.mark.parametrize("minute", [3 * 60, 8 * 60 + 15, 12 * 60, 18 * 60 + 45])
+def test_itinerary_legs_agree_with_and_without_the_matrix(matrix, minute):
+    # the matrix may only replace the computation, never change the answer
+    target, lats, lngs = matrix
+    loaded = load_matrix(target, deps.get_catalogue_version())
+    rows = range(min(8, len(lats)))
+    for a, b in itertools.permutations(rows, 2):
+        stop = PlanStop(str(b), "", float(lats[b]), float(lngs[b]), "", None, row=b)
+        start = (float(lats[a]), float(lngs[a]))
+        offline = _leg(None, start, a, stop, minute)
+        online = _leg(loaded, start, a, stop, minute)
+        np.testing.assert_allclose(online, offline, rtol=1e-4, atol=1e-3)
+
+
+def test_matrix_rows_follow_catalogue_coordinates(matrix):
+    target, lats, lngs = matrix
+    loaded = load_matrix(target, deps.get_catalogue_version())
+    coords = list(zip(np.round(lats, 5).tolist(), np.round(lngs, 5).tolist()))
+    first = {}
+    for row, coord in enumerate(coords):
+        first.setdefault(coord, row)
+    for row, coord in enumerate(coords):
+        assert loaded.row_at(lats[row], lngs[row]) == first[coord]
+    assert loaded.row_at(0.0, 0.0) is None
+
+
+def test_matrix_for_another_catalogue_is_ignored(matrix):
+    target, _, _ = matrix
+    assert load_matrix(target, "not-this-catalogue") is None
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.schemas import Filters, Location
+from app.services.scoring import PoiFeatures, score_candidates, top_k
+from app.services.spatial_index import GridIndex
+from app.services.utils import haversine_km, normalize
+
+WEIGHTS = (0.45, 0.2, 0.2, 0.05, 0.1)
+
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    n = 60
+    return pd.DataFrame(
+        {
+            "id": [f"poi-{i}" for i in range(n)],
+            "category": rng.choice(["Museum", "Park", "Cafe", "Fort"], n),
+            "tags": [list(rng.choice(["kids", "sunset", "art", "food"], 2)) for _ in range(n)],
+            "latitude": 18.9 + rng.random(n) * 0.3,
+            "longitude": 72.8 + rng.random(n) * 0.1,
+            "rating": np.where(rng.random(n) < 0.1, np.nan, 3 + rng.random(n) * 2),
+            "price_level": rng.choice([0, 1, 2, 3, 4], n).astype(float),
+        }
+    )
+
+
+def reference_scores(df, similarities, categories, location, budget):
+    """Row-by-row scoring as the service did before it was vectorised."""
+    category = [1.0 if c in categories else 0.3 for c in df["category"]]
+    if location is not None:
+        distances = [
+            haversine_km((location.lat, location.lng), (lat, lng))
+            for lat, lng in zip(df["latitude"], df["longitude"])
+        ]
+        distance = [1 - d for d in normalize(distances)]
+    else:
+        distance = [0.5] * len(df)
+    if budget:
+        target = {"low": 0, "medium": 2, "high": 4}[budget]
+        # unknown and free price levels count as mid-range
+        levels = [p if p and not math.isnan(p) else 2 for p in df["price_level"]]
+        price = [1 - abs(level - target) / 4 for level in levels]
+    else:
+        price = [0.5] * len(df)
+    rating = normalize(df["rating"].fillna(3.5).tolist())
+    parts = zip(similarities, category, distance, price, rating)
+    return np.array([sum(w * v for w, v in zip(WEIGHTS, row)) for row in parts])
+
+
+@pytest.mark.parametrize(
+    "location, budget",
+    [(None, None), (Location(lat=19.0, lng=72.85), None), (Location(lat=18.95, lng=72.83), "low")],
+)
+def test_vectorised_scores_match_row_by_row(frame, location, budget):
+    features = PoiFeatures.from_frame(frame)
+    idx = np.arange(len(frame))
+    similarities = np.linspace(0.1, 0.9, len(frame))
+    scores = score_candidates(
+        features, idx, similarities, ["Museum", "Park"], location, budget, WEIGHTS
+    )
+    expected = reference_scores(frame, similarities, ["Museum", "Park"], location, budget)
+    np.testing.assert_allclose(scores, expected, rtol=1e-9)
+
+
+def test_radius_distance_score_decays_linearly_to_zero(frame):
+    features = PoiFeatures.from_frame(frame)
+    origin = Location(lat=19.0, lng=72.85)
+    idx = np.arange(len(frame))
+    zeros = np.zeros(len(frame))
+    # only the distance weight, so the score is the distance term itself
+    scores = score_candidates(features, idx, zeros, [], origin, None, (0, 0, 1, 0, 0), radius_km=10)
+    km = np.array(
+        [haversine_km((19.0, 72.85), (a, b)) for a, b in zip(frame["latitude"], frame["longitude"])]
+    )
+    np.testing.assert_allclose(scores, np.clip(1 - km / 10, 0, 1))
+
+
+def test_filter_mask_matches_pandas_filters(frame):
+    features = PoiFeatures.from_frame(frame)
+    filters = Filters(category="mus", tags=["kids", "art"], rating_min=3.5, price_level=3)
+    expected = (
+        frame["category"].str.contains("mus", case=False)
+        & frame["tags"].apply(lambda tags: bool({"kids", "art"} & set(tags)))
+        & (frame["rating"].fillna(0) >= 3.5)
+        & (frame["price_level"].fillna(0) <= 3)
+    )
+    np.testing.assert_array_equal(features.filter_mask(filters), expected.to_numpy())
+
+
+def test_top_k_breaks_ties_by_position():
+    scores = np.array([0.2, 0.9, 0.5, 0.9, 0.5, 0.1])
+    assert top_k(scores, 4).tolist() == [1, 3, 2, 4]
+    assert top_k(scores, 10).tolist() == [1, 3, 2, 4, 0, 5]
+
+
+@pytest.mark.parametrize("cell_km", [0.25, 1.0, 5.0])
+def test_grid_index_matches_brute_force(cell_km):
+    rng = np.random.default_rng(11)
+    lat = 18.9 + rng.random(500) * 0.4
+    lng = 72.75 + rng.random(500) * 0.3
+    lat[::50] = np.nan  # rows without coordinates are never returned
+    grid = GridIndex(lat, lng, cell_km)
+    for origin in [(19.05, 72.85), (18.7, 72.6), (19.3, 73.1)]:
+        km = np.array(
+            [haversine_km(origin, (a, b)) if np.isfinite(a) else np.inf for a, b in zip(lat, lng)]
+        )
+        found, distances = grid.within(*origin, 6.0)
+        assert sorted(found.tolist()) == np.flatnonzero(km <= 6.0).tolist()
+        np.testing.assert_allclose(distances, km[found])
+        nearest, near_km = grid.nearest(*origin, 12)
+        np.testing.assert_allclose(near_km, np.sort(km)[:12])
+        assert np.all(np.diff(near_km) >= 0)
@@ -0,0 +1,111 @@
+"""OSRM table client: request shape, column order and the per-pair cache."""
+from __future__ import annotations
+
+import asyncio
+from urllib.parse import parse_qs
+
+import httpx
+import numpy as np
+import pytest
+
+from app.config import get_settings
+from app.schemas import Location
+from app.services.travel_matrix import TravelMatrixService
+from app.services.travel_time import TravelTimeService
+from app.services.utils import pairwise_km
+
+A, B, C = (18.9220, 72.8347), (18.9400, 72.8350), (18.9600, 72.8200)
+
+
+class FakeOsrm:
+    """OSRM ``/table``: 1 km per minute, every point when sources/destinations are absent."""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        coords = request.url.path.rsplit("/", 1)[-1].split(";")
+        lngs, lats = zip(*(map(float, coord.split(",")) for coord in coords))
+        query = parse_qs(request.url.query.decode())
+        every = list(range(len(coords)))
+        sources = [int(i) for i in query["sources"][0].split(";")] if "sources" in query else every
+        destinations = (
+            [int(i) for i in query["destinations"][0].split(";")]
+            if "destinations" in query
+            else every
+        )
+        self.requests.append((len(coords), sources, destinations))
+        km = pairwise_km(np.array(lats), np.array(lngs))[np.ix_(sources, destinations)]
+        body = {"code": "Ok", "durations": (km * 60).tolist(), "distances": (km * 1000).tolist()}
+        return httpx.Response(200, json=body)
+
+
+@pytest.fixture
+def osrm():
+    return FakeOsrm()
+
+
+@pytest.fixture
+def service(osrm):
+    svc = TravelMatrixService(get_settings())
+    svc._client = httpx.Client(transport=httpx.MockTransport(osrm))
+    yield svc
+    svc.close()
+
+
+def expected_minutes(points):
+    lats, lngs = np.array(points).T
+    return pairwise_km(lats, lngs)
+
+
+def test_full_matrix_keeps_rows_and_columns_in_place(service, osrm):
+    result = service.matrix([A, B, C])
+    np.testing.assert_allclose(result.durations, expected_minutes([A, B, C]), rtol=1e-9)
+    np.testing.assert_allclose(result.distances, expected_minutes([A, B, C]), rtol=1e-9)
+    assert osrm.requests == [(3, [0, 1, 2], [0, 1, 2])]
+
+
+def test_only_missing_pairs_are_fetched(service, osrm):
+    service.matrix([A, B], pairs=[(0, 1)])
+    result = service.matrix([C, A, B])
+    np.testing.assert_allclose(result.durations, expected_minutes([C, A, B]), rtol=1e-9)
+    # A -> B was cached; the second table covers the pairs touching C and B -> A
+    assert len(osrm.requests) == 2
+    size, sources, destinations = osrm.requests[1]
+    assert size == 3 and sorted(sources) == [0, 1, 2] and sorted(destinations) == [0, 1, 2]
+
+
+def test_repeated_call_is_served_from_cache(service, osrm):
+    first = service.matrix([A, B, C], minute_of_day=10 * 60)
+    second = service.matrix([A, B, C], minute_of_day=10 * 60 + 5)
+    np.testing.assert_array_equal(first.durations, second.durations)
+    assert len(osrm.requests) == 1
+    assert service.stats()["hits"] == 6
+
+
+def test_revisited_points_reuse_the_same_legs(service, osrm):
+    result = service.matrix([A, B, A])
+    np.testing.assert_allclose(result.durations, expected_minutes([A, B, A]), atol=1e-9)
+    assert osrm.requests[0][0] == 2
+
+
+def test_round_trip_travel_time(service):
+    legs = TravelTimeService(get_settings(), service).estimate(
+        [Location(lat=A[0], lng=A[1]), Location(lat=B[0], lng=B[1]), Location(lat=A[0], lng=A[1])]
+    )
+    km = float(expected_minutes([A, B])[0, 1])
+    assert [leg.duration_min for leg in legs.legs] == [round(km, 1), round(km, 1)]
+    assert legs.legs[0].duration_min > 0
+
+
+def test_async_matrix_matches(osrm):
+    async def scenario():
+        svc = TravelMatrixService(get_settings())
+        svc._async_client = httpx.AsyncClient(transport=httpx.MockTransport(osrm))
+        try:
+            return await svc.matrix_async([C, B, A])
+        finally:
+            await svc.aclose()
+
+    result = asyncio.run(scenario())
+    np.testing.assert_allclose(result.durations, expected_minutes([C, B, A]), rtol=1e-9)